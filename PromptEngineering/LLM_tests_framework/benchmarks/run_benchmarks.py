@@ -0,0 +1,233 @@
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from src.frameworks.custom_metrics import CustomMetrics
+from src.frameworks.performance_tracker import PerformanceTracker
+from src.frameworks.trend_statistics import TrendStatistics
+from .synthetic import generate_history, generate_model_metrics, generate_price_table, generate_usage, iter_requests
+
+REQUEST_SCALES = [10**3, 10**4, 10**5, 10**6, 10**7]
+MODEL_SCALES = [10, 100, 1000]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'config', 'config.json')
+THRESHOLD_CHECKS = 1000
+HISTORY_RUNS = 100
+EVALUATION_CRITERIA = {'weights': {'performance': 0.6, 'cost': 0.2, 'latency': 0.1, 'features': 0.1}}
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    seconds: float
+    peak_mb: float
+
+# A case builds its fixtures outside the measurement and returns the callable to measure
+Case = Callable[[], Callable[[], object]]
+
+def track_request_case(n_requests: int, n_models: int) -> Case:
+    def setup():
+        tracker = PerformanceTracker()
+        requests = list(iter_requests(generate_usage(n_requests, n_models)))
+
+        def run():
+            for request in requests:
+                tracker.track_request(request)
+        return run
+    return setup
+
+def analyze_costs_case(n_requests: int, n_models: int) -> Case:
+    def setup():
+        tracker = PerformanceTracker()
+        tracker.usage_store.extend(**generate_usage(n_requests, n_models))
+        return lambda: tracker.analyze_costs('day')
+    return setup
+
+def recompute_costs_case(n_requests: int, n_models: int) -> Case:
+    """Reprice every stored request after a price change"""
+    def setup():
+        tracker = PerformanceTracker()
+        tracker.usage_store.extend(**generate_usage(n_requests, n_models))
+        pricing = generate_price_table(n_models)
+        return lambda: tracker.recompute_costs(pricing)
+    return setup
+
+def check_thresholds_case(n_requests: int) -> Case:
+    """THRESHOLD_CHECKS threshold checks against a rolling window holding n_requests"""
+    def setup():
+        tracker = PerformanceTracker({'threshold_window_requests': n_requests})
+        usage = generate_usage(n_requests, 10)
+        for cost, latency, success in zip(usage['cost'].tolist(), usage['latency_ms'].tolist(),
+                                          usage['success'].tolist()):
+            tracker.threshold_window.add(cost, latency, success)
+
+        def run():
+            for _ in range(THRESHOLD_CHECKS):
+                tracker._check_thresholds()
+        return run
+    return setup
+
+def scoring_only_metrics(config: Dict) -> CustomMetrics:
+    """CustomMetrics for a config without its on-disk result cache, closed since scoring never evaluates"""
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as file:
+        json.dump({key: value for key, value in config.items() if key != 'result_cache'}, file)
+    try:
+        tester = CustomMetrics(file.name)
+    finally:
+        os.unlink(file.name)
+    tester.close()
+    return tester
+
+def calculate_model_score_case(n_models: int) -> Case:
+    def setup():
+        tester = scoring_only_metrics({})
+        tester.evaluation_criteria = EVALUATION_CRITERIA
+        metrics = generate_model_metrics(n_models)
+        return lambda: [tester.calculate_model_score(model) for model in metrics]
+    return setup
+
+def score_models_case(n_models: int) -> Case:
+    """Every weighting in the repo config, plus the Pareto front, in one batch"""
+    def setup():
+        with open(CONFIG_PATH) as file:
+            tester = scoring_only_metrics(json.load(file))
+        metrics = generate_model_metrics(n_models)
+
+        def run():
+            tester.score_models(metrics)
+            return tester.pareto_options(metrics)
+        return run
+    return setup
+
+def detect_significant_changes_case(n_models: int) -> Case:
+    """Fold in one run and detect changes, which is all DeepEvalMetrics._detect_significant_changes does per cycle.
+
+    TrendStatistics is driven directly so the benchmark does not need deepeval installed.
+    """
+    def setup():
+        trends = TrendStatistics()
+        *history, latest = generate_history(HISTORY_RUNS + 1, n_models)
+        for run in history:
+            trends.update(run['results'], run['timestamp'])
+
+        def run():
+            trends.update(latest['results'], latest['timestamp'])
+            return trends.detect_changes(0.05)
+        return run
+    return setup
+
+def build_cases(max_requests: int = 10**5, max_models: int = 1000) -> Iterator[Tuple[str, Case]]:
+    requests = [n for n in REQUEST_SCALES if n <= max_requests]
+    models = [n for n in MODEL_SCALES if n <= max_models]
+    for n_requests in requests:
+        for n_models in models:
+            yield f"track_request[requests={n_requests},models={n_models}]", track_request_case(n_requests, n_models)
+            yield f"analyze_costs[requests={n_requests},models={n_models}]", analyze_costs_case(n_requests, n_models)
+            yield f"recompute_costs[requests={n_requests},models={n_models}]", recompute_costs_case(n_requests, n_models)
+        yield f"check_thresholds[requests={n_requests}]", check_thresholds_case(n_requests)
+    for n_models in models:
+        yield f"calculate_model_score[models={n_models}]", calculate_model_score_case(n_models)
+        yield f"score_models[models={n_models}]", score_models_case(n_models)
+        yield f"detect_significant_changes[models={n_models}]", detect_significant_changes_case(n_models)
+
+def measure(setup: Case, repeat: int = 3) -> Tuple[float, float]:
+    """Best wall time over `repeat` fresh runs, then peak traced memory of one more run, in MB.
+
+    Memory is traced in a separate run because tracemalloc slows Python code down.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        run = setup()
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+        del run
+
+    run = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 2**20
+
+def run_benchmarks(max_requests: int = 10**5, max_models: int = 1000, repeat: int = 3,
+                   names: Optional[List[str]] = None) -> List[BenchmarkResult]:
+    results = []
+    for name, setup in build_cases(max_requests, max_models):
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        seconds, peak_mb = measure(setup, repeat)
+        results.append(BenchmarkResult(name, seconds, peak_mb))
+        print(f"{name:<60} {seconds * 1000:>12.3f} ms {peak_mb:>10.2f} MB", file=sys.stderr)
+    return results
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def save_baseline(results: List[BenchmarkResult], path: str = BASELINE_PATH):
+    """Merge results into the baseline file, keeping entries for cases that were not run"""
+    baseline = load_baseline(path)
+    baseline.update({result.name: {'seconds': result.seconds, 'peak_mb': result.peak_mb} for result in results})
+    with open(path, 'w') as file:
+        json.dump(dict(sorted(baseline.items())), file, indent=2)
+        file.write('\n')
+
+def compare(results: List[BenchmarkResult], baseline: Dict[str, Dict[str, float]],
+            time_tolerance: float = 0.25, memory_tolerance: float = 0.10,
+            min_seconds: float = 0.001, min_mb: float = 0.5) -> List[str]:
+    """Describe every result that is slower or uses more memory than its baseline allows.
+
+    The absolute slack (min_seconds, min_mb) keeps timer and allocator noise on
+    tiny cases from being reported as regressions.
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if result.seconds > base['seconds'] * (1 + time_tolerance) + min_seconds:
+            regressions.append(f"{result.name}: time {base['seconds'] * 1000:.3f} ms -> {result.seconds * 1000:.3f} ms")
+        if result.peak_mb > base['peak_mb'] * (1 + memory_tolerance) + min_mb:
+            regressions.append(f"{result.name}: peak memory {base['peak_mb']:.2f} MB -> {result.peak_mb:.2f} MB")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the framework's own hot paths on synthetic data")
+    parser.add_argument('--max-requests', type=int, default=10**5, help='largest number of tracked requests')
+    parser.add_argument('--max-models', type=int, default=1000)
+    parser.add_argument('--full', action='store_true', help='run every scale up to 10^7 requests')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', help='run only cases whose name starts with one of these')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--memory-tolerance', type=float, default=0.10)
+    args = parser.parse_args()
+
+    max_requests = REQUEST_SCALES[-1] if args.full else args.max_requests
+    results = run_benchmarks(max_requests, args.max_models, args.repeat, args.only)
+    regressions = compare(results, load_baseline(args.baseline), args.time_tolerance, args.memory_tolerance)
+    print(json.dumps({
+        'results': [asdict(result) for result in results],
+        'regressions': regressions
+    }, indent=2))
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+    elif regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
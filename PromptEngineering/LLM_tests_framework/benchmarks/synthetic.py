@@ -0,0 +1,82 @@
+from datetime import datetime
+from typing import Dict, Iterator, List
+import numpy as np
+from src.frameworks.custom_metrics import ModelMetrics
+from src.frameworks.pricing import ModelPrice, PriceTable, PriceTier
+
+# Synthetic traffic stays under PerformanceTracker's default thresholds so no alerts fire while timing
+START = np.datetime64('2024-01-01T00:00:00', 'ns')
+BENCHMARK_NAMES = ['mmlu', 'hellaswag', 'truthfulqa', 'humaneval', 'custom']
+
+def model_names(n_models: int) -> List[str]:
+    return [f"model-{i:04d}" for i in range(n_models)]
+
+def generate_usage(n_requests: int, n_models: int, days: int = 30, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Columns for n_requests tracked requests spread over `days`, with Zipf-skewed model popularity"""
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_models + 1)
+    codes = rng.choice(n_models, size=n_requests, p=popularity / popularity.sum())
+    offsets = np.sort(rng.integers(0, days * 86_400 * 10**9, size=n_requests))
+    tokens = rng.integers(10, 90, size=n_requests)
+    completion_tokens = tokens // 4
+    return {
+        'models': np.array(model_names(n_models), dtype=object)[codes],
+        'tokens_used': tokens,
+        'prompt_tokens': tokens - completion_tokens,
+        'completion_tokens': completion_tokens,
+        'cached_tokens': np.where(rng.random(n_requests) < 0.3, (tokens - completion_tokens) // 2, 0),
+        'latency_ms': rng.lognormal(np.log(200.0), 0.3, size=n_requests),
+        'cost': tokens * 0.01,
+        'success': rng.random(n_requests) < 0.99,
+        'timestamps': START + offsets.astype('timedelta64[ns]')
+    }
+
+def iter_requests(usage: Dict[str, np.ndarray]) -> Iterator[Dict]:
+    """Turn generated columns into the request dicts PerformanceTracker.track_request expects"""
+    timestamps = usage['timestamps'].astype('datetime64[us]').tolist()
+    columns = zip(usage['models'], usage['tokens_used'].tolist(), usage['latency_ms'].tolist(),
+                  usage['success'].tolist(), timestamps)
+    for model, tokens, latency, success, timestamp in columns:
+        yield {'model': model, 'tokens': tokens, 'latency': latency, 'success': success, 'timestamp': timestamp}
+
+def generate_price_table(n_models: int, seed: int = 0) -> PriceTable:
+    """Prices for every synthetic model; every other model has a long-prompt tier and a cache discount"""
+    rng = np.random.default_rng(seed)
+    prices = {}
+    for i, name in enumerate(model_names(n_models)):
+        prompt_per_1k = float(rng.uniform(0.1, 10.0))
+        tiers = [PriceTier(50, prompt_per_1k * 2, prompt_per_1k * 8)] if i % 2 else []
+        prices[name] = ModelPrice(prompt_per_1k, prompt_per_1k * 4, 0.5 if i % 2 else 0.0, tiers)
+    return PriceTable(prices)
+
+def generate_model_metrics(n_models: int, seed: int = 0) -> List[ModelMetrics]:
+    rng = np.random.default_rng(seed)
+    features = ['chat', 'function_calling', 'vision', 'json_mode', 'streaming']
+    return [
+        ModelMetrics(
+            name=name,
+            performance_scores=dict(zip(BENCHMARK_NAMES, rng.uniform(0.3, 0.95, len(BENCHMARK_NAMES)).tolist())),
+            cost_per_1k_tokens=float(rng.uniform(0.1, 60.0)),
+            avg_latency_ms=float(rng.lognormal(np.log(400.0), 0.5)),
+            max_context_length=int(rng.choice([8192, 32768, 128000, 200000])),
+            supported_features=features[:rng.integers(1, len(features) + 1)],
+            license_type='proprietary',
+            hosting_options=['api']
+        )
+        for name in model_names(n_models)
+    ]
+
+def generate_history(n_runs: int, n_models: int, n_metrics: int = 20, seed: int = 0) -> List[Dict]:
+    """Evaluation runs in the shape DeepEvalMetrics.record_results stores, with scores drifting slowly"""
+    rng = np.random.default_rng(seed)
+    models = model_names(n_models)
+    metrics = [f"metric_{j:02d}" for j in range(n_metrics)]
+    scores = rng.uniform(0.4, 0.9, size=(n_models, n_metrics))
+    runs = []
+    for run in range(n_runs):
+        scores = np.clip(scores + rng.normal(0, 0.02, size=scores.shape), 0, 1)
+        runs.append({
+            'timestamp': datetime(2024, 1, 1, run // 60, run % 60),
+            'results': {model: dict(zip(metrics, row)) for model, row in zip(models, scores.tolist())}
+        })
+    return runs
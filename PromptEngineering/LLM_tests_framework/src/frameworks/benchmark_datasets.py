@@ -0,0 +1,82 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from glob import glob
+import hashlib
+import json
+import mmap
+import os
+
+class BenchmarkDataset:
+    """Lazy handle to a benchmark dataset.
+
+    Nothing is read when the handle is created. Examples come either from local
+    JSONL shards matched by `pattern`, which are memory-mapped and streamed one
+    line at a time, or from a `loader` callable that is only invoked on first use.
+    Consumers iterate fixed-size chunks, so memory use does not grow with the
+    size of the benchmark.
+    """
+
+    def __init__(self, name: str, pattern: Optional[str] = None,
+                 loader: Optional[Callable[[], Any]] = None, chunk_size: int = 256):
+        self.name = name
+        self.pattern = pattern
+        self.loader = loader
+        self.chunk_size = chunk_size
+        self._shards: Optional[List[str]] = None
+        self._data: Any = None
+        self.loaded = False
+
+    @property
+    def shards(self) -> List[str]:
+        if self._shards is None:
+            self._shards = sorted(glob(self.pattern)) if self.pattern else []
+        return self._shards
+
+    def iter_examples(self) -> Iterator[Dict]:
+        """Stream examples one at a time"""
+        if self.shards:
+            for path in self.shards:
+                yield from self._iter_shard(path)
+            return
+
+        if not self.loaded:
+            self._data = self.loader() if self.loader else None
+            self.loaded = True
+        yield from self._data or []
+
+    def iter_chunks(self, chunk_size: Optional[int] = None) -> Iterator[List[Dict]]:
+        """Stream examples in lists of at most chunk_size"""
+        size = chunk_size or self.chunk_size
+        chunk = []
+        for example in self.iter_examples():
+            chunk.append(example)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def fingerprint(self) -> str:
+        """Identify the dataset contents; shards are identified by path, size and mtime without reading them.
+
+        Other datasets are hashed one record at a time, so the whole dataset is never held as one string.
+        """
+        digest = hashlib.sha256()
+        if self.shards:
+            stats = [(path, os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in self.shards]
+            digest.update(json.dumps(stats).encode('utf-8'))
+        else:
+            for example in self.iter_examples():
+                digest.update(json.dumps(example, sort_keys=True, default=str).encode('utf-8'))
+                digest.update(b'\n')
+        return digest.hexdigest()
+
+    @staticmethod
+    def _iter_shard(path: str) -> Iterator[Dict]:
+        """Yield JSON records from a memory-mapped JSONL shard"""
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for line in iter(mapped.readline, b''):
+                    if line.strip():
+                        yield json.loads(line)
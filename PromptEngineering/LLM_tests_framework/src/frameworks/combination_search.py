@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import math
+import numpy as np
+
+@dataclass
+class SearchBudget:
+    max_calls: Optional[int] = None   # evaluations of one combination on one sample
+    max_tokens: Optional[int] = None  # tokens reported by the evaluator
+
+@dataclass
+class SearchResult:
+    best: Any
+    best_score: float
+    mean_scores: np.ndarray           # per arm; NaN for arms never evaluated
+    samples_used: np.ndarray          # per arm
+    calls: int
+    tokens: int
+    survivors_per_round: List[int] = field(default_factory=list)
+    budget_exhausted: bool = False
+    unscored: int = 0                 # arms dropped because an evaluation returned no score
+
+class SuccessiveHalving:
+    """Budgeted successive halving over a set of arms (e.g. component combinations).
+
+    Every surviving arm is scored on a small sample first; the best 1/eta of
+    them survive and get eta times as many samples in the next round, until
+    one arm is left. All arms see the same shuffled sample order, so they are
+    compared on the same samples. With a call budget, the first round's sample
+    count is sized so that all rounds fit in the budget. Evaluation is
+    breadth-first within a round, so if a budget runs out mid-round the
+    survivors have been sampled evenly. An arm whose evaluation returns no
+    score is dropped from the search rather than ranked.
+    """
+
+    def __init__(self, budget: Optional[SearchBudget] = None, eta: int = 2, min_samples: int = 1, seed: int = 0):
+        if eta < 2:
+            raise ValueError("eta must be at least 2")
+        self.budget = budget or SearchBudget()
+        self.eta = eta
+        self.min_samples = min_samples
+        self.seed = seed
+
+    def search(self, arms: Sequence[Any], samples: Sequence[Any],
+               evaluate: Callable[[Any, Any], Tuple[float, int]]) -> SearchResult:
+        """Find the arm with the best mean score; `evaluate(arm, sample)` returns (score, tokens used).
+
+        With no samples every arm is evaluated once with sample None. If `evaluate` returns None,
+        or a score of None or NaN, the arm is dropped; when no arm is scored, `best` is None.
+        """
+        n_arms = len(arms)
+        if not n_arms:
+            raise ValueError("Nothing to search")
+        samples = list(samples) or [None]
+        order = np.random.default_rng(self.seed).permutation(len(samples))
+        rounds = max(1, math.ceil(math.log(n_arms, self.eta)))
+
+        per_arm = self.min_samples
+        if self.budget.max_calls is not None:
+            per_arm = max(per_arm, self.budget.max_calls // (n_arms * rounds))
+
+        totals = np.zeros(n_arms)
+        counts = np.zeros(n_arms, dtype=np.int64)
+        unscored = np.zeros(n_arms, dtype=bool)
+        survivors = np.arange(n_arms)
+        calls = tokens = 0
+        history = []
+        exhausted = False
+
+        while True:
+            target = min(per_arm, len(samples))
+            while not exhausted:
+                pending = survivors[(counts[survivors] < target) & ~unscored[survivors]]
+                if not pending.size:
+                    break
+                for arm in pending:
+                    if self._exhausted(calls, tokens):
+                        exhausted = True
+                        break
+                    score, used = evaluate(arms[arm], samples[order[counts[arm]]]) or (None, 0)
+                    calls += 1
+                    tokens += used or 0
+                    if score is None or np.isnan(score):
+                        unscored[arm] = True
+                        continue
+                    totals[arm] += score
+                    counts[arm] += 1
+            survivors = survivors[~unscored[survivors]]
+            history.append(len(survivors))
+            if exhausted or len(survivors) <= 1:
+                break
+
+            means = totals[survivors] / counts[survivors]
+            keep = math.ceil(len(survivors) / self.eta)
+            survivors = survivors[np.argsort(-means, kind='stable')[:keep]]
+            per_arm *= self.eta
+
+        with np.errstate(invalid='ignore'):
+            mean_scores = np.where((counts > 0) & ~unscored, totals / np.maximum(counts, 1), np.nan)
+        evaluated = survivors[counts[survivors] > 0]
+        if not evaluated.size:
+            evaluated = np.flatnonzero((counts > 0) & ~unscored)
+        best = evaluated[np.argmax(mean_scores[evaluated])] if evaluated.size else None
+
+        return SearchResult(
+            best=arms[best] if best is not None else None,
+            best_score=float(mean_scores[best]) if best is not None else float('nan'),
+            mean_scores=mean_scores,
+            samples_used=counts,
+            calls=calls,
+            tokens=tokens,
+            survivors_per_round=history,
+            budget_exhausted=exhausted,
+            unscored=int(np.count_nonzero(unscored))
+        )
+
+    def _exhausted(self, calls: int, tokens: int) -> bool:
+        budget = self.budget
+        return ((budget.max_calls is not None and calls >= budget.max_calls)
+                or (budget.max_tokens is not None and tokens >= budget.max_tokens))
@@ -0,0 +1,153 @@
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+import asyncio
+import threading
+
+def provider_key(connection_url: Optional[str]) -> str:
+    """Group models by the host serving them, e.g. 'api.openai.com'"""
+    if not connection_url:
+        return 'default'
+    return urlparse(connection_url).netloc or connection_url
+
+class ProviderScheduler:
+    """Long-lived thread pool with a global worker limit and per-provider concurrency caps.
+
+    Work is queued per provider and only handed to the pool while its provider
+    is under its cap, so a slow or rate-limited provider never ties up workers
+    that other providers could use. One scheduler can be shared by every
+    model, dataset and probe of an evaluation; close it (or use it as a context
+    manager) when done.
+    """
+
+    def __init__(self, max_workers: int, provider_limits: Optional[Dict[str, int]] = None,
+                 default_limit: Optional[int] = None):
+        self.max_workers = max_workers
+        self.provider_limits = provider_limits or {}
+        self.default_limit = default_limit or max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = defaultdict(deque)
+        self._in_flight = Counter()
+        self._closed = False
+
+    def __enter__(self) -> 'ProviderScheduler':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # On an error, work still queued is cancelled instead of run to completion
+        if exc_type is None:
+            self.shutdown()
+        else:
+            self.shutdown(wait=False, cancel_futures=True)
+
+    def limit_for(self, provider: str) -> int:
+        return self.provider_limits.get(provider, self.default_limit)
+
+    def submit(self, provider: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) under a provider's cap and return its future"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('cannot submit to a scheduler that has been shut down')
+            self._pending[provider].append((future, fn, args, kwargs))
+            ready = self._take_ready(provider)
+        self._dispatch(provider, ready)
+        return future
+
+    def run(self, fn: Callable[[Any], Any], units: Iterable[Any],
+            provider_of: Callable[[Any], Hashable]) -> Iterator[Tuple[Any, Future]]:
+        """Run fn over every unit and yield (unit, future) pairs in completion order"""
+        futures = {self.submit(provider_of(unit), fn, unit): unit for unit in units}
+        for future in as_completed(futures):
+            yield futures[future], future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """Stop accepting work; with wait, work queued behind provider caps still runs first.
+
+        Without wait, or with cancel_futures, work that has not started is cancelled instead.
+        """
+        with self._lock:
+            self._closed = True
+            cancelled = []
+            if cancel_futures or not wait:
+                for pending in self._pending.values():
+                    cancelled.extend(future for future, _, _, _ in pending)
+                    pending.clear()
+            if wait:
+                self._idle.wait_for(lambda: not any(self._pending.values()) and not +self._in_flight)
+        for future in cancelled:
+            future.cancel()
+        self._executor.shutdown(wait=wait)
+
+    def _take_ready(self, provider: Hashable) -> List[Tuple]:
+        """Claim provider slots for queued work; the caller must hold the lock"""
+        ready = []
+        pending = self._pending[provider]
+        while pending and self._in_flight[provider] < self.limit_for(provider):
+            ready.append(pending.popleft())
+            self._in_flight[provider] += 1
+        return ready
+
+    def _dispatch(self, provider: Hashable, ready: List[Tuple]):
+        for future, fn, args, kwargs in ready:
+            if not future.set_running_or_notify_cancel():
+                self._finish(provider)
+                continue
+            try:
+                inner = self._executor.submit(fn, *args, **kwargs)
+            except RuntimeError as e:  # the executor was shut down without waiting
+                self._finish(provider)
+                future.set_exception(e)
+                continue
+            inner.add_done_callback(
+                lambda inner, future=future, provider=provider: self._finish(provider, future, inner)
+            )
+
+    def _finish(self, provider: Hashable, future: Optional[Future] = None, inner: Optional[Future] = None):
+        """Release a provider slot, hand it to the next queued item and settle the caller's future"""
+        with self._lock:
+            self._in_flight[provider] -= 1
+            ready = self._take_ready(provider)
+            if not ready and not +self._in_flight:
+                self._idle.notify_all()
+        self._dispatch(provider, ready)
+        if future is not None:
+            error = inner.exception()
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(inner.result())
+
+class AsyncProviderLimiter:
+    """Global and per-provider concurrency limits for coroutines.
+
+    Semaphores are created lazily so the limiter binds to whichever event loop
+    first uses it. The provider slot is taken before the global one, so work
+    waiting on a saturated provider does not hold global capacity.
+    """
+
+    def __init__(self, max_concurrency: int, provider_limits: Optional[Dict[str, int]] = None,
+                 default_limit: Optional[int] = None):
+        self.max_concurrency = max_concurrency
+        self.provider_limits = provider_limits or {}
+        self.default_limit = default_limit or max_concurrency
+        self._global: Optional[asyncio.Semaphore] = None
+        self._providers: Dict[str, asyncio.Semaphore] = {}
+
+    def limit_for(self, provider: str) -> int:
+        return self.provider_limits.get(provider, self.default_limit)
+
+    @asynccontextmanager
+    async def limit(self, provider: str):
+        """Hold one global slot and one slot of the given provider"""
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        if provider not in self._providers:
+            self._providers[provider] = asyncio.Semaphore(self.limit_for(provider))
+        async with self._providers[provider]:
+            async with self._global:
+                yield
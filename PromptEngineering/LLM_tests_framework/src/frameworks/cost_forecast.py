@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+import numpy as np
+
+# Forecast horizons, in days
+HORIZONS = {'day': 1, 'week': 7, 'month': 30}
+# Days of history needed before each term is fitted
+MIN_DAYS_FOR_TREND = 3
+MIN_DAYS_FOR_WEEKLY = 14
+
+@dataclass
+class CostForecast:
+    """Projected cost per horizon, per model and in total, with bootstrap confidence intervals.
+
+    Per-model arrays have shape (horizons, models); totals have shape (horizons,).
+    """
+    horizons: Dict[str, int]
+    method: str
+    point: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    total_point: np.ndarray
+    total_lower: np.ndarray
+    total_upper: np.ndarray
+
+def weekday(days: np.ndarray) -> np.ndarray:
+    """Weekday of a day number since the epoch, Monday = 0 (1970-01-01 was a Thursday)"""
+    return (days + 3) % 7
+
+def design_matrix(days: np.ndarray, origin: int, trend: bool, weekly: bool) -> np.ndarray:
+    """Intercept, optionally a linear trend in days since `origin`, and optionally six weekday indicators"""
+    columns = [np.ones(len(days))]
+    if trend:
+        columns.append((days - origin).astype(float))
+    if weekly:
+        columns.extend((weekday(days) == day).astype(float) for day in range(1, 7))
+    return np.column_stack(columns)
+
+def forecast_costs(daily_costs: np.ndarray, first_day: int, horizons: Optional[Dict[str, int]] = None,
+                   n_bootstrap: int = 200, confidence: float = 0.9, seed: int = 0) -> CostForecast:
+    """Project the cost of each model over the next day, week and month.
+
+    `daily_costs` has one row per consecutive day, starting at day number
+    `first_day`, and one column per model. Every model is fitted at once with
+    a single least-squares solve: intercept, trend with enough history, and
+    weekly seasonality with at least two weeks of history.
+
+    Confidence intervals come from a residual bootstrap. Each resample refits the
+    model on resampled residuals and adds resampled residuals for the future days.
+    A forecast is linear in the residuals, so every resample, horizon and model
+    comes out of one matrix product. The same residual days are drawn for every
+    model, which keeps the intervals of the total correlated correctly.
+    """
+    horizons = horizons or HORIZONS
+    n_days, n_models = daily_costs.shape
+    if n_days == 0:
+        zeros, total = np.zeros((len(horizons), n_models)), np.zeros(len(horizons))
+        return CostForecast(horizons, 'none', zeros, zeros, zeros, total, total, total)
+
+    trend = n_days >= MIN_DAYS_FOR_TREND
+    weekly = n_days >= MIN_DAYS_FOR_WEEKLY
+    method = 'trend+weekly' if weekly else 'trend' if trend else 'mean'
+    days = first_day + np.arange(n_days)
+    X = design_matrix(days, first_day, trend, weekly)
+    pinv = np.linalg.pinv(X)
+    beta = pinv @ daily_costs
+    residuals = daily_costs - X @ beta
+    if n_days > X.shape[1]:
+        # Inflate residuals for the degrees of freedom the fit used up
+        residuals *= np.sqrt(n_days / (n_days - X.shape[1]))
+
+    lengths = np.array(list(horizons.values()))
+    future = design_matrix(days[-1] + 1 + np.arange(lengths.max()), first_day, trend, weekly)
+    # Row h sums the first lengths[h] future days
+    horizon_sums = (np.arange(lengths.max()) < lengths[:, None]).astype(float)
+    Xh = horizon_sums @ future
+    point = Xh @ beta
+
+    # Each resample's forecast is point + A_b @ residuals, where A_b[h, s] weighs residual day s:
+    # by G[h, t] for every fitted day t that drew s, plus one for every future day of horizon h that drew s
+    rng = np.random.default_rng(seed)
+    G = Xh @ pinv
+    fitted_draws = rng.integers(0, n_days, size=(n_bootstrap, n_days))
+    future_draws = rng.integers(0, n_days, size=(n_bootstrap, lengths.max()))
+    rows = np.arange(n_bootstrap)[:, None, None] * len(lengths) + np.arange(len(lengths))[None, :, None]
+    fitted_keys = rows * n_days + fitted_draws[:, None, :]
+    future_keys = rows * n_days + future_draws[:, None, :]
+    weights = np.concatenate([
+        np.broadcast_to(G, fitted_keys.shape).ravel(),
+        np.broadcast_to(horizon_sums, future_keys.shape).ravel()
+    ])
+    A = np.bincount(
+        np.concatenate([fitted_keys.ravel(), future_keys.ravel()]), weights=weights,
+        minlength=n_bootstrap * len(lengths) * n_days
+    ).reshape(n_bootstrap, len(lengths), n_days)
+    samples = np.maximum(point + A @ residuals, 0.0)
+
+    tail = (1 - confidence) / 2
+    lower, upper = _percentiles(samples, [tail, 1 - tail])
+    total_lower, total_upper = _percentiles(samples.sum(axis=2), [tail, 1 - tail])
+    point = np.maximum(point, 0.0)
+    return CostForecast(horizons, method, point, lower, upper, point.sum(axis=1), total_lower, total_upper)
+
+def _percentiles(samples: np.ndarray, quantiles) -> np.ndarray:
+    """Quantiles along axis 0, interpolated like np.percentile; one sort is much faster than its partitions here"""
+    ordered = np.sort(samples, axis=0)
+    positions = np.asarray(quantiles) * (len(samples) - 1)
+    below = np.floor(positions).astype(int)
+    above = np.minimum(below + 1, len(samples) - 1)
+    fraction = (positions - below).reshape((-1,) + (1,) * (samples.ndim - 1))
+    return ordered[below] + fraction * (ordered[above] - ordered[below])
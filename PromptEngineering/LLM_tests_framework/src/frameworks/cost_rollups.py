@@ -0,0 +1,218 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+MINUTES_PER_HOUR = 60
+HOURS_PER_DAY = 24
+MINUTE_NS = 60 * 10**9
+# Bucket width of each level, in nanoseconds
+LEVEL_WIDTHS = {'minute': MINUTE_NS, 'hour': 60 * MINUTE_NS, 'day': 1440 * MINUTE_NS}
+
+# Minute buckets are written per request, so they are sparse: bucket -> model code -> [cost, requests]
+SparseBuckets = Dict[int, Dict[int, List[float]]]
+# Hour and day buckets are only written by folding, so they are dense: bucket -> (2, models) array
+DenseBuckets = Dict[int, np.ndarray]
+
+@dataclass
+class CostRollup:
+    """Cost and request counts for one query: per period, per model code, and per period and model code"""
+    freq: str
+    periods: pd.DataFrame
+    model_costs: np.ndarray
+    model_requests: np.ndarray
+    period_model_costs: np.ndarray  # (periods, models)
+
+class CostRollups:
+    """Per-model cost rollups in minute, hour and day buckets, maintained as requests are added.
+
+    New requests go into minute buckets. Once an hour has passed (in data time,
+    i.e. the newest timestamp seen), its minute buckets are folded into an hour
+    bucket, and once a day has passed its hour buckets are folded into a day
+    bucket. Folded minute and hour buckets are kept for `minute_retention`
+    minutes and `hour_retention` hours, so minute and hour queries cover those
+    windows while day and calendar queries cover all history. Late requests go
+    straight into the levels their bucket has already been folded into.
+
+    Queries only touch buckets, so they take time proportional to the number of
+    buckets rather than the number of requests.
+    """
+
+    def __init__(self, minute_retention: int = 120, hour_retention: int = 48):
+        self.minute_retention = minute_retention
+        self.hour_retention = hour_retention
+        self.reset()
+
+    def reset(self):
+        self.minutes: SparseBuckets = {}
+        self.hours: DenseBuckets = {}
+        self.days: DenseBuckets = {}
+        self._minute_mark: Optional[int] = None  # first minute not yet folded into hours
+        self._hour_mark: Optional[int] = None  # first hour not yet folded into days
+        self._next_fold = float('-inf')
+
+    def add(self, code: int, minute: int, cost: float):
+        """Add one request, given its model code and its timestamp in whole minutes since the epoch"""
+        if minute >= self._next_fold:
+            self._advance(minute)
+        if minute >= self._minute_mark - self.minute_retention:
+            models = self.minutes.get(minute)
+            if models is None:
+                models = self.minutes[minute] = {}
+            entry = models.get(code)
+            if entry is None:
+                models[code] = [cost, 1]
+            else:
+                entry[0] += cost
+                entry[1] += 1
+        if minute < self._minute_mark:
+            hour = minute // MINUTES_PER_HOUR
+            if hour >= self._hour_mark - self.hour_retention:
+                _add_dense(self.hours, np.array([hour]), np.array([code]), np.array([cost]))
+            if hour < self._hour_mark:
+                _add_dense(self.days, np.array([hour // HOURS_PER_DAY]), np.array([code]), np.array([cost]))
+
+    def add_many(self, codes: np.ndarray, minutes: np.ndarray, cost: np.ndarray):
+        """Add many requests at once, routing each to the same levels `add` would after the newest one"""
+        if not len(minutes):
+            return
+        self._advance(int(minutes.max()))
+        hours = minutes // MINUTES_PER_HOUR
+        to_minutes = minutes >= self._minute_mark - self.minute_retention
+        late = minutes < self._minute_mark
+        to_hours = late & (hours >= self._hour_mark - self.hour_retention)
+        to_days = late & (hours < self._hour_mark)
+
+        keys, sums, counts = _group(minutes[to_minutes], codes[to_minutes], cost[to_minutes])
+        for (minute, code), total, count in zip(keys, sums, counts):
+            entry = self.minutes.setdefault(minute, {}).setdefault(code, [0.0, 0])
+            entry[0] += total
+            entry[1] += count
+        _add_dense(self.hours, hours[to_hours], codes[to_hours], cost[to_hours])
+        _add_dense(self.days, hours[to_days] // HOURS_PER_DAY, codes[to_days], cost[to_days])
+
+    def query(self, freq: str, n_models: int) -> CostRollup:
+        """Cost and requests grouped by a pandas frequency, built from the coarsest level that can express it"""
+        level = self.level_for(freq)
+        buckets = self._view(level, n_models)
+        keys = sorted(buckets)
+        values = np.stack([buckets[key][:, :n_models] for key in keys]) if keys else np.zeros((0, 2, n_models))
+        index = pd.DatetimeIndex(
+            (np.array(keys, dtype=np.int64) * LEVEL_WIDTHS[level]).astype('datetime64[ns]'), name='timestamp'
+        )
+        grouper = pd.Grouper(freq=freq)
+        period_model_costs = pd.DataFrame(values[:, 0], index=index).groupby(grouper).sum()
+        requests = pd.Series(values[:, 1].sum(axis=1), index=index).groupby(grouper).sum()
+        periods = pd.DataFrame({'cost': period_model_costs.sum(axis=1), 'requests': requests.astype(np.int64)})
+        return CostRollup(freq, periods, values[:, 0].sum(axis=0), values[:, 1].sum(axis=0).astype(np.int64),
+                          period_model_costs.to_numpy())
+
+    @staticmethod
+    def level_for(freq: str) -> str:
+        offset = pd.tseries.frequencies.to_offset(freq)
+        try:
+            nanos = offset.nanos
+        except ValueError:  # calendar offsets such as weeks and months
+            return 'day'
+        for level in ('day', 'hour', 'minute'):
+            if nanos % LEVEL_WIDTHS[level] == 0:
+                return level
+        raise ValueError(f"Cost rollups cannot group by {freq!r}; the finest bucket is one minute")
+
+    def _view(self, level: str, n_models: int) -> DenseBuckets:
+        """Buckets of one level, plus the not yet folded buckets of finer levels coarsened to it"""
+        if level == 'minute':
+            return self._fold_minutes({}, self.minutes, 1, n_models)
+        view: DenseBuckets = {}
+        if level == 'hour':
+            _merge(view, self.hours, 1, n_models)
+        else:
+            _merge(view, self.days, 1, n_models)
+            if self._hour_mark is not None:
+                unfolded = {hour: row for hour, row in self.hours.items() if hour >= self._hour_mark}
+                _merge(view, unfolded, HOURS_PER_DAY, n_models)
+        if self._minute_mark is not None:
+            unfolded = {minute: models for minute, models in self.minutes.items() if minute >= self._minute_mark}
+            factor = MINUTES_PER_HOUR if level == 'hour' else MINUTES_PER_HOUR * HOURS_PER_DAY
+            self._fold_minutes(view, unfolded, factor, n_models)
+        return view
+
+    def _advance(self, minute: int):
+        """Fold every hour and day that ended before `minute`, then drop buckets past their retention"""
+        hour_start = minute - minute % MINUTES_PER_HOUR
+        day_start = minute // (MINUTES_PER_HOUR * HOURS_PER_DAY) * HOURS_PER_DAY
+        if self._minute_mark is None:
+            self._minute_mark, self._hour_mark = hour_start, day_start
+        if hour_start > self._minute_mark:
+            closed = {m: models for m, models in self.minutes.items() if self._minute_mark <= m < hour_start}
+            self._fold_minutes(self.hours, closed, MINUTES_PER_HOUR)
+            self._minute_mark = hour_start
+            if day_start > self._hour_mark:
+                closed = {h: row for h, row in self.hours.items() if self._hour_mark <= h < day_start}
+                _merge(self.days, closed, HOURS_PER_DAY)
+                self._hour_mark = day_start
+            _prune(self.minutes, self._minute_mark - self.minute_retention)
+            _prune(self.hours, self._hour_mark - self.hour_retention)
+        self._next_fold = self._minute_mark + MINUTES_PER_HOUR
+
+    @staticmethod
+    def _fold_minutes(target: DenseBuckets, minutes: SparseBuckets, factor: int,
+                      n_models: int = 0) -> DenseBuckets:
+        """Add sparse minute buckets into dense target buckets (minute // factor)"""
+        entries = [(minute // factor, code, cost, count)
+                   for minute, models in minutes.items() for code, (cost, count) in models.items()]
+        if entries:
+            buckets, codes, costs, counts = (np.array(column) for column in zip(*entries))
+            _add_dense(target, buckets, codes, costs, counts, n_models)
+        return target
+
+def _group(buckets: np.ndarray, codes: np.ndarray, cost: np.ndarray):
+    """Unique (bucket, code) pairs with their summed cost and request counts"""
+    if not len(buckets):
+        return [], np.zeros(0), np.zeros(0, dtype=np.int64)
+    width = int(codes.max()) + 1
+    keys, inverse = np.unique(buckets.astype(np.int64) * width + codes, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    sums = np.bincount(inverse, weights=cost)
+    return list(zip((keys // width).tolist(), (keys % width).tolist())), sums.tolist(), np.bincount(inverse).tolist()
+
+def _add_dense(target: DenseBuckets, buckets: np.ndarray, codes: np.ndarray, cost: np.ndarray,
+               counts: Optional[np.ndarray] = None, n_models: int = 0):
+    """Add requests (or pre-summed entries with `counts`) into dense buckets"""
+    if not len(buckets):
+        return
+    width = max(int(codes.max()) + 1, n_models)
+    keys, inverse = np.unique(buckets, return_inverse=True)
+    flat = inverse.reshape(-1) * width + codes
+    size = len(keys) * width
+    sums = np.stack([
+        np.bincount(flat, weights=cost, minlength=size),
+        np.bincount(flat, weights=counts, minlength=size) if counts is not None else np.bincount(flat, minlength=size)
+    ]).reshape(2, len(keys), width)
+    for i, key in enumerate(keys.tolist()):
+        row = target.get(key)
+        if row is None or row.shape[1] < width:
+            row = target[key] = _widen(row, width)
+        row[:, :width] += sums[:, i]
+
+def _merge(target: DenseBuckets, source: DenseBuckets, factor: int, n_models: int = 0) -> DenseBuckets:
+    """Add each dense source bucket into target bucket (index // factor)"""
+    for bucket, row in source.items():
+        key = bucket // factor
+        existing = target.get(key)
+        width = max(n_models, row.shape[1])
+        if existing is None or existing.shape[1] < width:
+            existing = target[key] = _widen(existing, width)
+        existing[:, :row.shape[1]] += row
+    return target
+
+def _prune(buckets: Dict, floor: int):
+    for bucket in [bucket for bucket in buckets if bucket < floor]:
+        del buckets[bucket]
+
+def _widen(row: Optional[np.ndarray], width: int) -> np.ndarray:
+    """A copy of row with room for at least `width` model codes (a new zero row if there is none)"""
+    widened = np.zeros((2, max(width, 8 if row is None else 2 * row.shape[1])))
+    if row is not None:
+        widened[:, :row.shape[1]] = row
+    return widened
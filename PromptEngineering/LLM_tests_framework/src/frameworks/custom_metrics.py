@@ -1,9 +1,20 @@
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 import pandas as pd
 import numpy as np
 import json
-from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from .concurrency import ProviderScheduler, provider_key
+from .process_pool import ShardedProcessPool
+from .result_cache import ResultCache
+from .benchmark_datasets import BenchmarkDataset
+from .latency_profiler import LatencyProfile, LatencyProfiler
+from .pricing import PriceTable
+from .model_scoring import CandidateArrays, best_candidates, pack_candidates, pareto_front, score_candidates
+from .provider_client import stream_completion
 
 @dataclass
 class ModelMetrics:
@@ -15,63 +26,212 @@ class ModelMetrics:
     supported_features: List[str]
     license_type: str
     hosting_options: List[str]
+    latency_profile: Optional[LatencyProfile] = None
+
+    def latency_ms(self, percentile: Optional[str] = None) -> float:
+        """Latency at a percentile such as 'p99', falling back to the average"""
+        if percentile and percentile != 'mean' and self.latency_profile is not None:
+            return self.latency_profile.percentile(percentile)
+        return self.avg_latency_ms
+
+DEFAULT_WEIGHTS = {'performance': 0.6, 'cost': 0.2, 'latency': 0.1, 'features': 0.1}
+
+# Multiple-choice picks: "The answer is (B)" anywhere, or a reply that starts with the option, e.g. "B) Paris"
+ANSWER_IS = re.compile(r"\banswer(?: is|:)\s*\(?([a-j])\b", re.IGNORECASE)
+LEADING_OPTION = re.compile(r"\s*\(?([a-j])(?:[).:]|\s*$)", re.IGNORECASE)
+
+def _normalise(text: Any) -> str:
+    return ' '.join(str(text).lower().split()).strip(' .!')
+
+def is_correct(reply: str, answer: Any) -> bool:
+    """Grade a reply exactly: a single-letter answer must be the option the reply picks, any other
+    answer must equal the whole reply up to case, whitespace and trailing punctuation"""
+    expected = _normalise(answer)
+    if len(expected) == 1 and expected.isalpha():
+        chosen = ANSWER_IS.search(reply) or LEADING_OPTION.match(reply)
+        return chosen is not None and chosen.group(1).lower() == expected
+    return _normalise(reply) == expected
 
 class CustomMetrics:
     def __init__(self, config_path: str):
+        self.config_path = config_path
         self.config = self._load_config(config_path)
         self.models: Dict[str, ModelMetrics] = {}
+        self.result_cache = ResultCache.from_config(self.config, os.path.dirname(config_path))
         self.benchmark_datasets = self._load_benchmark_datasets()
         self.evaluation_criteria = self._setup_evaluation_criteria()
+        self._pool: Optional[ProviderScheduler] = None
+        self._process_pool: Optional[ShardedProcessPool] = None
+        self._waiters: Optional[ThreadPoolExecutor] = None
+        self.latency_profiler = LatencyProfiler.from_config(self.config)
+        self.pricing = PriceTable.from_config(self.config)
+
+    @classmethod
+    def for_worker(cls, config_path: str) -> 'CustomMetrics':
+        """A lighter evaluator for worker processes: config and benchmark datasets only.
+
+        The parent process reads and writes the result cache, so workers do not
+        open it.
+        """
+        self = cls.__new__(cls)
+        self.config_path = config_path
+        self.config = self._load_config(config_path)
+        self.result_cache = None
+        self.benchmark_datasets = self._load_benchmark_datasets()
+        # Benchmark requests go through this process's own pool, with the caps split across the workers
+        processes = self.config.get('processes', 1)
+        default_limit = self.config.get('max_concurrency_per_provider')
+        self._pool = ProviderScheduler(
+            max_workers=max(1, self.config.get('max_workers', 8) // processes),
+            provider_limits={provider: max(1, limit // processes)
+                             for provider, limit in (self.config.get('provider_concurrency') or {}).items()},
+            default_limit=default_limit and max(1, default_limit // processes)
+        )
+        return self
 
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from JSON file"""
         with open(config_path, 'r') as file:
             return json.load(file)
 
-    def _load_benchmark_datasets(self):
+    def _load_benchmark_datasets(self) -> Dict[str, BenchmarkDataset]:
+        """Create lazy dataset handles; nothing is read until a dataset is first evaluated"""
+        loaders = {
+            'mmlu': self._load_mmlu,
+            'hellaswag': self._load_hellaswag,
+            'truthfulqa': self._load_truthfulqa,
+            'humaneval': self._load_humaneval,
+            'custom': self._load_custom_benchmarks
+        }
+        sources = self.config.get('benchmarks', {})
         return {
-            'mmlu': self._load_mmlu(),
-            'hellaswag': self._load_hellaswag(),
-            'truthfulqa': self._load_truthfulqa(),
-            'humaneval': self._load_humaneval(),
-            'custom': self._load_custom_benchmarks()
+            name: BenchmarkDataset(
+                name,
+                pattern=sources.get(name, {}).get('path'),
+                loader=loader,
+                chunk_size=self.config.get('benchmark_chunk_size', 256)
+            )
+            for name, loader in loaders.items()
         }
 
+    @property
+    def pool(self) -> ProviderScheduler:
+        """Evaluation pool shared by every model, dataset, latency probe and cost estimate"""
+        if self._pool is None:
+            self._pool = ProviderScheduler(
+                max_workers=self.config.get('max_workers', 8),
+                provider_limits=self.config.get('provider_concurrency'),
+                default_limit=self.config.get('max_concurrency_per_provider')
+            )
+        return self._pool
+
+    @property
+    def process_pool(self) -> Optional[ShardedProcessPool]:
+        """Worker processes for dataset evaluations, started on first use when `processes` is configured"""
+        if self._process_pool is None and self.config.get('processes'):
+            processes = self.config['processes']
+            self._process_pool = ShardedProcessPool(
+                CustomMetrics.for_worker, (self.config_path,),
+                processes=processes,
+                threads_per_process=self.config.get('threads_per_process',
+                                                    max(1, self.config.get('max_workers', 8) // processes)),
+                provider_limits=self.config.get('provider_concurrency'),
+                default_limit=self.config.get('max_concurrency_per_provider'),
+                max_retries=self.config.get('max_unit_retries', 2),
+                start_method=self.config.get('process_start_method', 'spawn')
+            )
+        return self._process_pool
+
+    def close(self):
+        """Shut down the shared evaluation pool and any worker processes"""
+        if self._waiters is not None:
+            self._waiters.shutdown()
+            self._waiters = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+
     def evaluate_model(self, model_name: str, model_config: Dict) -> ModelMetrics:
         """Comprehensive model evaluation"""
-        with ThreadPoolExecutor() as executor:
-            # Parallel tests on different datasets
-            performance_futures = {
-                dataset: executor.submit(self._evaluate_on_dataset, 
-                                      model_name, 
-                                      dataset_data)
+        futures = self._submit_model_evaluation(model_name, model_config)
+        return self._collect_model_metrics(model_name, model_config, futures)
+
+    def evaluate_models(self, models: Dict[str, Dict]) -> Iterator[ModelMetrics]:
+        """Evaluate many models at once, yielding each ModelMetrics as soon as it is complete"""
+        submitted = {
+            model_name: self._submit_model_evaluation(model_name, model_config)
+            for model_name, model_config in models.items()
+        }
+        owners = {}
+        remaining = {}
+        for model_name, futures in submitted.items():
+            model_futures = list(futures['performance'].values()) + [futures['latency'], futures['cost']]
+            owners.update({future: model_name for future in model_futures})
+            remaining[model_name] = len(model_futures)
+
+        for future in as_completed(owners):
+            model_name = owners[future]
+            remaining[model_name] -= 1
+            if not remaining[model_name]:
+                yield self._collect_model_metrics(model_name, models[model_name], submitted[model_name])
+
+    def _submit_model_evaluation(self, model_name: str, model_config: Dict) -> Dict[str, Any]:
+        """Queue a model's dataset, latency and cost work on the shared pool.
+
+        Dataset evaluations and latency profiles only wait on threads of their own;
+        the requests they send are what run on the pool. With `processes`
+        configured, dataset evaluations run on worker processes instead, sharded
+        by dataset so each worker reads a dataset's files once.
+        """
+        provider = provider_key(model_config.get('connection_url'))
+        if self.process_pool is not None:
+            performance = {
+                dataset: self._submit_to_worker(model_name, model_config, dataset, provider)
+                for dataset in self.benchmark_datasets
+            }
+        else:
+            performance = {
+                dataset: self._submit_waiting(self._cached_evaluate_on_dataset,
+                                              model_name, model_config, dataset, dataset_data)
                 for dataset, dataset_data in self.benchmark_datasets.items()
             }
-
+        return {
+            # Parallel tests on different datasets
+            'performance': performance,
             # Performance tests
-            latency_future = executor.submit(self._measure_latency, model_name)
-            cost_future = executor.submit(self._estimate_costs, model_name)
+            'latency': self._submit_waiting(self._measure_latency, model_name, provider),
+            'cost': self.pool.submit(provider, self._estimate_costs, model_name)
+        }
 
-            # Collecting results
-            performance_scores = {
-                dataset: future.result()
-                for dataset, future in performance_futures.items()
-            }
+    def _collect_model_metrics(self, model_name: str, model_config: Dict, futures: Dict[str, Any]) -> ModelMetrics:
+        """Build ModelMetrics from a model's futures and remember it for recommendations"""
+        performance_scores = {
+            dataset: future.result()
+            for dataset, future in futures['performance'].items()
+        }
 
-            return ModelMetrics(
-                name=model_name,
-                performance_scores=performance_scores,
-                cost_per_1k_tokens=cost_future.result(),
-                avg_latency_ms=latency_future.result(),
-                max_context_length=model_config['max_context_length'],
-                supported_features=model_config['features'],
-                license_type=model_config['license'],
-                hosting_options=model_config['hosting']
-            )
+        latency_profile = futures['latency'].result()
+        metrics = ModelMetrics(
+            name=model_name,
+            performance_scores=performance_scores,
+            cost_per_1k_tokens=futures['cost'].result(),
+            avg_latency_ms=latency_profile.mean_ms if latency_profile else None,
+            latency_profile=latency_profile,
+            max_context_length=model_config['max_context_length'],
+            supported_features=model_config['features'],
+            license_type=model_config['license'],
+            hosting_options=model_config['hosting']
+        )
+        self.models[model_name] = metrics
+        return metrics
 
-    def calculate_model_score(self, metrics: ModelMetrics) -> float:
-        """Calculate final model score"""
+    def calculate_model_score(self, metrics: ModelMetrics, latency_percentile: Optional[str] = None) -> float:
+        """Calculate final model score, scoring latency at a percentile (e.g. 'p99') if given"""
         weights = self.evaluation_criteria['weights']
+        latency_percentile = latency_percentile or self.config.get('latency_percentile')
 
         performance_score = np.mean([
             score * weights['performance']
@@ -79,31 +239,55 @@ class CustomMetrics:
         ])
 
         cost_score = (1.0 / metrics.cost_per_1k_tokens) * weights['cost']
-        latency_score = (1.0 / metrics.avg_latency_ms) * weights['latency']
+        latency_score = (1.0 / metrics.latency_ms(latency_percentile)) * weights['latency']
 
         feature_score = len(metrics.supported_features) * weights['features']
 
         return performance_score + cost_score + latency_score + feature_score
 
+    def score_models(self, metrics: Optional[List[ModelMetrics]] = None,
+                     weightings: Optional[Dict[str, Dict[str, float]]] = None,
+                     latency_percentile: Optional[str] = None) -> pd.DataFrame:
+        """Score every candidate under every weighting at once: one row per candidate, one column per weighting"""
+        metrics = list(self.models.values()) if metrics is None else metrics
+        weightings = weightings or self._weightings()
+        candidates = pack_candidates(metrics, latency_percentile or self.config.get('latency_percentile'))
+        return pd.DataFrame(score_candidates(candidates, weightings).T,
+                            index=candidates.names, columns=list(weightings))
+
+    def pareto_options(self, metrics: Optional[List[ModelMetrics]] = None,
+                       latency_percentile: Optional[str] = None) -> List[Dict]:
+        """Candidates not dominated on cost, latency and accuracy, cheapest first"""
+        metrics = list(self.models.values()) if metrics is None else metrics
+        candidates = pack_candidates(metrics, latency_percentile or self.config.get('latency_percentile'))
+        return self._pareto_options(candidates)
+
     def generate_recommendation(self) -> Dict:
         """Generate model selection recommendation"""
-        model_scores = {
-            name: self.calculate_model_score(metrics)
-            for name, metrics in self.models.items()
-        }
-
-        best_model = max(model_scores.items(), key=lambda x: x[1])[0]
+        weightings = self._weightings()
+        candidates = pack_candidates(list(self.models.values()), self.config.get('latency_percentile'))
+        scores = score_candidates(candidates, weightings)
+        best = best_candidates(scores)
+        if best[0] < 0:
+            raise ValueError('No evaluated model has a complete score to recommend')
+        best_model = candidates.names[best[0]]
 
         return {
             'recommended_model': best_model,
-            'detailed_scores': model_scores,
+            'detailed_scores': dict(zip(candidates.names, scores[0].tolist())),
+            'best_by_weighting': {name: candidates.names[index] if index >= 0 else None
+                                  for name, index in zip(weightings, best.tolist())},
+            'pareto_front': [option['name'] for option in self._pareto_options(candidates)],
             'analysis': self._generate_analysis(best_model),
-            'trade_offs': self._analyze_trade_offs(best_model)
+            'trade_offs': self._analyze_trade_offs(best_model, candidates)
         }
 
-    def _analyze_trade_offs(self, model_name: str) -> Dict:
-        """Analyze trade-offs for the selected model"""
+    def _analyze_trade_offs(self, model_name: str, candidates: Optional[CandidateArrays] = None) -> Dict:
+        """Analyze trade-offs for the selected model against the non-dominated options"""
         metrics = self.models[model_name]
+        if candidates is None:
+            candidates = pack_candidates(list(self.models.values()), self.config.get('latency_percentile'))
+        pareto_options = self._pareto_options(candidates)
 
         return {
             'performance_vs_cost': {
@@ -113,11 +297,31 @@ class CustomMetrics:
             },
             'speed_vs_accuracy': {
                 'latency': metrics.avg_latency_ms,
+                'latency_percentiles': metrics.latency_profile.latency_ms if metrics.latency_profile else None,
                 'accuracy': np.mean(list(metrics.performance_scores.values())),
                 'recommendations': self._generate_optimization_recommendations(metrics)
-            }
+            },
+            'pareto_options': pareto_options,
+            'on_pareto_front': any(option['name'] == model_name for option in pareto_options)
         }
 
+    def _pareto_options(self, candidates: CandidateArrays) -> List[Dict]:
+        options = [
+            {
+                'name': candidates.names[i],
+                'cost_per_1k_tokens': float(candidates.cost_per_1k_tokens[i]),
+                'latency_ms': float(candidates.latency_ms[i]),
+                'accuracy': float(candidates.accuracy[i])
+            }
+            for i in np.flatnonzero(pareto_front(candidates))
+        ]
+        return sorted(options, key=lambda option: option['cost_per_1k_tokens'])
+
+    def _weightings(self) -> Dict[str, Dict[str, float]]:
+        """Named weightings to compare; the default weights always come first"""
+        criteria = self.evaluation_criteria or {}
+        return {'default': criteria.get('weights', DEFAULT_WEIGHTS), **criteria.get('weightings', {})}
+
     def _load_mmlu(self):
         # Load MMLU dataset
         pass
@@ -138,21 +342,140 @@ class CustomMetrics:
         # Load custom benchmarks
         pass
 
-    def _evaluate_on_dataset(self, model_name: str, dataset_data: Any) -> float:
-        # Evaluate model on a specific dataset
-        pass
+    def _cached_evaluate_on_dataset(self, model_name: str, model_config: Dict,
+                                    dataset: str, dataset_data: Any) -> float:
+        """Evaluate on a dataset, reusing the cached score if model and data are unchanged"""
+        if not self.result_cache:
+            return self._evaluate_on_dataset(model_name, dataset_data)
 
-    def _measure_latency(self, model_name: str) -> float:
-        # Measure model latency
-        pass
+        key = self._dataset_cache_key(model_name, model_config, dataset, dataset_data)
+        score = self.result_cache.get(key)
+        if score is None:
+            score = self._evaluate_on_dataset(model_name, dataset_data)
+            if score is not None:
+                self.result_cache.set(key, score)
+        return score
+
+    def _dataset_cache_key(self, model_name: str, model_config: Dict, dataset: str, dataset_data: Any) -> str:
+        return ResultCache.make_key(
+            model_config.get('model', model_name),
+            {'input': dataset, 'context': self._dataset_fingerprint(dataset_data)},
+            'benchmark_score',
+            self.config.get('benchmark_versions', {}).get(dataset, '1')
+        )
+
+    def _evaluate_dataset_by_name(self, model_name: str, model_config: Dict, dataset: str) -> float:
+        """Evaluate on one of this instance's datasets, as sent to a worker process"""
+        return self._cached_evaluate_on_dataset(model_name, model_config, dataset, self.benchmark_datasets[dataset])
+
+    def _submit_to_worker(self, model_name: str, model_config: Dict, dataset: str, provider: str) -> Future:
+        """Evaluate a dataset on a worker process; the result cache is consulted and filled here, not in workers"""
+        if not self.result_cache:
+            return self.process_pool.submit('_evaluate_dataset_by_name', model_name, model_config, dataset,
+                                            provider=provider, shard=dataset)
+        key = self._dataset_cache_key(model_name, model_config, dataset, self.benchmark_datasets[dataset])
+        score = self.result_cache.get(key)
+        if score is not None:
+            future = Future()
+            future.set_result(score)
+            return future
+
+        def store(future: Future):
+            if not future.cancelled() and future.exception() is None and future.result() is not None:
+                self.result_cache.set(key, future.result())
+
+        future = self.process_pool.submit('_evaluate_dataset_by_name', model_name, model_config, dataset,
+                                          provider=provider, shard=dataset)
+        future.add_done_callback(store)
+        return future
+
+    def _dataset_fingerprint(self, dataset_data: Any) -> str:
+        """Content hash of a dataset, so edited benchmarks are re-scored"""
+        if isinstance(dataset_data, BenchmarkDataset):
+            return dataset_data.fingerprint()
+        encoded = json.dumps(dataset_data, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def _evaluate_on_dataset(self, model_name: str, dataset_data: BenchmarkDataset) -> Optional[float]:
+        """Evaluate model on a dataset, streaming it chunk by chunk"""
+        total, count = 0.0, 0
+        for examples in dataset_data.iter_chunks():
+            score = self._score_examples(model_name, examples)
+            if score is not None:
+                total += score * len(examples)
+                count += len(examples)
+        return total / count if count else None
+
+    def _score_examples(self, model_name: str, examples: List[Dict]) -> Optional[float]:
+        """Share of a chunk's examples the model answers correctly; the chunk's requests run concurrently on the pool"""
+        model_config = self.config.get('models', {}).get(model_name, {})
+        graded = [
+            (example.get('question', example.get('input')), example.get('answer', example.get('expected_output')))
+            for example in examples
+        ]
+        graded = [(prompt, answer) for prompt, answer in graded if prompt is not None and answer is not None]
+        if not model_config.get('connection_url') or not graded:
+            return None
+        provider = provider_key(model_config['connection_url'])
+        futures = [self.pool.submit(provider, self._complete, model_name, model_config, str(prompt))
+                   for prompt, _ in graded]
+        try:
+            replies = [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return sum(is_correct(reply, answer) for reply, (_, answer) in zip(replies, graded)) / len(graded)
+
+    @staticmethod
+    def _complete(model_name: str, model_config: Dict, prompt: str) -> str:
+        return ''.join(stream_completion(model_config['connection_url'], model_config.get('model', model_name),
+                                         prompt, api_key=model_config.get('api_key'), stream=False))
+
+    def _submit_waiting(self, fn: Callable[..., Any], *args) -> Future:
+        """Run fn on a thread that only waits; the requests it sends run on the shared pool under its caps"""
+        if self._waiters is None:
+            self._waiters = ThreadPoolExecutor(max_workers=self.config.get('max_workers', 8))
+        return self._waiters.submit(fn, *args)
+
+    def _measure_latency(self, model_name: str, provider: Optional[str] = None) -> Optional[LatencyProfile]:
+        """Profile model latency: warmup, concurrency sweep and percentile histograms.
+
+        With a provider, every probe request goes through the shared pool, so the
+        sweep stays within the global and per-provider caps.
+        """
+        probe = self._create_latency_probe(model_name)
+        if probe is None:
+            return None
+        if provider is None:
+            return self.latency_profiler.profile(probe)
+        return self.latency_profiler.profile(
+            probe, max_concurrency=min(self.pool.limit_for(provider), self.pool.max_workers),
+            submit=lambda request: self.pool.submit(provider, request)
+        )
+
+    def _create_latency_probe(self, model_name: str) -> Optional[Callable[[], Iterable[Any]]]:
+        """Return a callable that sends one streamed request to the model's connection_url"""
+        settings = self.config.get('latency_profile', {})
+        model_config = self.config.get('models', {}).get(model_name, {})
+        if not settings.get('enabled') or not model_config.get('connection_url'):
+            return None
+        prompt = settings.get('prompt', 'Reply with one short sentence.')
+        return lambda: stream_completion(model_config['connection_url'], model_config.get('model', model_name),
+                                         prompt, api_key=model_config.get('api_key'))
 
     def _estimate_costs(self, model_name: str) -> float:
-        # Estimate model costs
-        pass
+        """Blended price of 1k tokens for the model's configured provider model id"""
+        model_id = self.config.get('models', {}).get(model_name, {}).get('model', model_name)
+        return self.pricing.price_per_1k(model_id)
 
     def _setup_evaluation_criteria(self) -> Dict:
-        # Setup evaluation criteria
-        pass
+        """Score weights, plus optional named weightings to compare side by side"""
+        criteria = self.config.get('evaluation_criteria', {})
+        return {
+            'weights': {**DEFAULT_WEIGHTS, **criteria.get('weights', {})},
+            'weightings': criteria.get('weightings', {})
+        }
 
     def _generate_analysis(self, model_name: str) -> Dict:
         # Generate analysis for the model
@@ -1,3 +1,4 @@
+import deepeval
 from deepeval import evaluate, TestCase, LLMTestCase
 from deepeval.metrics import (
     HallucinationMetric,
@@ -11,17 +12,87 @@ from deepeval.metrics import (
 )
 from deepeval.dataset import TestDataset
 from datetime import datetime
+from collections import namedtuple
+import asyncio
 import logging
 import json
-from typing import Dict, List, Any
-from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import Dict, List, Any, Optional
+from .concurrency import AsyncProviderLimiter, ProviderScheduler, provider_key
+from .process_pool import ShardedProcessPool
+from .shared_judge import share_judges
+from .result_cache import ResultCache
+from .history_store import HistoryStore
+from .trend_statistics import TrendStatistics
+
+DEEPEVAL_VERSION = deepeval.__version__
+
+METRIC_TYPES = {
+    'hallucination': HallucinationMetric,
+    'relevancy': AnswerRelevancyMetric,
+    'contextual_precision': ContextualPrecisionMetric,
+    'contextual_recall': ContextualRecallMetric,
+    'faithfulness': FaithfulnessMetric,
+    'bias': BiasMetric,
+    'toxicity': ToxicityMetric,
+    'ragas': RAGASMetric
+}
+
+# One scheduled piece of work: one or more metrics on a single test case of a model
+EvaluationUnit = namedtuple('EvaluationUnit', ['model_name', 'metric_names', 'case_index'])
 
 class DeepEvalMetrics:
     def __init__(self, config_path: str):
+        self.config_path = config_path
+        self.config = self._load_config(config_path)
+        self.setup_logging()
+        self.initialize_metrics()
+        self.result_cache = ResultCache.from_config(self.config, os.path.dirname(config_path))
+        self.history = HistoryStore.from_config(self.config, os.path.dirname(config_path))
+        self.trends = TrendStatistics(window=self.config.get('trend_window', 256))
+        self.trends.replay(self.history.query(with_run_id=True))
+        self._process_pool = None
+
+    @classmethod
+    def for_worker(cls, config_path: str) -> 'DeepEvalMetrics':
+        """A lighter evaluator for worker processes: config and metrics only.
+
+        The parent process keeps the result cache and the history, so workers
+        neither open the SQLite stores nor replay trend history.
+        """
+        self = cls.__new__(cls)
+        self.config_path = config_path
         self.config = self._load_config(config_path)
         self.setup_logging()
         self.initialize_metrics()
-        self.history = []
+        self.result_cache = None
+        self.history = None
+        self.trends = None
+        self._process_pool = None
+        return self
+
+    @property
+    def process_pool(self) -> Optional[ShardedProcessPool]:
+        """Worker processes for evaluation units, started on first use when `processes` is configured"""
+        if self._process_pool is None and self.config.get('processes'):
+            processes = self.config['processes']
+            self._process_pool = ShardedProcessPool(
+                DeepEvalMetrics.for_worker, (self.config_path,),
+                processes=processes,
+                threads_per_process=self.config.get('threads_per_process',
+                                                    max(1, self.config['max_workers'] // processes)),
+                provider_limits=self.config.get('provider_concurrency'),
+                default_limit=self.config.get('max_concurrency_per_provider'),
+                max_retries=self.config.get('max_unit_retries', 2),
+                start_method=self.config.get('process_start_method', 'spawn')
+            )
+        return self._process_pool
+
+    def close(self):
+        """Stop the worker processes, if any were started"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
 
     def setup_logging(self):
         """Configure logging for test results and errors"""
@@ -33,16 +104,11 @@ class DeepEvalMetrics:
 
     def initialize_metrics(self):
         """Initialize all available metrics"""
-        self.metrics = {
-            'hallucination': HallucinationMetric(),
-            'relevancy': AnswerRelevancyMetric(),
-            'contextual_precision': ContextualPrecisionMetric(),
-            'contextual_recall': ContextualRecallMetric(),
-            'faithfulness': FaithfulnessMetric(),
-            'bias': BiasMetric(),
-            'toxicity': ToxicityMetric(),
-            'ragas': RAGASMetric()
-        }
+        self.metrics = {name: self._create_metric(name) for name in METRIC_TYPES}
+
+    def _create_metric(self, metric_name: str):
+        """A new metric instance, built with its constructor settings from `metric_settings` in the config"""
+        return METRIC_TYPES[metric_name](**self.config.get('metric_settings', {}).get(metric_name, {}))
 
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from JSON file"""
@@ -50,73 +116,293 @@ class DeepEvalMetrics:
             return json.load(file)
 
     async def continuous_evaluation(self, interval_minutes: int = 60):
-        """Run continuous evaluation at specified intervals"""
-        while True:
-            try:
-                results = await self.run_full_evaluation()
-                self.history.append({
-                    'timestamp': datetime.now(),
-                    'results': results
-                })
-                self.analyze_trends()
-                await asyncio.sleep(interval_minutes * 60)
-            except Exception as e:
-                logging.error(f"Continuous evaluation error: {str(e)}")
+        """Run continuous evaluation at drift-free intervals until cancelled"""
+        loop = asyncio.get_running_loop()
+        interval = interval_minutes * 60
+        next_run = loop.time()
+        current_run = None
+        try:
+            while True:
+                if current_run is not None and not current_run.done():
+                    logging.warning("Previous evaluation still running, skipping this interval")
+                else:
+                    current_run = asyncio.ensure_future(self._evaluation_cycle())
+
+                # Schedule against the original start so run time does not accumulate as drift;
+                # intervals missed entirely are skipped instead of fired back to back
+                next_run += interval
+                now = loop.time()
+                if next_run <= now:
+                    next_run += ((now - next_run) // interval + 1) * interval
+                await asyncio.sleep(next_run - now)
+        finally:
+            if current_run is not None and not current_run.done():
+                current_run.cancel()
+                await asyncio.gather(current_run, return_exceptions=True)
+
+    async def _evaluation_cycle(self):
+        """Run one evaluation and record it in the history"""
+        try:
+            results = await self.run_full_evaluation_async()
+            self.record_results(results)
+            self.analyze_trends()
+        except Exception as e:
+            logging.error(f"Continuous evaluation error: {str(e)}")
 
     def run_full_evaluation(self) -> Dict[str, Any]:
         """Run comprehensive evaluation across all models and metrics"""
-        results = {}
-        with ThreadPoolExecutor(max_workers=self.config['max_workers']) as executor:
-            for model_name, model_config in self.config['models'].items():
-                future = executor.submit(self.evaluate_model_all_metrics, model_name, model_config)
-                results[model_name] = future.result()
+        return self._average_case_scores(self.evaluate_cases(self.config['models']))
+
+    async def run_full_evaluation_async(self) -> Dict[str, Any]:
+        """Run comprehensive evaluation without blocking the event loop"""
+        return self._average_case_scores(await self.evaluate_cases_async(self.config['models']))
+
+    def evaluate_cases(self, models: Dict[str, Dict]) -> Dict[str, Dict[str, List[float]]]:
+        """Score every metric on every test case, as model -> metric -> per-case scores.
+
+        With `processes` configured, units run on worker processes, sharded by
+        model so each worker keeps one model's judges and cache entries warm;
+        otherwise they run on threads of this process. Every unit fills its own
+        result slots, so results do not depend on completion order.
+        """
+        test_cases, units, results = self._plan_evaluation(models)
+
+        def provider_of(unit: EvaluationUnit):
+            return provider_key(models[unit.model_name].get('connection_url'))
+
+        if self.process_pool is not None:
+            completed = self.process_pool.run(
+                '_evaluate_case_config', self._take_cached_scores(models, units, results),
+                lambda unit: (models[unit.model_name], unit.metric_names,
+                              models[unit.model_name]['test_cases'][unit.case_index]),
+                provider_of=provider_of, shard_of=lambda unit: unit.model_name
+            )
+            self._collect_unit_scores(completed, results, models)
+        else:
+            with self._create_scheduler() as scheduler:
+                self._collect_unit_scores(
+                    scheduler.run(lambda unit: self._run_unit(models, test_cases, unit), units, provider_of),
+                    results
+                )
+
+        if self.result_cache:
+            logging.info(f"Metric result cache: {self.result_cache.stats()}")
         return results
 
-    def evaluate_model_all_metrics(self, model_name: str, model_config: Dict) -> Dict[str, float]:
-        """Evaluate a single model across all available metrics"""
-        test_cases = self.prepare_test_cases(model_config['test_cases'])
-        results = {}
+    def _collect_unit_scores(self, completed, results: Dict[str, Dict[str, List[float]]],
+                             models: Optional[Dict[str, Dict]] = None):
+        """Write each completed unit's scores into its result slots, stopping at the first failure.
+
+        With models, the scores came from worker processes and are also stored in the result cache.
+        """
+        for unit, future in completed:
+            try:
+                scores = future.result()
+            except Exception as e:
+                self._log_unit_failure(unit, e)
+                raise
+            if models is not None:
+                self._cache_unit_scores(models, unit, scores)
+            for metric_name, score in scores.items():
+                results[unit.model_name][metric_name][unit.case_index] = score
+
+    def _take_cached_scores(self, models: Dict[str, Dict], units: List[EvaluationUnit],
+                            results: Dict[str, Dict[str, List[float]]]) -> List[EvaluationUnit]:
+        """Fill cached scores into results, returning the units narrowed to the metrics still to score"""
+        if not self.result_cache:
+            return units
+        remaining = []
+        for unit in units:
+            model_config = models[unit.model_name]
+            case_config = model_config['test_cases'][unit.case_index]
+            missing = []
+            for name in unit.metric_names:
+                score = self.result_cache.get(self._cache_key(model_config, case_config, name))
+                if score is None:
+                    missing.append(name)
+                else:
+                    results[unit.model_name][name][unit.case_index] = score
+            if missing:
+                remaining.append(unit._replace(metric_names=tuple(missing)))
+        return remaining
+
+    def _cache_unit_scores(self, models: Dict[str, Dict], unit: EvaluationUnit, scores: Dict[str, float]):
+        if self.result_cache:
+            model_config = models[unit.model_name]
+            case_config = model_config['test_cases'][unit.case_index]
+            for name, score in scores.items():
+                self.result_cache.set(self._cache_key(model_config, case_config, name), score)
 
-        for metric_name, metric in self.metrics.items():
-            score = evaluate(
+    async def evaluate_cases_async(self, models: Dict[str, Dict]) -> Dict[str, Dict[str, List[float]]]:
+        """Async counterpart of evaluate_cases with bounded, per-provider concurrency"""
+        test_cases, units, results = self._plan_evaluation(models)
+        limiter = AsyncProviderLimiter(
+            max_concurrency=self.config['max_workers'],
+            provider_limits=self.config.get('provider_concurrency'),
+            default_limit=self.config.get('max_concurrency_per_provider')
+        )
+        loop = asyncio.get_running_loop()
+
+        async def run_unit(unit: EvaluationUnit):
+            provider = provider_key(models[unit.model_name].get('connection_url'))
+            async with limiter.limit(provider):
+                try:
+                    if self.process_pool is not None:
+                        model_config = models[unit.model_name]
+                        scores = await asyncio.wrap_future(self.process_pool.submit(
+                            '_evaluate_case_config', model_config, unit.metric_names,
+                            model_config['test_cases'][unit.case_index],
+                            provider=provider, shard=unit.model_name
+                        ))
+                        self._cache_unit_scores(models, unit, scores)
+                        return unit, scores
+                    # deepeval's evaluate() blocks, so it runs on the loop's executor
+                    return unit, await loop.run_in_executor(None, self._run_unit, models, test_cases, unit)
+                except Exception as e:
+                    self._log_unit_failure(unit, e)
+                    raise
+
+        if self.process_pool is not None:
+            units = self._take_cached_scores(models, units, results)
+        tasks = [asyncio.ensure_future(run_unit(unit)) for unit in units]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                unit, scores = await next_done
+                for metric_name, score in scores.items():
+                    results[unit.model_name][metric_name][unit.case_index] = score
+        finally:
+            # On failure or cancellation, stop units that have not started yet
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.result_cache:
+            logging.info(f"Metric result cache: {self.result_cache.stats()}")
+        return results
+
+    def _plan_evaluation(self, models: Dict[str, Dict]):
+        """Prepare test cases, work units and an empty model -> metric -> case result grid"""
+        test_cases = {
+            model_name: self.prepare_test_cases(model_config['test_cases'])
+            for model_name, model_config in models.items()
+        }
+        # In batched mode each unit runs all metrics over one test case in a single pass
+        if self.config.get('batch_metrics', True):
+            metric_groups = [tuple(self.metrics)]
+        else:
+            metric_groups = [(metric_name,) for metric_name in self.metrics]
+        units = [
+            EvaluationUnit(model_name, metric_names, case_index)
+            for model_name in models
+            for metric_names in metric_groups
+            for case_index in range(len(test_cases[model_name]))
+        ]
+        results = {
+            model_name: {metric_name: [None] * len(test_cases[model_name]) for metric_name in self.metrics}
+            for model_name in models
+        }
+        return test_cases, units, results
+
+    def _run_unit(self, models: Dict[str, Dict], test_cases: Dict[str, List[TestCase]],
+                  unit: EvaluationUnit) -> Dict[str, float]:
+        model_config = models[unit.model_name]
+        return self._evaluate_unit(model_config, unit.metric_names,
+                                   test_cases[unit.model_name][unit.case_index],
+                                   model_config['test_cases'][unit.case_index])
+
+    def _evaluate_case_config(self, model_config: Dict, metric_names: tuple, case_config: Dict) -> Dict[str, float]:
+        """Score a unit from its plain configuration, as sent to a worker process"""
+        return self._evaluate_unit(model_config, metric_names, self.prepare_test_cases([case_config])[0], case_config)
+
+    def _log_unit_failure(self, unit: EvaluationUnit, error: Exception):
+        logging.error(f"Evaluation of {unit.model_name} {', '.join(unit.metric_names)} "
+                      f"case {unit.case_index} failed: {str(error)}")
+
+    def _create_scheduler(self) -> ProviderScheduler:
+        """Create a scheduler honouring max_workers and per-provider caps"""
+        return ProviderScheduler(
+            max_workers=self.config['max_workers'],
+            provider_limits=self.config.get('provider_concurrency'),
+            default_limit=self.config.get('max_concurrency_per_provider')
+        )
+
+    def _evaluate_unit(self, model_config: Dict, metric_names: tuple, test_case: TestCase,
+                       case_config: Dict) -> Dict[str, float]:
+        """Score a group of metrics on one test case in a single evaluate() pass"""
+        scores = {}
+        cache_keys = {}
+        if self.result_cache:
+            for name in metric_names:
+                cache_keys[name] = self._cache_key(model_config, case_config, name)
+                cached = self.result_cache.get(cache_keys[name])
+                if cached is not None:
+                    scores[name] = cached
+
+        # Metrics keep per-measurement state, so concurrent units get their own instances
+        metrics = {name: self._create_metric(name) for name in metric_names if name not in scores}
+        if metrics:
+            share_judges(metrics.values())
+            evaluate(
                 model=model_config['model'],
-                test_cases=test_cases,
-                metrics=[metric]
+                test_cases=[test_case],
+                metrics=list(metrics.values())
             )
-            results[metric_name] = score
+            for name, metric in metrics.items():
+                scores[name] = metric.score
+                if self.result_cache:
+                    self.result_cache.set(cache_keys[name], metric.score)
 
-        return results
+        return {name: scores[name] for name in metric_names}
+
+    def _cache_key(self, model_config: Dict, case_config: Dict, metric_name: str) -> str:
+        return ResultCache.make_key(model_config['model'], case_config, metric_name, self._metric_version(metric_name))
+
+    def _metric_version(self, metric_name: str) -> str:
+        """Identify the metric implementation and settings a cached score came from"""
+        metric = self.metrics[metric_name]
+        return (f"{type(metric).__name__}:{getattr(metric, 'threshold', '')}:"
+                f"{self.config.get('metric_versions', {}).get(metric_name, DEEPEVAL_VERSION)}")
+
+    def _average_case_scores(self, case_scores: Dict[str, Dict[str, List[float]]]) -> Dict[str, Dict[str, float]]:
+        """Collapse per-case scores into one score per model and metric"""
+        return {
+            model_name: {
+                metric_name: sum(scores) / len(scores) if scores else 0.0
+                for metric_name, scores in metric_scores.items()
+            }
+            for model_name, metric_scores in case_scores.items()
+        }
+
+    def evaluate_model_all_metrics(self, model_name: str, model_config: Dict) -> Dict[str, float]:
+        """Evaluate a single model across all available metrics"""
+        case_scores = self.evaluate_cases({model_name: model_config})
+        return self._average_case_scores(case_scores)[model_name]
 
     def prepare_test_cases(self, test_config: Dict) -> List[TestCase]:
         """Prepare test cases from configuration"""
         return [TestCase(**case) for case in test_config]
 
+    def record_results(self, results: Dict[str, Dict[str, float]]):
+        """Append a run to the history and fold it into the trend statistics"""
+        timestamp = datetime.now()
+        self.history.append({
+            'timestamp': timestamp,
+            'results': results
+        })
+        self.trends.update(results, timestamp)
+
     def analyze_trends(self):
         """Analyze historical performance trends"""
         if len(self.history) < 2:
             return
 
-        current = self.history[-1]['results']
-        previous = self.history[-2]['results']
-
-        significant_changes = self._detect_significant_changes(current, previous)
+        significant_changes = self._detect_significant_changes()
         if significant_changes:
             self._send_alert(significant_changes)
 
-    def _detect_significant_changes(self, current: Dict, previous: Dict) -> List[str]:
-        """Detect significant changes in model performance"""
-        threshold = self.config['alert_threshold']
-        changes = []
-
-        for model in current:
-            for metric in current[model]:
-                current_value = current[model][metric]
-                previous_value = previous[model][metric]
-
-                if abs(current_value - previous_value) > threshold:
-                    changes.append(f"{model} {metric}: {previous_value:.2f} -> {current_value:.2f}")
-
-        return changes
+    def _detect_significant_changes(self) -> List[str]:
+        """Detect significant changes in model performance across all models and metrics at once"""
+        return self.trends.detect_changes(self.config['alert_threshold'])
 
     def _send_alert(self, changes: List[str]):
         """Send alerts for significant performance changes"""
@@ -124,7 +410,7 @@ class DeepEvalMetrics:
 
     def generate_report(self) -> Dict[str, Any]:
         """Generate comprehensive evaluation report"""
-        latest_results = self.history[-1]['results'] if self.history else None
+        latest_results = self.history.latest(1)[0]['results'] if len(self.history) else None
         if not latest_results:
             return {}
 
@@ -154,23 +440,23 @@ class DeepEvalMetrics:
         if len(self.history) < 2:
             return {}
 
+        improvement = self._calculate_improvement()
+        stability = self._calculate_stability()
         trends = {}
-        for model in self.history[-1]['results']:
+        for model in self.history.latest(1)[0]['results']:
             trends[model] = {
-                'improvement': self._calculate_improvement(model),
-                'stability': self._calculate_stability(model)
+                'improvement': improvement.get(model),
+                'stability': stability.get(model)
             }
         return trends
 
-    def _calculate_improvement(self, model: str) -> float:
-        """Calculate improvement over time for a model"""
-        # Implementation here
-        pass
+    def _calculate_improvement(self) -> Dict[str, float]:
+        """Calculate improvement over time (mean score change per run) for every model"""
+        return self.trends.improvement()
 
-    def _calculate_stability(self, model: str) -> float:
-        """Calculate stability over time for a model"""
-        # Implementation here
-        pass
+    def _calculate_stability(self) -> Dict[str, float]:
+        """Calculate stability over time for every model"""
+        return self.trends.stability()
 
     def _generate_recommendations(self, results: Dict) -> List[str]:
         """Generate recommendations based on results"""
@@ -0,0 +1,142 @@
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+from collections import deque
+from datetime import datetime
+import os
+import sqlite3
+import threading
+
+class HistoryStore:
+    """Append-only, SQLite-backed store of evaluation results.
+
+    Every evaluation run is written to disk as one row per (model, metric) score.
+    Only the most recent tail_size runs are kept in memory, so a long-running
+    evaluator has bounded memory use and keeps its history across restarts.
+    """
+
+    FETCH_BATCH_SIZE = 1000
+
+    def __init__(self, path: str = ':memory:', tail_size: int = 100):
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "run_id INTEGER NOT NULL, timestamp TEXT NOT NULL, "
+            "model TEXT NOT NULL, metric TEXT NOT NULL, score REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_lookup ON scores (model, metric, timestamp)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_time ON scores (timestamp)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_run ON scores (run_id)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        self._tail: Deque[Dict[str, Any]] = deque(maxlen=tail_size)
+        self._tail.extend(self._load_runs(limit=tail_size))
+
+    @classmethod
+    def from_config(cls, config: Dict, base_dir: str = '') -> 'HistoryStore':
+        """Build a store from the 'history_store' config section, in memory if there is none.
+
+        A relative path is resolved against base_dir, normally the config file's directory.
+        """
+        settings = config.get('history_store', {})
+        path = settings.get('path', ':memory:')
+        if path != ':memory:':
+            path = os.path.join(base_dir, path)
+        return cls(path=path, tail_size=settings.get('tail_size', 100))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, entry: Dict[str, Any]):
+        """Persist a {'timestamp': datetime, 'results': {model: {metric: score}}} entry"""
+        timestamp = entry['timestamp'].isoformat()
+        with self._lock:
+            run_id = self._conn.execute("INSERT INTO runs (timestamp) VALUES (?)", (timestamp,)).lastrowid
+            self._conn.executemany(
+                "INSERT INTO scores (run_id, timestamp, model, metric, score) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (run_id, timestamp, model, metric, score)
+                    for model, metric_scores in entry['results'].items()
+                    for metric, score in metric_scores.items()
+                ]
+            )
+            self._conn.commit()
+            self._count += 1
+            self._tail.append(entry)
+
+    def latest(self, n: int = 1) -> List[Dict[str, Any]]:
+        """Return the n most recent runs, oldest first"""
+        if n <= 0:
+            return []
+        if n <= len(self._tail) or len(self._tail) == self._count:
+            return list(self._tail)[-n:]
+        return self._load_runs(limit=n)
+
+    def query(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              models: Optional[Sequence[str]] = None,
+              metrics: Optional[Sequence[str]] = None,
+              with_run_id: bool = False) -> Iterator[Tuple]:
+        """Stream (timestamp, model, metric, score) rows matching a time range, models and metrics.
+
+        With with_run_id, rows are (run_id, timestamp, model, metric, score).
+        """
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(end.isoformat())
+        if models:
+            clauses.append(f"model IN ({', '.join('?' * len(models))})")
+            params.extend(models)
+        if metrics:
+            clauses.append(f"metric IN ({', '.join('?' * len(metrics))})")
+            params.extend(metrics)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT run_id, timestamp, model, metric, score FROM scores{where} ORDER BY timestamp, run_id", params
+            )
+        while True:
+            # Fetch in batches so a long range never has to fit in memory at once
+            with self._lock:
+                rows = cursor.fetchmany(self.FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            for run_id, timestamp, model, metric, score in rows:
+                if with_run_id:
+                    yield run_id, datetime.fromisoformat(timestamp), model, metric, score
+                else:
+                    yield datetime.fromisoformat(timestamp), model, metric, score
+
+    def close(self):
+        self._conn.close()
+
+    def _load_runs(self, limit: int) -> List[Dict[str, Any]]:
+        """Rebuild the most recent runs from disk, oldest first"""
+        with self._lock:
+            runs = self._conn.execute(
+                "SELECT id, timestamp FROM runs ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+            if not runs:
+                return []
+            rows = self._conn.execute(
+                "SELECT run_id, model, metric, score FROM scores WHERE run_id >= ? ORDER BY rowid",
+                (runs[-1][0],)
+            ).fetchall()
+
+        results = {run_id: {} for run_id, _ in runs}
+        for run_id, model, metric, score in rows:
+            if run_id in results:
+                results[run_id].setdefault(model, {})[metric] = score
+        return [
+            {'timestamp': datetime.fromisoformat(timestamp), 'results': results[run_id]}
+            for run_id, timestamp in reversed(runs)
+        ]
@@ -1,8 +1,19 @@
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 import asyncio
+import functools
+import itertools
+import logging
+import time
 from dataclasses import dataclass
 import numpy as np
 from .performance_tracker import PerformanceTracker
+from .combination_search import SearchBudget, SearchResult, SuccessiveHalving
+from .concurrency import AsyncProviderLimiter, provider_key
+from .custom_metrics import is_correct
+from .pricing import TokenCounter
+from .provider_client import stream_completion
+
+TEST_GROUPS = ['base_models', 'rag_implementations', 'prompt_variations', 'integration_scenarios']
 
 @dataclass
 class TestConfig:
@@ -10,65 +21,143 @@ class TestConfig:
     rag_configs: Dict[str, Dict]
     prompt_templates: Dict[str, str]
     test_scenarios: List[Dict]
+    search_budget: Optional[SearchBudget] = None
+    max_concurrency: int = 8
+    provider_concurrency: Optional[Dict[str, int]] = None
+    max_concurrency_per_provider: Optional[int] = None
+    item_timeout_seconds: Optional[float] = None
+
+@dataclass
+class TestItem:
+    group: str
+    name: str
+    provider: str
+    evaluate: Callable[[], Awaitable[float]]
+
+@dataclass
+class TestItemResult:
+    group: str
+    name: str
+    score: Optional[float]
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
 
 class IntegrationTracker:
     def __init__(self, config: TestConfig):
         self.config = config
         self.results_history = []
         self.performance_tracker = PerformanceTracker()
-        
-    async def run_comprehensive_tests(self):
-        """Run all tests"""
-        tasks = [
-            self._test_base_models(),
-            self._test_rag_implementations(),
-            self._test_prompt_variations(),
-            self._test_integration_scenarios()
-        ]
-        results = await asyncio.gather(*tasks)
-        return self._aggregate_results(results)
-    
-    async def _test_base_models(self):
+        self.last_search: Optional[SearchResult] = None
+        self.token_counter = TokenCounter()
+        self._component_scores: Dict[str, Dict] = {}
+
+    async def run_comprehensive_tests(self, on_result: Optional[Callable[[TestItemResult], None]] = None):
+        """Run all tests, every model, RAG, template and scenario evaluation as its own task"""
+        items = self._test_items()
+        # Pre-fill in config order so the report order does not depend on completion order
+        results = {group: {} for group in TEST_GROUPS}
+        for item in items:
+            results[item.group][item.name] = None
+        errors = {}
+
+        async for item_result in self.iter_test_results(items):
+            results[item_result.group][item_result.name] = item_result.score
+            if item_result.error:
+                errors.setdefault(item_result.group, {})[item_result.name] = item_result.error
+            if on_result:
+                on_result(item_result)
+        # The combination search makes blocking provider calls, so it runs off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self._aggregate_results, [results[group] for group in TEST_GROUPS], errors
+        )
+
+    async def iter_test_results(self, items: Optional[List[TestItem]] = None) -> AsyncIterator[TestItemResult]:
+        """Yield each item's result as soon as it finishes.
+
+        All items are scheduled at once under the global and per-provider limits.
+        A failed or timed-out item yields a result with `error` set and does not
+        hold up the others. Items still running are cancelled if the consumer stops early.
+        """
+        items = self._test_items() if items is None else items
+        limiter = AsyncProviderLimiter(
+            self.config.max_concurrency,
+            self.config.provider_concurrency,
+            self.config.max_concurrency_per_provider
+        )
+        tasks = [asyncio.ensure_future(self._run_item(item, limiter)) for item in items]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let cancelled items release their limiter slots before returning
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_item(self, item: TestItem, limiter: AsyncProviderLimiter) -> TestItemResult:
+        """Evaluate one item; the timeout only starts once it holds a concurrency slot"""
+        async with limiter.limit(item.provider):
+            started = time.perf_counter()
+            timeout = self.config.item_timeout_seconds
+            try:
+                score = await asyncio.wait_for(item.evaluate(), timeout)
+                return TestItemResult(item.group, item.name, score, elapsed_seconds=time.perf_counter() - started)
+            except asyncio.TimeoutError:
+                error = f"timed out after {timeout}s"
+            except Exception as e:
+                logging.warning(f"{item.group} item {item.name} failed: {e}")
+                error = str(e) or type(e).__name__
+            return TestItemResult(item.group, item.name, None, error, time.perf_counter() - started)
+
+    def _test_items(self) -> List[TestItem]:
+        return (self._test_base_models() + self._test_rag_implementations()
+                + self._test_prompt_variations() + self._test_integration_scenarios())
+
+    def _test_base_models(self) -> List[TestItem]:
         """Test basic model capabilities"""
-        results = {}
-        for model_name, model_config in self.config.model_configs.items():
-            results[model_name] = await self._evaluate_model(model_name, model_config)
-        return results
-    
-    async def _test_rag_implementations(self):
+        return [
+            TestItem('base_models', model_name, provider_key(model_config.get('connection_url')),
+                     functools.partial(self._evaluate_model, model_name, model_config))
+            for model_name, model_config in self.config.model_configs.items()
+        ]
+
+    def _test_rag_implementations(self) -> List[TestItem]:
         """Test different RAG implementations"""
-        results = {}
-        for rag_name, rag_config in self.config.rag_configs.items():
-            results[rag_name] = await self._evaluate_rag(rag_name, rag_config)
-        return results
-    
-    async def _test_prompt_variations(self):
+        return [
+            TestItem('rag_implementations', rag_name, provider_key(rag_config.get('connection_url')),
+                     functools.partial(self._evaluate_rag, rag_name, rag_config))
+            for rag_name, rag_config in self.config.rag_configs.items()
+        ]
+
+    def _test_prompt_variations(self) -> List[TestItem]:
         """Test different prompt variations"""
-        results = {}
-        for template_name, template in self.config.prompt_templates.items():
-            results[template_name] = await self._evaluate_prompt_template(
-                template_name, template
-            )
-        return results
-    
-    async def _test_integration_scenarios(self):
+        return [
+            TestItem('prompt_variations', template_name, provider_key(None),
+                     functools.partial(self._evaluate_prompt_template, template_name, template))
+            for template_name, template in self.config.prompt_templates.items()
+        ]
+
+    def _test_integration_scenarios(self) -> List[TestItem]:
         """Test integration scenarios"""
-        results = {}
-        for scenario in self.config.test_scenarios:
-            results[scenario['name']] = await self._evaluate_scenario(scenario)
-        return results
-    
-    def _aggregate_results(self, results: List[Dict]) -> Dict:
+        return [
+            TestItem('integration_scenarios', scenario['name'], provider_key(scenario.get('connection_url')),
+                     functools.partial(self._evaluate_scenario, scenario))
+            for scenario in self.config.test_scenarios
+        ]
+
+    def _aggregate_results(self, results: List[Dict], errors: Optional[Dict] = None) -> Dict:
         """Aggregate all test results"""
         return {
             'base_models': results[0],
             'rag_implementations': results[1],
             'prompt_variations': results[2],
             'integration_scenarios': results[3],
+            'errors': errors or {},
             'summary': self._generate_summary(results),
             'recommendations': self._generate_recommendations(results)
         }
-    
+
     def _generate_summary(self, results: List[Dict]) -> Dict:
         """Generate summary of results"""
         return {
@@ -78,14 +167,61 @@ class IntegrationTracker:
             'latency_analysis': self.performance_tracker._analyze_latency()
         }
     
-    def _find_best_combination(self, results: List[Dict]) -> Dict:
-        """Find the best combination of components"""
+    def _find_best_combination(self, results: List[Dict], budget: Optional[SearchBudget] = None) -> Dict:
+        """Find the best combination of components with successive halving over the test scenarios"""
         combinations = self._generate_combinations(results)
-        scored_combinations = [
-            (combo, self._score_combination(combo))
-            for combo in combinations
+        self._component_scores = dict(zip(['model', 'rag', 'prompt_template'], results[:3]))
+        search = SuccessiveHalving(budget or self.config.search_budget)
+        self.last_search = search.search(combinations, self.config.test_scenarios, self._score_combination_sample)
+        return self.last_search.best
+
+    def _generate_combinations(self, results: List[Dict]) -> List[Dict]:
+        """Cross product of tested base models, RAG implementations and prompt templates"""
+        components = [list(group or {}) or [None] for group in results[:3]]
+        return [
+            {'model': model, 'rag': rag, 'prompt_template': template}
+            for model, rag, template in itertools.product(*components)
+        ]
+
+    def _score_combination_sample(self, combination: Dict, scenario: Optional[Dict]) -> Tuple[Optional[float], int]:
+        """Score a combination on one scenario, or as a whole when there are no scenarios"""
+        if scenario is None:
+            return self._score_combination(combination), 0
+        return self._score_combination_on_scenario(combination, scenario)
+
+    def _score_combination(self, combination: Dict) -> Optional[float]:
+        """Mean test score of the combination's components; None when none of them was scored"""
+        scores = [
+            (self._component_scores.get(component) or {}).get(name)
+            for component, name in combination.items()
         ]
-        return max(scored_combinations, key=lambda x: x[1])[0]
+        scores = [score for score in scores if score is not None]
+        return float(np.mean(scores)) if scores else None
+
+    def _score_combination_on_scenario(self, combination: Dict, scenario: Dict) -> Tuple[Optional[float], int]:
+        """Run a combination on one scenario and return (score, tokens used).
+
+        The scenario's `input` is filled into the prompt template (after the RAG
+        implementation's `context`, if it has one) and sent to the combination's
+        model; the reply is graded exactly against `expected_output`. Scenarios
+        without an input and expected output, or models without a connection_url,
+        fall back to the combination's component scores.
+        """
+        model_config = self.config.model_configs.get(combination['model']) or {}
+        if not model_config.get('connection_url') or 'input' not in scenario or 'expected_output' not in scenario:
+            return self._score_combination(combination), 0
+
+        template = self.config.prompt_templates.get(combination['prompt_template']) or '{input}'
+        prompt = template.replace('{input}', str(scenario['input'])) if '{input}' in template \
+            else f"{template}\n\n{scenario['input']}"
+        context = (self.config.rag_configs.get(combination['rag']) or {}).get('context')
+        if context:
+            prompt = f"{context}\n\n{prompt}"
+        model = model_config.get('model', combination['model'])
+        reply = ''.join(stream_completion(model_config['connection_url'], model, prompt,
+                                          api_key=model_config.get('api_key'), stream=False))
+        tokens = self.token_counter.count(prompt, model) + self.token_counter.count(reply, model)
+        return float(is_correct(reply, scenario['expected_output'])), tokens
 
     # Placeholder methods for evaluation
     async def _evaluate_model(self, model_name: str, model_config: Dict) -> float:
@@ -100,11 +236,5 @@ class IntegrationTracker:
     async def _evaluate_scenario(self, scenario: Dict) -> float:
         pass
 
-    def _generate_combinations(self, results: List[Dict]) -> List[Dict]:
-        pass
-
-    def _score_combination(self, combination: Dict) -> float:
-        pass
-
     def _generate_recommendations(self, results: List[Dict]) -> List[str]:
         pass
\ No newline at end of file
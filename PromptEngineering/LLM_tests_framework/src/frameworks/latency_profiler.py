@@ -0,0 +1,196 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import math
+import time
+import numpy as np
+
+PERCENTILES = {'p50': 50.0, 'p90': 90.0, 'p99': 99.0, 'p99.9': 99.9}
+
+class LatencyHistogram:
+    """HDR-style latency histogram with bounded relative error.
+
+    Values fall into logarithmic buckets whose width grows with the value, so
+    any recorded percentile is within `relative_accuracy` of the true value
+    while memory depends only on the range of values, not on how many there are.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value_ms: float = 0.001):
+        self.relative_accuracy = relative_accuracy
+        self.min_value_ms = min_value_ms
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value_ms: float):
+        self.record_many([value_ms])
+
+    def record_many(self, values_ms: Iterable[float]):
+        values = np.maximum(np.asarray(list(values_ms), dtype=np.float64), self.min_value_ms)
+        if not values.size:
+            return
+        indexes = np.ceil(np.log(values / self.min_value_ms) / self._log_gamma).astype(np.int64)
+        counts = np.bincount(indexes)
+        if counts.size > self.counts.size:
+            self.counts = np.concatenate([self.counts, np.zeros(counts.size - self.counts.size, dtype=np.int64)])
+        self.counts[:counts.size] += counts
+        self.count += values.size
+        self.total += float(values.sum())
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other: 'LatencyHistogram'):
+        if other.counts.size > self.counts.size:
+            self.counts = np.concatenate([self.counts, np.zeros(other.counts.size - self.counts.size, dtype=np.int64)])
+        self.counts[:other.counts.size] += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float('nan')
+
+    def percentile(self, percentile: float) -> float:
+        """Value at the given percentile (0-100), within relative_accuracy"""
+        if not self.count:
+            return float('nan')
+        rank = max(1, math.ceil(percentile / 100.0 * self.count))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        value = self.min_value_ms * self._gamma ** index * 2 / (1 + self._gamma)
+        return min(value, self.max)
+
+    def summary(self) -> Dict[str, float]:
+        return {name: self.percentile(percentile) for name, percentile in PERCENTILES.items()}
+
+@dataclass
+class LatencyProfile:
+    """Latency distribution of a model, headline figures taken at the lowest concurrency level"""
+    latency_ms: Dict[str, float]
+    mean_ms: float
+    time_to_first_token_ms: Dict[str, float]
+    inter_token_ms: Dict[str, float]
+    tokens_per_second: float
+    by_concurrency: Dict[int, Dict[str, float]] = field(default_factory=dict)
+
+    def percentile(self, name: str) -> float:
+        """Latency at a named percentile such as 'p99', or 'mean'"""
+        if name == 'mean':
+            return self.mean_ms
+        if name not in self.latency_ms:
+            raise ValueError(f"Unknown latency percentile {name!r}; expected 'mean' or one of {list(self.latency_ms)}")
+        return self.latency_ms[name]
+
+class LatencyProfiler:
+    """Warm up, then sweep concurrency levels and record latency histograms.
+
+    `request_fn` sends one request and returns an iterable of streamed chunks;
+    each chunk counts as one token. A non-streaming provider can return a single
+    chunk, in which case time to first token equals the full latency.
+
+    Requests run on a private thread pool unless `submit` is given, e.g. one
+    that queues them on a shared scheduler under its provider caps.
+    """
+
+    def __init__(self, warmup_requests: int = 3, requests_per_level: int = 20,
+                 concurrency_levels: Sequence[int] = (1, 4, 16), relative_accuracy: float = 0.01):
+        self.warmup_requests = warmup_requests
+        self.requests_per_level = requests_per_level
+        if not concurrency_levels:
+            raise ValueError('Latency profiling needs at least one concurrency level')
+        self.concurrency_levels = sorted(concurrency_levels)
+        self.relative_accuracy = relative_accuracy
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'LatencyProfiler':
+        settings = config.get('latency_profile', {})
+        return cls(
+            warmup_requests=settings.get('warmup_requests', 3),
+            requests_per_level=settings.get('requests_per_level', 20),
+            concurrency_levels=settings.get('concurrency_levels', (1, 4, 16)),
+            relative_accuracy=settings.get('relative_accuracy', 0.01)
+        )
+
+    def profile(self, request_fn: Callable[[], Iterable[Any]], max_concurrency: Optional[int] = None,
+                submit: Optional[Callable[[Callable[[], Any]], Future]] = None) -> LatencyProfile:
+        """Profile request_fn at every concurrency level, capped at max_concurrency"""
+        levels = self.concurrency_levels
+        if max_concurrency is not None:
+            levels = sorted({max(1, min(level, max_concurrency)) for level in levels})
+
+        def timed() -> Tuple[float, Optional[float], List[float], int]:
+            return self._timed_request(request_fn)
+
+        for _ in range(self.warmup_requests):
+            if submit is not None:
+                submit(timed).result()
+            else:
+                timed()
+
+        headline = None
+        by_concurrency = {}
+        for level in levels:
+            latency, first_token, inter_token = (LatencyHistogram(self.relative_accuracy) for _ in range(3))
+            started = time.perf_counter()
+            samples = self._run_level(timed, level, submit)
+            elapsed = time.perf_counter() - started
+
+            latency.record_many(sample[0] for sample in samples)
+            first_token.record_many(sample[1] for sample in samples if sample[1] is not None)
+            for sample in samples:
+                inter_token.record_many(sample[2])
+            tokens_per_second = sum(sample[3] for sample in samples) / elapsed if elapsed else 0.0
+
+            by_concurrency[level] = dict(latency.summary(), mean=latency.mean,
+                                         tokens_per_second=tokens_per_second,
+                                         requests_per_second=len(samples) / elapsed if elapsed else 0.0)
+            if headline is None:
+                headline = (latency, first_token, inter_token, tokens_per_second)
+
+        latency, first_token, inter_token, tokens_per_second = headline
+        return LatencyProfile(
+            latency_ms=latency.summary(),
+            mean_ms=latency.mean,
+            time_to_first_token_ms=first_token.summary(),
+            inter_token_ms=inter_token.summary(),
+            tokens_per_second=tokens_per_second,
+            by_concurrency=by_concurrency
+        )
+
+    def _run_level(self, timed: Callable[[], Tuple], level: int,
+                   submit: Optional[Callable[[Callable[[], Any]], Future]]) -> List[Tuple]:
+        """Send requests_per_level timed requests with at most `level` outstanding at once"""
+        if submit is None:
+            with ThreadPoolExecutor(max_workers=level) as executor:
+                return list(executor.map(lambda _: timed(), range(self.requests_per_level)))
+        samples, outstanding = [], set()
+        for _ in range(self.requests_per_level):
+            if len(outstanding) >= level:
+                done, outstanding = wait(outstanding, return_when=FIRST_COMPLETED)
+                samples.extend(future.result() for future in done)
+            outstanding.add(submit(timed))
+        samples.extend(future.result() for future in wait(outstanding).done)
+        return samples
+
+    @staticmethod
+    def _timed_request(request_fn: Callable[[], Iterable[Any]]) -> Tuple[float, Optional[float], List[float], int]:
+        """Return (latency_ms, time_to_first_token_ms, inter_token_gaps_ms, tokens) for one request"""
+        started = time.perf_counter()
+        first = last = None
+        gaps = []
+        tokens = 0
+        for _ in request_fn():
+            now = time.perf_counter()
+            if first is None:
+                first = now
+            else:
+                gaps.append((now - last) * 1000)
+            last = now
+            tokens += 1
+        finished = time.perf_counter()
+        return ((finished - started) * 1000,
+                (first - started) * 1000 if first is not None else None,
+                gaps,
+                tokens)
@@ -0,0 +1,124 @@
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+import argparse
+import asyncio
+import json
+import time
+from .latency_profiler import LatencyHistogram
+from .mock_provider import MockProvider, MockProviderSettings
+from .provider_client import ProviderError, RateLimitError, astream_completion
+from .performance_tracker import PerformanceTracker
+
+@dataclass
+class LoadTestResult:
+    requests: int
+    succeeded: int
+    failed: int
+    rate_limited: int
+    wall_seconds: float
+    requests_per_second: float
+    tokens_per_second: float
+    latency_ms: Dict[str, float]
+    tracking_overhead_ms: Dict[str, float]
+    loop_lag_ms: Dict[str, float]
+
+async def run_load_test(connection_url: str, model: str = 'mock', total_requests: int = 1000,
+                        concurrency: int = 100, stream: bool = True,
+                        tracker: Optional[PerformanceTracker] = None,
+                        prompt: str = 'What is the capital of France?') -> LoadTestResult:
+    """Drive many concurrent requests through the framework and measure its own overhead.
+
+    Every response is fed to PerformanceTracker.track_request. Reported figures:
+    end-to-end throughput, provider round-trip latency, the time the tracker
+    spends per request, and event-loop lag (how late a 10 ms ticker wakes up),
+    which shows how much the framework's own work delays concurrent requests.
+    """
+    tracker = tracker or PerformanceTracker()
+    semaphore = asyncio.Semaphore(concurrency)
+    latency = LatencyHistogram()
+    overhead = LatencyHistogram(min_value_ms=1e-6)
+    lag = LatencyHistogram(min_value_ms=1e-3)
+    counts = {'succeeded': 0, 'failed': 0, 'rate_limited': 0, 'tokens': 0}
+    done = asyncio.Event()
+
+    async def measure_loop_lag():
+        while not done.is_set():
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            lag.record((time.perf_counter() - expected) * 1000)
+
+    async def one_request():
+        async with semaphore:
+            started = time.perf_counter()
+            tokens = 0
+            success = True
+            try:
+                async for _ in astream_completion(connection_url, model, prompt, stream=stream):
+                    tokens += 1
+            except RateLimitError:
+                counts['rate_limited'] += 1
+                success = False
+            except (ProviderError, OSError):
+                counts['failed'] += 1
+                success = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            latency.record(elapsed_ms)
+            counts['succeeded'] += success
+            counts['tokens'] += tokens
+
+            tracked = time.perf_counter()
+            tracker.track_request({'model': model, 'tokens': tokens, 'latency': elapsed_ms, 'success': success})
+            overhead.record((time.perf_counter() - tracked) * 1000)
+
+    lag_task = asyncio.ensure_future(measure_loop_lag())
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(total_requests)))
+    wall_seconds = time.perf_counter() - started
+    done.set()
+    await lag_task
+
+    return LoadTestResult(
+        requests=total_requests,
+        succeeded=counts['succeeded'],
+        failed=counts['failed'],
+        rate_limited=counts['rate_limited'],
+        wall_seconds=wall_seconds,
+        requests_per_second=total_requests / wall_seconds,
+        tokens_per_second=counts['tokens'] / wall_seconds,
+        latency_ms=latency.summary(),
+        tracking_overhead_ms=overhead.summary(),
+        loop_lag_ms=lag.summary()
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the framework against a local mock provider')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=1000)
+    parser.add_argument('--latency-ms', type=float, default=200.0)
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=None, help='requests per second before 429s')
+    parser.add_argument('--tokens', type=int, default=20)
+    parser.add_argument('--inter-token-ms', type=float, default=5.0)
+    parser.add_argument('--no-stream', action='store_true')
+    args = parser.parse_args()
+
+    settings = MockProviderSettings(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_per_second=args.rate_limit,
+        tokens_per_response=args.tokens,
+        inter_token_ms=args.inter_token_ms
+    )
+    with MockProvider(settings) as provider:
+        result = asyncio.run(run_load_test(
+            provider.connection_url('mock'),
+            total_requests=args.requests,
+            concurrency=args.concurrency,
+            stream=not args.no_stream
+        ))
+    print(json.dumps(asdict(result), indent=2))
+
+if __name__ == '__main__':
+    main()
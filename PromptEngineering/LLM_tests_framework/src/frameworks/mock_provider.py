@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import asyncio
+import copy
+import json
+import random
+import threading
+import time
+from .provider_client import read_headers
+
+@dataclass
+class MockProviderSettings:
+    latency_ms: float = 200.0                     # median time to first token
+    latency_sigma: float = 0.5                    # lognormal shape; 0 makes latency constant
+    error_rate: float = 0.0                       # share of requests answered with 500
+    rate_limit_per_second: Optional[float] = None  # token bucket refill rate; None disables 429s
+    tokens_per_response: int = 20
+    inter_token_ms: float = 10.0
+    seed: Optional[int] = None
+
+class MockProvider:
+    """Local stand-in for an LLM provider, for offline and CI load tests.
+
+    Serves OpenAI-style chat completion requests (POST a JSON body with model,
+    messages and an optional stream flag) on localhost. Latency, error rate,
+    rate limiting and token streaming come from MockProviderSettings. The
+    server runs on an asyncio loop in a background thread, so it can hold
+    thousands of concurrent connections and be used from sync or async code.
+    """
+
+    def __init__(self, settings: Optional[MockProviderSettings] = None, host: str = '127.0.0.1', port: int = 0):
+        self.settings = settings or MockProviderSettings()
+        self.host = host
+        self.port = port
+        self.stats = {'requests': 0, 'errors': 0, 'rate_limited': 0, 'tokens': 0}
+        self._random = random.Random(self.settings.seed)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._bucket = self.settings.rate_limit_per_second or 0.0
+        self._bucket_updated = time.monotonic()
+
+    def __enter__(self) -> 'MockProvider':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def connection_url(self, model: str) -> str:
+        """A connection_url for config.json pointing at this server"""
+        return f"{self.url}/v1/models/{model}"
+
+    def patch_config(self, config: Dict) -> Dict:
+        """Copy a framework config with every model's connection_url pointed at this server"""
+        patched = copy.deepcopy(config)
+        for model_config in patched.get('models', {}).values():
+            model_config['connection_url'] = self.connection_url(model_config.get('model', 'mock'))
+        return patched
+
+    def start(self) -> 'MockProvider':
+        started = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+            self._server.close()
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name='mock-provider', daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def _sample_latency(self) -> float:
+        settings = self.settings
+        if settings.latency_sigma <= 0:
+            return settings.latency_ms / 1000
+        return settings.latency_ms * self._random.lognormvariate(0, settings.latency_sigma) / 1000
+
+    def _take_rate_limit_token(self) -> bool:
+        """Token bucket; only ever touched from the server loop"""
+        rate = self.settings.rate_limit_per_second
+        if rate is None:
+            return True
+        now = time.monotonic()
+        self._bucket = min(rate, self._bucket + (now - self._bucket_updated) * rate)
+        self._bucket_updated = now
+        if self._bucket < 1:
+            return False
+        self._bucket -= 1
+        return True
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            _, headers, body = await _read_http_message(reader)
+            payload = json.loads(body or b'{}')
+            self.stats['requests'] += 1
+
+            if not self._take_rate_limit_token():
+                self.stats['rate_limited'] += 1
+                await _write_json(writer, 429, {'error': {'message': 'Rate limit exceeded'}}, {'Retry-After': '1'})
+                return
+            if self._random.random() < self.settings.error_rate:
+                self.stats['errors'] += 1
+                await _write_json(writer, 500, {'error': {'message': 'Internal server error'}})
+                return
+
+            await asyncio.sleep(self._sample_latency())
+            tokens = [f"token{i} " for i in range(self.settings.tokens_per_response)]
+            if payload.get('stream'):
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n")
+                for i, token in enumerate(tokens):
+                    if i:
+                        await asyncio.sleep(self.settings.inter_token_ms / 1000)
+                    chunk = {'model': payload.get('model'), 'choices': [{'delta': {'content': token}}]}
+                    writer.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                    await writer.drain()
+                writer.write(b"data: [DONE]\n\n")
+            else:
+                await asyncio.sleep(self.settings.inter_token_ms * max(0, len(tokens) - 1) / 1000)
+                prompt_tokens = sum(len(str(message.get('content', '')).split())
+                                    for message in payload.get('messages', []))
+                await _write_json(writer, 200, {
+                    'model': payload.get('model'),
+                    'choices': [{'message': {'role': 'assistant', 'content': ''.join(tokens)}}],
+                    'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': len(tokens)}
+                })
+            self.stats['tokens'] += len(tokens)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def _read_http_message(reader: asyncio.StreamReader) -> Tuple[bytes, Dict[str, str], bytes]:
+    start_line = await reader.readline()
+    headers = await read_headers(reader)
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return start_line, headers, body
+
+async def _write_json(writer: asyncio.StreamWriter, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+    reasons = {200: 'OK', 429: 'Too Many Requests', 500: 'Internal Server Error'}
+    body = json.dumps(payload).encode('utf-8')
+    extra = ''.join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+    writer.write((
+        f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"{extra}Connection: close\r\n\r\n"
+    ).encode('latin-1') + body)
+    await writer.drain()
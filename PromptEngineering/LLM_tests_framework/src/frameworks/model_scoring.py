@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+# Order of the score components; weightings are packed into columns in this order
+COMPONENTS = ['performance', 'cost', 'latency', 'features']
+
+@dataclass
+class CandidateArrays:
+    """Every candidate's scoring inputs, one array element per candidate"""
+    names: List[str]
+    accuracy: np.ndarray
+    cost_per_1k_tokens: np.ndarray
+    latency_ms: np.ndarray
+    feature_count: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def components(self) -> np.ndarray:
+        """(components, candidates) matrix of unweighted score terms"""
+        with np.errstate(divide='ignore'):
+            return np.vstack([
+                self.accuracy,
+                1.0 / self.cost_per_1k_tokens,
+                1.0 / self.latency_ms,
+                self.feature_count
+            ])
+
+def pack_candidates(metrics: Sequence, latency_percentile: Optional[str] = None) -> CandidateArrays:
+    """Pack ModelMetrics into arrays; accuracy is the mean of each candidate's benchmark scores"""
+    accuracy = np.full(len(metrics), np.nan)
+    for i, candidate in enumerate(metrics):
+        scores = [score for score in candidate.performance_scores.values() if score is not None]
+        if scores:
+            accuracy[i] = np.mean(scores)
+    return CandidateArrays(
+        names=[candidate.name for candidate in metrics],
+        accuracy=accuracy,
+        cost_per_1k_tokens=np.array([candidate.cost_per_1k_tokens for candidate in metrics], dtype=np.float64),
+        latency_ms=np.array([candidate.latency_ms(latency_percentile) for candidate in metrics], dtype=np.float64),
+        feature_count=np.array([len(candidate.supported_features) for candidate in metrics], dtype=np.float64)
+    )
+
+def weight_matrix(weightings: Dict[str, Dict[str, float]]) -> np.ndarray:
+    """(weightings, components) matrix; a component missing from a weighting gets weight 0"""
+    return np.array([[weights.get(component, 0.0) for component in COMPONENTS]
+                     for weights in weightings.values()], dtype=np.float64).reshape(-1, len(COMPONENTS))
+
+def score_candidates(candidates: CandidateArrays, weightings: Dict[str, Dict[str, float]]) -> np.ndarray:
+    """Score every candidate under every weighting in one matrix product: (weightings, candidates)"""
+    return weight_matrix(weightings) @ candidates.components()
+
+def best_candidates(scores: np.ndarray) -> np.ndarray:
+    """Index of the best candidate under each weighting, skipping unscored (NaN) candidates; -1 if none is scored"""
+    scored = ~np.isnan(scores)
+    best = np.where(scored, scores, -np.inf).argmax(axis=1)
+    return np.where(scored.any(axis=1), best, -1)
+
+def pareto_front(candidates: CandidateArrays) -> np.ndarray:
+    """Mask of candidates not dominated on cost, latency and accuracy.
+
+    A candidate is dominated when another is at least as cheap, as fast and as
+    accurate, and strictly better on one of them. The lexicographically smallest
+    remaining candidate is always non-dominated, so each step adds it to the
+    front and drops everything it dominates in one vectorized comparison. That
+    costs O(candidates x front size) rather than comparing every pair.
+    Candidates with a missing objective are never on the front.
+    """
+    # Minimize every objective, so accuracy is negated
+    objectives = np.column_stack([candidates.cost_per_1k_tokens, candidates.latency_ms, -candidates.accuracy])
+    remaining = np.flatnonzero(~np.isnan(objectives).any(axis=1))
+    remaining = remaining[np.lexsort(objectives[remaining].T[::-1])]
+
+    front = np.zeros(len(candidates), dtype=bool)
+    while remaining.size:
+        best = objectives[remaining[0]]
+        front[remaining[0]] = True
+        rest = objectives[remaining[1:]]
+        dominated = (rest >= best).all(axis=1) & (rest > best).any(axis=1)
+        remaining = remaining[1:][~dominated]
+    return front
@@ -1,37 +1,74 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from .usage_store import UsageStore
+from .cost_rollups import CostRollup, CostRollups
+from .cost_forecast import CostForecast, forecast_costs
+from .rolling_window import RollingWindow
+from .pricing import PriceTable, TokenCounter
+
+# Friendly period names accepted by analyze_costs, mapped to pandas offset aliases
+PERIOD_FREQUENCIES = {
+    'minute': 'min',
+    'hour': 'h',
+    'day': 'D',
+    'week': 'W',
+    'month': 'MS'
+}
+
+DAY_NS = 86_400 * 10**9
 
 class PerformanceTracker:
-    def __init__(self):
-        self.usage_data = pd.DataFrame(columns=['timestamp', 'model', 'tokens_used', 'latency_ms', 'cost', 'success'])
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or {}
+        self.usage_store = UsageStore(rollups=CostRollups(
+            minute_retention=self.config.get('rollup_minute_retention', 120),
+            hour_retention=self.config.get('rollup_hour_retention', 48)
+        ))
+        self.threshold_window = RollingWindow(
+            max_requests=self.config.get('threshold_window_requests', 1000),
+            max_age_seconds=self.config.get('threshold_window_seconds')
+        )
+        self.pricing = PriceTable.from_config(self.config)
+        self.token_counter = TokenCounter()
         self.cost_thresholds = self._load_cost_thresholds()
         self.performance_targets = self._load_performance_targets()
         
     def track_request(self, request_data: Dict):
         """Track a single request"""
-        self.usage_data = self.usage_data.append({
-            'timestamp': datetime.now(),
-            'model': request_data['model'],
-            'tokens_used': request_data['tokens'],
-            'latency_ms': request_data['latency'],
-            'cost': self._calculate_cost(request_data),
-            'success': request_data['success']
-        }, ignore_index=True)
+        timestamp = request_data.get('timestamp') or datetime.now()
+        prompt_tokens, completion_tokens, cached_tokens = self._token_counts(request_data)
+        cost = self.pricing.cost(request_data['model'], prompt_tokens, completion_tokens, cached_tokens)
+        self.usage_store.append(
+            model=request_data['model'],
+            tokens_used=prompt_tokens + completion_tokens,
+            latency_ms=request_data['latency'],
+            cost=cost,
+            success=request_data['success'],
+            timestamp=timestamp,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens
+        )
+        self.threshold_window.add(cost, request_data['latency'], request_data['success'], timestamp)
         
         self._check_thresholds()
+
+    @property
+    def usage_data(self) -> pd.DataFrame:
+        """Tracked requests as a DataFrame, flushed lazily from the usage store"""
+        return self.usage_store.to_frame()
     
     def analyze_costs(self, period: str = 'day') -> Dict:
-        """Analyze costs over a given period"""
-        grouped = self.usage_data.groupby(
-            pd.Grouper(key='timestamp', freq=period)
-        )
+        """Analyze costs over a given period, read from the usage store's rollups rather than every request"""
+        rollup = self.usage_store.rollups.query(PERIOD_FREQUENCIES.get(period, period), len(self.usage_store.models))
         
         return {
-            'total_cost': grouped['cost'].sum(),
-            'cost_by_model': self._analyze_cost_by_model(grouped),
-            'cost_trends': self._analyze_cost_trends(grouped),
-            'cost_projections': self._project_costs(grouped)
+            'total_cost': rollup.periods['cost'],
+            'cost_by_model': self._analyze_cost_by_model(rollup),
+            'cost_trends': self._analyze_cost_trends(rollup),
+            'cost_projections': self._project_costs(rollup)
         }
     
     def optimize_resource_allocation(self) -> Dict:
@@ -49,11 +86,13 @@ class PerformanceTracker:
     
     def _check_thresholds(self):
         """Check cost and performance thresholds"""
-        recent_data = self.usage_data.tail(1000)  # Last 1000 requests
+        window = self.threshold_window  # Last 1000 requests unless configured otherwise
+        if not len(window):
+            return
         
-        cost_rate = recent_data['cost'].sum() / len(recent_data)
-        avg_latency = recent_data['latency_ms'].mean()
-        success_rate = recent_data['success'].mean()
+        cost_rate = window.cost_rate
+        avg_latency = window.avg_latency
+        success_rate = window.success_rate
         
         if cost_rate > self.cost_thresholds['cost_per_request']:
             self._trigger_cost_alert(cost_rate)
@@ -64,20 +103,61 @@ class PerformanceTracker:
         if success_rate < self.performance_targets['min_success_rate']:
             self._trigger_reliability_alert(success_rate)
     
-    def _project_costs(self, grouped) -> Dict:
-        """Project future costs"""
-        historical_trend = self._calculate_historical_trend(grouped)
+    def _project_costs(self, rollup: CostRollup) -> Dict:
+        """Project future costs from the daily cost of each model"""
+        forecast = self._calculate_historical_trend(rollup)
         
         return {
-            'next_day': self._project_for_period(historical_trend, 'day'),
-            'next_week': self._project_for_period(historical_trend, 'week'),
-            'next_month': self._project_for_period(historical_trend, 'month'),
-            'confidence_intervals': self._calculate_confidence_intervals()
+            'next_day': self._project_for_period(forecast, 'day'),
+            'next_week': self._project_for_period(forecast, 'week'),
+            'next_month': self._project_for_period(forecast, 'month'),
+            'confidence_intervals': self._calculate_confidence_intervals(forecast),
+            'by_model': {
+                model: dict(zip(forecast.horizons, forecast.point[:, code].tolist()))
+                for code, model in enumerate(self.usage_store.models)
+            },
+            'method': forecast.method
         }
 
+    def recompute_costs(self, pricing: Optional[PriceTable] = None):
+        """Reprice every tracked request in one vectorized pass, e.g. after a price change"""
+        if pricing is not None:
+            self.pricing = pricing
+        store = self.usage_store
+        store.set_cost(self.pricing.cost_arrays(
+            store.model_codes, store.models, store.prompt_tokens, store.completion_tokens, store.cached_tokens
+        ))
+
     def _calculate_cost(self, request_data: Dict) -> float:
         """Calculate cost of a request"""
-        return request_data['tokens'] * 0.01  # Example cost calculation
+        return self.pricing.cost(request_data['model'], *self._token_counts(request_data))
+
+    def _token_counts(self, request_data: Dict) -> Tuple[int, int, int]:
+        """(prompt, completion, cached) tokens of a request.
+
+        Explicit counts win. A 'tokens' total is kept as given and only split:
+        a missing part is the rest of the total, and a 'response' text counted
+        locally is capped at the total. Without a total, 'prompt' and
+        'response' texts are counted locally.
+        """
+        model = request_data.get('model')
+        prompt = request_data.get('prompt_tokens')
+        completion = request_data.get('completion_tokens')
+        total = request_data.get('tokens')
+        if completion is None and prompt is not None and total is not None:
+            completion = max(0, total - prompt)
+        if completion is None:
+            completion = self.token_counter.count(request_data['response'], model) if 'response' in request_data else 0
+            if total is not None:
+                completion = min(completion, total)
+        if prompt is None:
+            if total is not None:
+                prompt = max(0, total - completion)
+            elif 'prompt' in request_data:
+                prompt = self.token_counter.count(request_data['prompt'], model)
+            else:
+                prompt = 0
+        return prompt, completion, request_data.get('cached_tokens', 0)
 
     def _load_cost_thresholds(self) -> Dict:
         """Load cost thresholds"""
@@ -92,23 +172,42 @@ class PerformanceTracker:
             'min_success_rate': 0.95  # Example success rate
         }
 
-    def _analyze_cost_by_model(self, grouped) -> Dict:
+    def _analyze_cost_by_model(self, rollup: CostRollup) -> Dict:
         """Analyze cost by model"""
-        return grouped['cost'].sum().to_dict()
+        return {
+            model: float(cost)
+            for model, cost, requests in zip(self.usage_store.models, rollup.model_costs, rollup.model_requests)
+            if requests
+        }
 
-    def _analyze_cost_trends(self, grouped) -> Dict:
-        """Analyze cost trends"""
-        return grouped['cost'].mean().to_dict()
+    def _analyze_cost_trends(self, rollup: CostRollup) -> Dict:
+        """Analyze cost trends: mean cost per request in each period"""
+        return (rollup.periods['cost'] / rollup.periods['requests']).to_dict()
 
     def _analyze_current_usage(self) -> Dict:
         """Analyze current usage"""
-        return self.usage_data.groupby('model').sum().to_dict()
+        store = self.usage_store
+        return {
+            'tokens_used': store.sum_by_model(store.tokens_used),
+            'latency_ms': store.sum_by_model(store.latency_ms),
+            'cost': store.sum_by_model(store.cost),
+            'success': store.sum_by_model(store.success)
+        }
 
     def _calculate_performance_metrics(self) -> Dict:
         """Calculate performance metrics"""
         return {
-            'avg_latency': self.usage_data['latency_ms'].mean(),
-            'success_rate': self.usage_data['success'].mean()
+            'avg_latency': float(self.usage_store.latency_ms.mean()) if len(self.usage_store) else float('nan'),
+            'success_rate': float(self.usage_store.success.mean()) if len(self.usage_store) else float('nan')
+        }
+
+    def _analyze_latency(self) -> Dict[str, Dict[str, float]]:
+        """Latency percentiles per model"""
+        store = self.usage_store
+        codes, latency = store.model_codes, store.latency_ms
+        return {
+            model: dict(zip(['p50', 'p90', 'p99'], np.percentile(latency[codes == code], [50, 90, 99]).tolist()))
+            for code, model in enumerate(store.models)
         }
 
     def _generate_optimization_recommendations(self, current_usage: Dict, performance_metrics: Dict) -> List[str]:
@@ -138,17 +237,25 @@ class PerformanceTracker:
         """Trigger reliability alert"""
         print(f"Reliability alert: {success_rate}")
 
-    def _calculate_historical_trend(self, grouped) -> Dict:
-        """Calculate historical trend"""
-        return grouped['cost'].mean().to_dict()
+    def _calculate_historical_trend(self, rollup: CostRollup) -> CostForecast:
+        """Fit trend and weekly seasonality to the last `forecast.history_days` days of cost per model"""
+        settings = self.config.get('forecast', {})
+        daily = rollup if rollup.freq == 'D' else self.usage_store.rollups.query('D', len(self.usage_store.models))
+        history = daily.period_model_costs[-settings.get('history_days', 90):]
+        first_day = int(daily.periods.index[-len(history)].value // DAY_NS) if len(history) else 0
+        return forecast_costs(
+            history, first_day,
+            n_bootstrap=settings.get('bootstrap_samples', 200),
+            confidence=settings.get('confidence', 0.9)
+        )
 
-    def _project_for_period(self, historical_trend: Dict, period: str) -> float:
-        """Project cost for a period"""
-        return historical_trend.get(period, 0.0)
+    def _project_for_period(self, forecast: CostForecast, period: str) -> float:
+        """Projected total cost over the next day, week or month"""
+        return float(forecast.total_point[list(forecast.horizons).index(period)])
 
-    def _calculate_confidence_intervals(self) -> Dict:
-        """Calculate confidence intervals"""
+    def _calculate_confidence_intervals(self, forecast: CostForecast) -> Dict:
+        """Bootstrap confidence interval of the projected total cost for each horizon"""
         return {
-            'lower': 0.9,
-            'upper': 1.1
+            f'next_{period}': {'lower': float(lower), 'upper': float(upper)}
+            for period, lower, upper in zip(forecast.horizons, forecast.total_lower, forecast.total_upper)
         }
\ No newline at end of file
@@ -0,0 +1,140 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+import math
+import re
+import numpy as np
+
+try:
+    import tiktoken
+except ImportError:  # Optional; token counts fall back to a local approximation
+    tiktoken = None
+
+@dataclass
+class PriceTier:
+    """Prices that apply once a request's prompt exceeds `above_prompt_tokens`"""
+    above_prompt_tokens: int
+    prompt_per_1k: float
+    completion_per_1k: float
+
+@dataclass
+class ModelPrice:
+    prompt_per_1k: float
+    completion_per_1k: float
+    cached_discount: float = 0.0  # share of the prompt price waived for cached prompt tokens
+    tiers: List[PriceTier] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, settings: Dict) -> 'ModelPrice':
+        return cls(
+            prompt_per_1k=settings['prompt_per_1k'],
+            completion_per_1k=settings['completion_per_1k'],
+            cached_discount=settings.get('cached_discount', 0.0),
+            tiers=sorted((PriceTier(**tier) for tier in settings.get('tiers', [])),
+                         key=lambda tier: tier.above_prompt_tokens)
+        )
+
+# Flat example rate of 0.01 per token, used for models without a configured price
+DEFAULT_PRICE = ModelPrice(prompt_per_1k=10.0, completion_per_1k=10.0)
+
+class PriceTable:
+    """Per-model prices, applied to single requests or to whole usage columns at once.
+
+    Prompt and completion tokens are priced separately; cached prompt tokens get
+    the model's discount, and tiers switch prices once a request's prompt is
+    larger than the tier threshold.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, ModelPrice]] = None, default: Optional[ModelPrice] = None):
+        self.prices = prices or {}
+        self.default = default or DEFAULT_PRICE
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'PriceTable':
+        settings = config.get('pricing', {})
+        return cls(
+            prices={model: ModelPrice.from_dict(price) for model, price in settings.get('models', {}).items()},
+            default=ModelPrice.from_dict(settings['default']) if 'default' in settings else None
+        )
+
+    def price_for(self, model: str) -> ModelPrice:
+        return self.prices.get(model, self.default)
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+        """Cost of a single request, in plain Python since NumPy overhead dominates at this size"""
+        price = self.price_for(model)
+        prompt_per_1k, completion_per_1k = price.prompt_per_1k, price.completion_per_1k
+        for tier in price.tiers:
+            if prompt_tokens <= tier.above_prompt_tokens:
+                break
+            prompt_per_1k, completion_per_1k = tier.prompt_per_1k, tier.completion_per_1k
+        billed_prompt = prompt_tokens - cached_tokens * price.cached_discount
+        return (billed_prompt * prompt_per_1k + completion_tokens * completion_per_1k) / 1000.0
+
+    def cost_arrays(self, model_codes: np.ndarray, models: Sequence[str], prompt_tokens: np.ndarray,
+                    completion_tokens: np.ndarray, cached_tokens: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cost of every request in one pass; model_codes index into `models`"""
+        prices = [self.price_for(model) for model in models]
+        n_tiers = max((len(price.tiers) for price in prices), default=0)
+
+        # (models, tiers + 1) price grids; column 0 is the base price, unused tiers never match
+        thresholds = np.full((len(prices), n_tiers), np.inf)
+        prompt_grid = np.empty((len(prices), n_tiers + 1))
+        completion_grid = np.empty((len(prices), n_tiers + 1))
+        for i, price in enumerate(prices):
+            prompt_grid[i] = price.prompt_per_1k
+            completion_grid[i] = price.completion_per_1k
+            for j, tier in enumerate(price.tiers):
+                thresholds[i, j] = tier.above_prompt_tokens
+                prompt_grid[i, j + 1:] = tier.prompt_per_1k
+                completion_grid[i, j + 1:] = tier.completion_per_1k
+        discount = np.array([price.cached_discount for price in prices])
+
+        tier = np.zeros(len(model_codes), dtype=np.int64)
+        for j in range(n_tiers):
+            tier += prompt_tokens > thresholds[model_codes, j]
+
+        cached = np.zeros(len(model_codes)) if cached_tokens is None else cached_tokens
+        prompt_price = prompt_grid[model_codes, tier]
+        billed_prompt = prompt_tokens - cached * discount[model_codes]
+        return (billed_prompt * prompt_price + completion_tokens * completion_grid[model_codes, tier]) / 1000.0
+
+    def price_per_1k(self, model: str, completion_share: float = 0.25) -> float:
+        """Blended base price of 1k tokens at a given share of completion tokens"""
+        price = self.price_for(model)
+        return (1 - completion_share) * price.prompt_per_1k + completion_share * price.completion_per_1k
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+class TokenCounter:
+    """Count tokens locally, memoizing counts for repeated texts.
+
+    Uses the model's tiktoken encoding when tiktoken is installed and the
+    encoding can be loaded, otherwise an approximation of about one token per four characters of each word plus one
+    per punctuation mark.
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        self._encodings: Dict[str, object] = {}
+        self.count = lru_cache(maxsize=cache_size)(self._count)
+
+    def _count(self, text: str, model: Optional[str] = None) -> int:
+        encoding = self._encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text))
+        return sum(max(1, math.ceil(len(token) / 4)) for token in TOKEN_PATTERN.findall(text))
+
+    def _encoding(self, model: Optional[str]):
+        if tiktoken is None:
+            return None
+        key = model or ''
+        if key not in self._encodings:
+            try:
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except (KeyError, TypeError):  # unknown or missing model name
+                    encoding = tiktoken.get_encoding('cl100k_base')
+            except Exception:  # e.g. the encoding file cannot be downloaded offline
+                encoding = None
+            self._encodings[key] = encoding
+        return self._encodings[key]
@@ -0,0 +1,347 @@
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+
+class WorkerCrashedError(RuntimeError):
+    """A work unit's worker process died more often than the pool retries units"""
+
+# Delay before replacing a worker that died with nothing in flight, doubled for each such death in a row
+RESTART_BACKOFF_SECONDS = 0.1
+MAX_RESTART_BACKOFF_SECONDS = 30.0
+
+@dataclass
+class _Task:
+    future: Future
+    method: str
+    args: tuple
+    provider: Hashable
+    attempts: int = 0
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.in_flight: Dict[int, _Task] = {}
+        self.ready = False
+        self.startup_error: Optional[BaseException] = None
+
+def _send_message(conn, message: tuple):
+    """Send (task id, ok, value), or an error in its place when the value cannot be pickled"""
+    try:
+        conn.send(message)
+    except Exception as e:
+        conn.send((message[0], False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+def _worker_main(conn, factory: Callable[..., Any], factory_args: tuple, threads: int):
+    """Build the worker's own evaluator once, then run methods on it until told to stop.
+
+    A (None, ok, error) message tells the pool whether the evaluator could be built.
+    """
+    try:
+        state = factory(*factory_args)
+    except Exception as e:
+        _send_message(conn, (None, False, e))
+        return
+    conn.send((None, True, None))
+    send_lock = threading.Lock()
+
+    def run(task_id: int, method: str, args: tuple):
+        try:
+            message = (task_id, True, getattr(state, method)(*args))
+        except Exception as e:
+            message = (task_id, False, e)
+        with send_lock:
+            _send_message(conn, message)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:  # the parent went away
+                break
+            if message is None:
+                break
+            executor.submit(run, *message)
+
+class ShardedProcessPool:
+    """Process pool for CPU-heavy evaluation work, with work stealing and crash retries.
+
+    Every worker process builds its own evaluator with factory(*factory_args)
+    and runs submitted methods on it, `threads_per_process` at a time. Units of
+    one shard (e.g. one model or one dataset) are queued to the same worker to
+    keep its caches warm, and an idle worker steals from the back of the
+    longest queue. Per-provider caps apply across all processes. When a worker
+    dies, its in-flight units are queued again, up to `max_retries` times each,
+    and the worker is replaced; a worker that died with nothing in flight is
+    replaced after a growing delay. If a worker cannot build its evaluator,
+    the pool is broken: queued and later units fail with the factory's
+    exception and no more workers are started. Use it as a context manager,
+    or call shutdown() when done.
+    """
+
+    def __init__(self, factory: Callable[..., Any], factory_args: tuple = (), processes: Optional[int] = None,
+                 threads_per_process: int = 1, provider_limits: Optional[Dict[str, int]] = None,
+                 default_limit: Optional[int] = None, max_retries: int = 2, start_method: str = 'spawn'):
+        self.factory = factory
+        self.factory_args = factory_args
+        self.processes = processes or os.cpu_count() or 1
+        self.threads_per_process = threads_per_process
+        self.provider_limits = provider_limits or {}
+        self.default_limit = default_limit
+        self.max_retries = max_retries
+        self.stats = Counter()
+        self._context = multiprocessing.get_context(start_method)
+        self._lock = threading.Lock()
+        self._queues = [deque() for _ in range(self.processes)]
+        self._shard_owners: Dict[Hashable, int] = {}
+        self._provider_in_flight = Counter()
+        self._workers: List[Optional[_Worker]] = [None] * self.processes
+        self._idle_deaths = [0] * self.processes
+        self._restart_at: Dict[int, float] = {}
+        self._broken: Optional[BaseException] = None
+        self._task_ids = itertools.count()
+        self._wake_reader, self._wake_writer = self._context.Pipe(duplex=False)
+        self._dispatcher: Optional[threading.Thread] = None
+        self._closed = False
+
+    def __enter__(self) -> 'ShardedProcessPool':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def limit_for(self, provider: Hashable) -> Optional[int]:
+        return self.provider_limits.get(provider, self.default_limit)
+
+    def submit(self, method: str, *args, provider: Hashable = 'default', shard: Hashable = None) -> Future:
+        """Queue evaluator.method(*args) on the worker owning `shard` and return its future"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('cannot submit to a pool that has been shut down')
+            if self._broken is not None:
+                future.set_exception(self._broken)
+                return future
+            self._queue_for(shard).append(_Task(future, method, args, provider))
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name='shard-dispatcher', daemon=True)
+                self._dispatcher.start()
+            self._wake_writer.send_bytes(b'')
+        return future
+
+    def run(self, method: str, units: Iterable[Any], args_of: Callable[[Any], tuple],
+            provider_of: Optional[Callable[[Any], Hashable]] = None,
+            shard_of: Optional[Callable[[Any], Hashable]] = None) -> Iterator[Tuple[Any, Future]]:
+        """Run evaluator.method(*args_of(unit)) for every unit and yield (unit, future) pairs in completion order"""
+        futures = {
+            self.submit(method, *args_of(unit),
+                        provider=provider_of(unit) if provider_of else 'default',
+                        shard=shard_of(unit) if shard_of else None): unit
+            for unit in units
+        }
+        for future in as_completed(futures):
+            yield futures[future], future
+
+    def shutdown(self, wait: bool = True):
+        """Finish queued work, then stop the workers"""
+        with self._lock:
+            self._closed = True
+            dispatcher = self._dispatcher
+            self._wake_writer.send_bytes(b'')
+        if dispatcher is not None and wait:
+            dispatcher.join()
+
+    def _queue_for(self, shard: Hashable) -> deque:
+        """The queue of the worker owning a shard; new shards go to the shortest queue"""
+        owner = self._shard_owners.get(shard) if shard is not None else None
+        if owner is None:
+            owner = min(range(self.processes), key=lambda i: len(self._queues[i]))
+            if shard is not None:
+                self._shard_owners[shard] = owner
+        return self._queues[owner]
+
+    def _dispatch_loop(self):
+        for slot in range(self.processes):
+            self._start_worker(slot)
+        while True:
+            with self._lock:
+                self._restart_due_workers()
+                self._fill_workers()
+                workers = [(slot, worker) for slot, worker in enumerate(self._workers) if worker is not None]
+                idle = not any(self._queues) and not any(worker.in_flight for _, worker in workers)
+                if self._closed and idle:
+                    break
+                conns = {worker.conn: slot for slot, worker in workers}
+                sentinels = {worker.process.sentinel: slot for slot, worker in workers}
+                timeout = max(0.0, min(self._restart_at.values()) - time.monotonic()) if self._restart_at else None
+            ready = wait([self._wake_reader, *conns, *sentinels], timeout)
+            if self._wake_reader in ready:
+                while self._wake_reader.poll():
+                    self._wake_reader.recv_bytes()
+            # Take results before handling exits, so a unit that finished just before a crash is not rerun
+            for conn in conns:
+                if conn in ready:
+                    self._receive(conns[conn])
+            for sentinel in sentinels:
+                if sentinel in ready:
+                    self._handle_exit(sentinels[sentinel])
+
+        for worker in self._workers:
+            if worker is not None:
+                worker.conn.send(None)
+        for worker in self._workers:
+            if worker is not None:
+                worker.process.join()
+                worker.conn.close()
+
+    def _start_worker(self, slot: int):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, args=(child_conn, self.factory, self.factory_args, self.threads_per_process),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._workers[slot] = _Worker(process, parent_conn)
+
+    def _restart_due_workers(self):
+        """Replace workers whose restart delay has passed; the caller must hold the lock"""
+        now = time.monotonic()
+        for slot, restart_at in list(self._restart_at.items()):
+            if restart_at <= now:
+                del self._restart_at[slot]
+                if self._broken is None:
+                    self._start_worker(slot)
+
+    def _fill_workers(self):
+        """Hand queued units to workers with free threads; the caller must hold the lock"""
+        for slot, worker in enumerate(self._workers):
+            while worker is not None and len(worker.in_flight) < self.threads_per_process:
+                task = self._next_task(slot)
+                if task is None:
+                    break
+                # Retried units are already running
+                if not task.attempts and not task.future.set_running_or_notify_cancel():
+                    continue
+                task_id = next(self._task_ids)
+                try:
+                    worker.conn.send((task_id, task.method, task.args))
+                except Exception as e:  # arguments that cannot be pickled
+                    task.future.set_exception(e)
+                    continue
+                worker.in_flight[task_id] = task
+                self._provider_in_flight[task.provider] += 1
+
+    def _next_task(self, slot: int) -> Optional[_Task]:
+        """The first runnable unit of the worker's own queue, else one stolen from the back of the longest queue"""
+        task = self._take(self._queues[slot], reverse=False)
+        if task is not None:
+            return task
+        for victim in sorted(range(self.processes), key=lambda i: -len(self._queues[i])):
+            if victim != slot and self._queues[victim]:
+                task = self._take(self._queues[victim], reverse=True)
+                if task is not None:
+                    self.stats['stolen'] += 1
+                    return task
+        return None
+
+    def _take(self, queue: deque, reverse: bool) -> Optional[_Task]:
+        """Remove and return the first unit whose provider is under its cap"""
+        positions = range(len(queue) - 1, -1, -1) if reverse else range(len(queue))
+        for position in positions:
+            task = queue[position]
+            limit = self.limit_for(task.provider)
+            if limit is None or self._provider_in_flight[task.provider] < limit:
+                del queue[position]
+                return task
+        return None
+
+    def _receive(self, slot: int) -> bool:
+        """Resolve the future of one finished unit; False once the worker's pipe is closed"""
+        worker = self._workers[slot]
+        try:
+            task_id, ok, value = worker.conn.recv()
+        except (EOFError, OSError):
+            return False  # the worker died; its sentinel reports it
+        if task_id is None:  # the worker's startup report
+            worker.ready = ok
+            worker.startup_error = value
+            return True
+        with self._lock:
+            task = worker.in_flight.pop(task_id)
+            self._provider_in_flight[task.provider] -= 1
+            self._idle_deaths[slot] = 0
+        if ok:
+            task.future.set_result(value)
+        else:
+            task.future.set_exception(value)
+        return True
+
+    def _handle_exit(self, slot: int):
+        """Retry a dead worker's in-flight units on a fresh worker, failing those out of retries"""
+        worker = self._workers[slot]
+        while worker.conn.poll() and self._receive(slot):
+            pass
+        worker.process.join()
+        worker.conn.close()
+        if not worker.ready:  # it failed to build its evaluator, or died trying
+            self._break(slot, worker.startup_error or WorkerCrashedError(
+                f"worker exited with code {worker.process.exitcode} before its evaluator was built"
+            ))
+            return
+
+        failed = []
+        with self._lock:
+            self.stats['crashes'] += 1
+            in_flight = bool(worker.in_flight)
+            for task in sorted(worker.in_flight.values(), key=lambda task: -task.attempts):
+                self._provider_in_flight[task.provider] -= 1
+                task.attempts += 1
+                if task.attempts > self.max_retries:
+                    failed.append(task)
+                else:
+                    self.stats['retried'] += 1
+                    self._queues[slot].appendleft(task)
+            worker.in_flight.clear()
+            if in_flight:
+                self._start_worker(slot)
+            else:
+                # Nothing was running, so a fresh worker is not what it was waiting for; back off
+                self._workers[slot] = None
+                delay = min(RESTART_BACKOFF_SECONDS * 2 ** self._idle_deaths[slot], MAX_RESTART_BACKOFF_SECONDS)
+                self._idle_deaths[slot] += 1
+                self._restart_at[slot] = time.monotonic() + delay
+        for task in failed:
+            task.future.set_exception(WorkerCrashedError(
+                f"worker exited with code {worker.process.exitcode} while running {task.method}, "
+                f"{task.attempts} times"
+            ))
+
+    def _break(self, slot: int, error: BaseException):
+        """A worker could not build its evaluator: fail its units and every queued one, and start no more workers"""
+        worker = self._workers[slot]
+        with self._lock:
+            self.stats['startup_failures'] += 1
+            self._broken = self._broken or error
+            self._workers[slot] = None
+            self._restart_at.clear()
+            running = list(worker.in_flight.values())
+            for task in running:
+                self._provider_in_flight[task.provider] -= 1
+            worker.in_flight.clear()
+            queued = [task for queue in self._queues for task in queue]
+            for queue in self._queues:
+                queue.clear()
+        for task in running:
+            task.future.set_exception(error)
+        for task in queued:
+            # Retried units are already running
+            if task.attempts or task.future.set_running_or_notify_cancel():
+                task.future.set_exception(error)
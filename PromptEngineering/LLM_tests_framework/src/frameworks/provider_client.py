@@ -0,0 +1,107 @@
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import asyncio
+import json
+
+class ProviderError(Exception):
+    """A provider answered with a non-200 status"""
+
+    def __init__(self, status: int, message: str = ''):
+        super().__init__(f"Provider returned {status}: {message}")
+        self.status = status
+
+class RateLimitError(ProviderError):
+    """A provider answered 429 Too Many Requests"""
+
+def _request_body(model: str, prompt: str, stream: bool) -> bytes:
+    return json.dumps({
+        'model': model,
+        'messages': [{'role': 'user', 'content': prompt}],
+        'stream': stream
+    }).encode('utf-8')
+
+def _parse_chunk(line: bytes) -> Tuple[bool, Optional[str]]:
+    """Parse an SSE line into (stream_finished, token); token is None for lines without content"""
+    if not line.startswith(b'data: '):
+        return False, None
+    data = line[6:].strip()
+    if data == b'[DONE]':
+        return True, None
+    return False, json.loads(data)['choices'][0]['delta'].get('content') or None
+
+def _raise_for_status(status: int, body: bytes):
+    if status == 429:
+        raise RateLimitError(status, body.decode('utf-8', 'replace'))
+    if status != 200:
+        raise ProviderError(status, body.decode('utf-8', 'replace'))
+
+def stream_completion(connection_url: str, model: str, prompt: str, api_key: Optional[str] = None,
+                      stream: bool = True, timeout: float = 60) -> Iterator[str]:
+    """Send one chat completion request and yield the response tokens (blocking)"""
+    request = Request(connection_url, data=_request_body(model, prompt, stream), method='POST',
+                      headers={'Content-Type': 'application/json', 'Authorization': f"Bearer {api_key or ''}"})
+    try:
+        response = urlopen(request, timeout=timeout)
+    except HTTPError as e:
+        _raise_for_status(e.code, e.read())
+        raise
+    with response:
+        if not stream:
+            yield json.loads(response.read())['choices'][0]['message']['content']
+            return
+        for line in response:
+            finished, token = _parse_chunk(line)
+            if finished:
+                return
+            if token is not None:
+                yield token
+
+async def astream_completion(connection_url: str, model: str, prompt: str, api_key: Optional[str] = None,
+                             stream: bool = True) -> AsyncIterator[str]:
+    """Send one chat completion request and yield the response tokens without blocking the loop"""
+    parts = urlparse(connection_url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    try:
+        body = _request_body(model, prompt, stream)
+        writer.write((
+            f"POST {parts.path or '/'} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Authorization: Bearer {api_key or ''}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n"
+        ).encode('latin-1') + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        status = int(status_line.split()[1])
+        headers = await read_headers(reader)
+        if status != 200 or not stream:
+            length = headers.get('content-length')
+            content = await (reader.readexactly(int(length)) if length else reader.read())
+            _raise_for_status(status, content)
+            yield json.loads(content)['choices'][0]['message']['content']
+            return
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            finished, token = _parse_chunk(line)
+            if finished:
+                return
+            if token is not None:
+                yield token
+    finally:
+        writer.close()
+
+async def read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            return headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
@@ -0,0 +1,136 @@
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class ResultCache:
+    """Persistent, content-addressed cache of metric results.
+
+    Entries are keyed by a hash of the model id, the test case, the metric name
+    and the metric version, so a result is reused only when none of them has
+    changed. Entries expire after ttl_seconds, and the least recently used ones
+    are evicted once the stored values exceed max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 100 * 1024 * 1024, ttl_seconds: Optional[float] = None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+        self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    @classmethod
+    def from_config(cls, config: Dict, base_dir: str = '') -> Optional['ResultCache']:
+        """Build a cache from the 'result_cache' config section, if there is one.
+
+        A relative path is resolved against base_dir, normally the config file's directory.
+        """
+        settings = config.get('result_cache')
+        if not settings or not settings.get('enabled', True):
+            return None
+        return cls(
+            path=os.path.join(base_dir, settings.get('path', '.cache/metric_results.sqlite')),
+            max_bytes=settings.get('max_bytes', 100 * 1024 * 1024),
+            ttl_seconds=settings.get('ttl_seconds')
+        )
+
+    @staticmethod
+    def make_key(model_id: str, test_case: Dict, metric_name: str, metric_version: str) -> str:
+        """Hash everything that determines a metric result"""
+        payload = json.dumps({
+            'model': model_id,
+            'input': test_case.get('input'),
+            'expected_output': test_case.get('expected_output'),
+            'context': test_case.get('context'),
+            'metric': metric_name,
+            'version': metric_version
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or an expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at, size FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._delete(key, row[2])
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value and evict old entries if over budget"""
+        encoded = json.dumps(value)
+        size = len(encoded)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, now, now, size)
+            )
+            self._bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters; every hit is a provider call that was not made"""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': self._bytes
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._bytes = 0
+
+    def close(self):
+        self._conn.close()
+
+    def _delete(self, key: str, size: int):
+        self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+        self._bytes -= size
+        self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        if self._bytes <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY accessed_at"):
+            if self._bytes <= self.max_bytes:
+                break
+            victims.append((key,))
+            self._bytes -= size
+        self._conn.executemany("DELETE FROM results WHERE key = ?", victims)
@@ -0,0 +1,78 @@
+from typing import Deque, Optional, Tuple
+from collections import deque
+from datetime import datetime
+
+class RollingWindow:
+    """Running cost, latency and success aggregates over the most recent requests.
+
+    The window is bounded by request count, by age, or both. Each update adds the
+    new request to running sums and evicts expired ones, so reading the
+    aggregates is O(1) and updating them is O(1) amortized.
+    """
+
+    def __init__(self, max_requests: Optional[int] = 1000, max_age_seconds: Optional[float] = None):
+        if max_requests is None and max_age_seconds is None:
+            raise ValueError("RollingWindow needs max_requests, max_age_seconds or both")
+        self.max_requests = max_requests
+        self.max_age_seconds = max_age_seconds
+        self._entries: Deque[Tuple[float, float, float, bool]] = deque()
+        self._cost_sum = 0.0
+        self._latency_sum = 0.0
+        self._success_count = 0
+        self._evictions_since_resum = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, cost: float, latency_ms: float, success: bool, timestamp: Optional[datetime] = None):
+        """Add a request to the window and evict whatever falls out of it"""
+        ts = (timestamp or datetime.now()).timestamp()
+        self._entries.append((ts, cost, latency_ms, bool(success)))
+        self._cost_sum += cost
+        self._latency_sum += latency_ms
+        self._success_count += bool(success)
+        self._evict(ts)
+
+    @property
+    def cost_rate(self) -> float:
+        """Average cost per request in the window"""
+        return self._cost_sum / len(self._entries) if self._entries else 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        """Mean latency in the window"""
+        return self._latency_sum / len(self._entries) if self._entries else 0.0
+
+    @property
+    def success_rate(self) -> float:
+        """Share of successful requests in the window"""
+        return self._success_count / len(self._entries) if self._entries else 1.0
+
+    def _evict(self, now: float):
+        """Drop entries beyond the count bound or older than the age bound"""
+        entries = self._entries
+        evicted = 0
+        while self.max_requests is not None and len(entries) > self.max_requests:
+            self._remove(entries.popleft())
+            evicted += 1
+        if self.max_age_seconds is not None:
+            cutoff = now - self.max_age_seconds
+            while entries and entries[0][0] < cutoff:
+                self._remove(entries.popleft())
+                evicted += 1
+
+        # Subtracting floats accumulates error, so re-sum once per window turnover
+        self._evictions_since_resum += evicted
+        if self._evictions_since_resum and self._evictions_since_resum >= len(entries):
+            self._resum()
+
+    def _remove(self, entry: Tuple[float, float, float, bool]):
+        _, cost, latency_ms, success = entry
+        self._cost_sum -= cost
+        self._latency_sum -= latency_ms
+        self._success_count -= success
+
+    def _resum(self):
+        self._cost_sum = sum(entry[1] for entry in self._entries)
+        self._latency_sum = sum(entry[2] for entry in self._entries)
+        self._evictions_since_resum = 0
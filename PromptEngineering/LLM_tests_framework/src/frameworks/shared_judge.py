@@ -0,0 +1,74 @@
+from typing import Any, Dict, Iterable, Tuple
+import asyncio
+import threading
+
+class SharedJudge:
+    """Proxy for a judge model that answers identical prompts with one shared call.
+
+    Metrics evaluated in the same pass often send the judge the same prompt
+    (e.g. extracting claims from the actual output). Wrapping their judge in one
+    SharedJudge issues that call once and replays the response to every metric.
+    In async mode, identical prompts sent while the first call is still running
+    wait for that call instead of issuing their own.
+    Everything other than generate/a_generate is delegated to the wrapped judge.
+    """
+
+    def __init__(self, judge: Any):
+        self._judge = judge
+        self._responses: Dict[Tuple, Any] = {}
+        self._in_flight: Dict[Tuple, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared_calls = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._judge, name)
+
+    def generate(self, prompt: str, *args, **kwargs) -> Any:
+        key = self._key(prompt, args, kwargs)
+        with self._lock:
+            if key in self._responses:
+                self.shared_calls += 1
+                return self._responses[key]
+        response = self._judge.generate(prompt, *args, **kwargs)
+        with self._lock:
+            self.calls += 1
+            return self._responses.setdefault(key, response)
+
+    async def a_generate(self, prompt: str, *args, **kwargs) -> Any:
+        key = self._key(prompt, args, kwargs)
+        if key in self._responses:
+            self.shared_calls += 1
+            return self._responses[key]
+        if key in self._in_flight:
+            self.shared_calls += 1
+        else:
+            self._in_flight[key] = asyncio.ensure_future(self._a_generate_uncached(key, prompt, args, kwargs))
+        # Shielded, so one cancelled metric does not cancel the call the others are waiting for
+        return await asyncio.shield(self._in_flight[key])
+
+    async def _a_generate_uncached(self, key: Tuple, prompt: str, args: tuple, kwargs: Dict) -> Any:
+        try:
+            response = await self._judge.a_generate(prompt, *args, **kwargs)
+            self.calls += 1
+            with self._lock:
+                return self._responses.setdefault(key, response)
+        finally:
+            self._in_flight.pop(key, None)
+
+    @staticmethod
+    def _key(prompt: str, args: tuple, kwargs: Dict) -> Tuple:
+        return (prompt, repr(args), repr(sorted(kwargs.items())))
+
+def share_judges(metrics: Iterable[Any]) -> Dict[str, SharedJudge]:
+    """Point metrics that use the same judge model at one SharedJudge"""
+    judges: Dict[str, SharedJudge] = {}
+    for metric in metrics:
+        judge = getattr(metric, 'model', None)
+        if judge is None or isinstance(judge, str):
+            continue
+        name = judge.get_model_name() if hasattr(judge, 'get_model_name') else type(judge).__name__
+        if name not in judges:
+            judges[name] = SharedJudge(judge)
+        metric.model = judges[name]
+    return judges
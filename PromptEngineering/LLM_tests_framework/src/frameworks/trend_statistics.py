@@ -0,0 +1,157 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+import numpy as np
+
+class TrendStatistics:
+    """Streaming trend statistics over a model x metric x time score tensor.
+
+    Each evaluation run updates per-cell running statistics in one vectorized
+    step: Welford mean/variance, an EWMA, and the sums needed for a least-squares
+    slope over run index. The last `window` runs are also kept as a
+    (models, metrics, window) ring buffer. Change detection, improvement and
+    stability are computed for every cell at once.
+    """
+
+    def __init__(self, window: int = 256, ewma_alpha: float = 0.3):
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self.models: List[str] = []
+        self.metrics: List[str] = []
+        self._model_index: Dict[str, int] = {}
+        self._metric_index: Dict[str, int] = {}
+        self.runs = 0
+        self.timestamps = np.full(window, np.datetime64('NaT'), dtype='datetime64[us]')
+        self._values = np.full((0, 0, window), np.nan)
+        self.count = np.zeros((0, 0))
+        self.mean = np.zeros((0, 0))
+        self._m2 = np.zeros((0, 0))
+        self.ewma = np.full((0, 0), np.nan)
+        self.last = np.full((0, 0), np.nan)
+        self.previous = np.full((0, 0), np.nan)
+        self.last_run = np.full((0, 0), -1)  # index of the run that last updated each cell
+        self._s_t = np.zeros((0, 0))
+        self._s_tt = np.zeros((0, 0))
+        self._s_y = np.zeros((0, 0))
+        self._s_ty = np.zeros((0, 0))
+
+    def update(self, results: Dict[str, Dict[str, float]], timestamp: Optional[datetime] = None):
+        """Fold one run's {model: {metric: score}} results into every cell's statistics"""
+        self._register(results)
+        x = np.full((len(self.models), len(self.metrics)), np.nan)
+        for model, metric_scores in results.items():
+            row = self._model_index[model]
+            for metric, score in metric_scores.items():
+                if score is not None:
+                    x[row, self._metric_index[metric]] = score
+
+        observed = ~np.isnan(x)
+        filled = np.where(observed, x, 0.0)
+        t = float(self.runs)
+
+        self.previous = np.where(observed, self.last, self.previous)
+        self.last = np.where(observed, x, self.last)
+        self.last_run = np.where(observed, self.runs, self.last_run)
+
+        # Welford's update, applied only to observed cells
+        count = self.count + observed
+        delta = np.where(observed, filled - self.mean, 0.0)
+        self.mean = self.mean + delta / np.maximum(count, 1)
+        self._m2 = self._m2 + np.where(observed, delta * (filled - self.mean), 0.0)
+        self.count = count
+
+        blended = self.ewma_alpha * filled + (1 - self.ewma_alpha) * self.ewma
+        self.ewma = np.where(observed, np.where(np.isnan(self.ewma), filled, blended), self.ewma)
+
+        self._s_t += observed * t
+        self._s_tt += observed * t * t
+        self._s_y += filled
+        self._s_ty += filled * t
+
+        slot = self.runs % self.window
+        self._values[:, :, slot] = x
+        self.timestamps[slot] = np.datetime64(timestamp or datetime.now(), 'us')
+        self.runs += 1
+
+    def replay(self, rows: Iterable[Tuple[int, datetime, str, str, float]]):
+        """Rebuild statistics from (run_id, timestamp, model, metric, score) rows, grouped by run"""
+        current_run, current_timestamp, results = None, None, {}
+        for run_id, timestamp, model, metric, score in rows:
+            if run_id != current_run and results:
+                self.update(results, current_timestamp)
+                results = {}
+            current_run, current_timestamp = run_id, timestamp
+            results.setdefault(model, {})[metric] = score
+        if results:
+            self.update(results, current_timestamp)
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Sample variance per cell, NaN with fewer than two observations"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, self._m2 / (self.count - 1), np.nan)
+
+    @property
+    def slope(self) -> np.ndarray:
+        """Least-squares score change per run for every cell"""
+        denominator = self.count * self._s_tt - self._s_t ** 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(denominator > 0,
+                            (self.count * self._s_ty - self._s_t * self._s_y) / denominator,
+                            np.nan)
+
+    def window_values(self) -> np.ndarray:
+        """The retained (models, metrics, time) tensor, oldest run first"""
+        if self.runs < self.window:
+            return self._values[:, :, :self.runs]
+        return np.roll(self._values, -(self.runs % self.window), axis=2)
+
+    def detect_changes(self, threshold: float) -> List[str]:
+        """Describe every cell the latest run moved by more than threshold"""
+        with np.errstate(invalid='ignore'):
+            changed = (np.abs(self.last - self.previous) > threshold) & (self.last_run == self.runs - 1)
+        return [
+            f"{self.models[i]} {self.metrics[j]}: {self.previous[i, j]:.2f} -> {self.last[i, j]:.2f}"
+            for i, j in np.argwhere(changed)
+        ]
+
+    def improvement(self) -> Dict[str, float]:
+        """Mean per-run slope across each model's metrics"""
+        return dict(zip(self.models, self._row_nanmean(self.slope).tolist()))
+
+    def stability(self) -> Dict[str, float]:
+        """1 / (1 + mean standard deviation) across each model's metrics; 1.0 is perfectly stable"""
+        spread = self._row_nanmean(np.sqrt(self.variance))
+        return dict(zip(self.models, (1.0 / (1.0 + spread)).tolist()))
+
+    def _row_nanmean(self, values: np.ndarray) -> np.ndarray:
+        valid = ~np.isnan(values)
+        counts = valid.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, np.where(valid, values, 0.0).sum(axis=1) / counts, np.nan)
+
+    def _register(self, results: Dict[str, Dict[str, float]]):
+        """Add rows/columns for models and metrics seen for the first time"""
+        for model, metric_scores in results.items():
+            if model not in self._model_index:
+                self._model_index[model] = len(self.models)
+                self.models.append(model)
+            for metric in metric_scores:
+                if metric not in self._metric_index:
+                    self._metric_index[metric] = len(self.metrics)
+                    self.metrics.append(metric)
+
+        shape = (len(self.models), len(self.metrics))
+        if self.count.shape == shape:
+            return
+        self._values = self._pad(self._values, shape + (self.window,), np.nan)
+        for name in ('count', 'mean', '_m2', '_s_t', '_s_tt', '_s_y', '_s_ty'):
+            setattr(self, name, self._pad(getattr(self, name), shape, 0.0))
+        for name in ('ewma', 'last', 'previous'):
+            setattr(self, name, self._pad(getattr(self, name), shape, np.nan))
+        self.last_run = self._pad(self.last_run, shape, -1).astype(np.int64)
+
+    @staticmethod
+    def _pad(array: np.ndarray, shape: Tuple[int, ...], fill: float) -> np.ndarray:
+        padded = np.full(shape, fill)
+        padded[tuple(slice(0, n) for n in array.shape)] = array
+        return padded
@@ -0,0 +1,178 @@
+from typing import Dict, List, Optional, Sequence
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from .cost_rollups import CostRollups
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MINUTE = timedelta(minutes=1)
+
+class UsageStore:
+    """Columnar, append-only store for tracked requests.
+
+    Each column lives in a preallocated NumPy array that doubles in size when
+    full, so appending a request is O(1) amortized. A DataFrame view is only
+    built (flushed) when one is asked for, and is cached until the next append.
+    Per-model cost rollups (`rollups`) are kept up to date as requests arrive.
+    """
+
+    COLUMNS = ['timestamp', 'model', 'tokens_used', 'prompt_tokens', 'completion_tokens', 'cached_tokens',
+               'latency_ms', 'cost', 'success']
+
+    def __init__(self, initial_capacity: int = 1024, rollups: Optional[CostRollups] = None):
+        self._capacity = max(1, initial_capacity)
+        self._size = 0
+        self._timestamps = np.empty(self._capacity, dtype='datetime64[ns]')
+        self._model_codes = np.empty(self._capacity, dtype=np.int32)
+        self._tokens = np.empty(self._capacity, dtype=np.int64)
+        self._prompt_tokens = np.empty(self._capacity, dtype=np.int64)
+        self._completion_tokens = np.empty(self._capacity, dtype=np.int64)
+        self._cached_tokens = np.empty(self._capacity, dtype=np.int64)
+        self._latency = np.empty(self._capacity, dtype=np.float64)
+        self._cost = np.empty(self._capacity, dtype=np.float64)
+        self._success = np.empty(self._capacity, dtype=bool)
+        self._model_index: Dict[str, int] = {}
+        self.models: List[str] = []
+        self._frame: Optional[pd.DataFrame] = None
+        self.rollups = rollups or CostRollups()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, model: str, tokens_used: int, latency_ms: float, cost: float,
+               success: bool, timestamp: Optional[datetime] = None, prompt_tokens: Optional[int] = None,
+               completion_tokens: int = 0, cached_tokens: int = 0) -> int:
+        """Append a single request and return its row index; without a split, all tokens count as prompt tokens"""
+        if self._size == self._capacity:
+            self._grow(self._capacity * 2)
+
+        row = self._size
+        timestamp = timestamp or datetime.now()
+        code = self.model_code(model)
+        self._timestamps[row] = np.datetime64(timestamp, 'ns')
+        self._model_codes[row] = code
+        self._tokens[row] = tokens_used
+        self._prompt_tokens[row] = tokens_used - completion_tokens if prompt_tokens is None else prompt_tokens
+        self._completion_tokens[row] = completion_tokens
+        self._cached_tokens[row] = cached_tokens
+        self._latency[row] = latency_ms
+        self._cost[row] = cost
+        self._success[row] = success
+        self._size += 1
+        self._frame = None
+        self.rollups.add(code, (timestamp - EPOCH) // ONE_MINUTE, cost)
+        return row
+
+    def extend(self, models: Sequence[str], tokens_used: np.ndarray, latency_ms: np.ndarray,
+               cost: np.ndarray, success: np.ndarray, timestamps: np.ndarray,
+               prompt_tokens: Optional[np.ndarray] = None, completion_tokens: Optional[np.ndarray] = None,
+               cached_tokens: Optional[np.ndarray] = None):
+        """Bulk-append many requests at once, e.g. when importing historical usage logs"""
+        count = len(tokens_used)
+        if self._size + count > self._capacity:
+            self._grow(max(self._capacity * 2, self._size + count))
+
+        rows = slice(self._size, self._size + count)
+        names, inverse = np.unique(np.asarray(models, dtype=object), return_inverse=True)
+        codes = np.array([self.model_code(name) for name in names], dtype=np.int32)
+        self._timestamps[rows] = np.asarray(timestamps, dtype='datetime64[ns]')
+        self._model_codes[rows] = codes[inverse.reshape(-1)]
+        self._tokens[rows] = tokens_used
+        self._completion_tokens[rows] = 0 if completion_tokens is None else completion_tokens
+        self._prompt_tokens[rows] = (np.asarray(tokens_used) - self._completion_tokens[rows]
+                                     if prompt_tokens is None else prompt_tokens)
+        self._cached_tokens[rows] = 0 if cached_tokens is None else cached_tokens
+        self._latency[rows] = latency_ms
+        self._cost[rows] = cost
+        self._success[rows] = success
+        self._size += count
+        self._frame = None
+        self.rollups.add_many(self._model_codes[rows], self._minutes(self._timestamps[rows]), self._cost[rows])
+
+    def model_code(self, model: str) -> int:
+        """Return the integer code for a model, registering it if new"""
+        code = self._model_index.get(model)
+        if code is None:
+            code = len(self.models)
+            self._model_index[model] = code
+            self.models.append(model)
+        return code
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self._size]
+
+    @property
+    def model_codes(self) -> np.ndarray:
+        return self._model_codes[:self._size]
+
+    @property
+    def tokens_used(self) -> np.ndarray:
+        return self._tokens[:self._size]
+
+    @property
+    def prompt_tokens(self) -> np.ndarray:
+        return self._prompt_tokens[:self._size]
+
+    @property
+    def completion_tokens(self) -> np.ndarray:
+        return self._completion_tokens[:self._size]
+
+    @property
+    def cached_tokens(self) -> np.ndarray:
+        return self._cached_tokens[:self._size]
+
+    @property
+    def latency_ms(self) -> np.ndarray:
+        return self._latency[:self._size]
+
+    @property
+    def cost(self) -> np.ndarray:
+        return self._cost[:self._size]
+
+    @property
+    def success(self) -> np.ndarray:
+        return self._success[:self._size]
+
+    def set_cost(self, cost: np.ndarray):
+        """Replace the cost of every stored request, e.g. after a price change"""
+        self._cost[:self._size] = cost
+        self._frame = None
+        self.rollups.reset()
+        self.rollups.add_many(self.model_codes, self._minutes(self.timestamps), self.cost)
+
+    def sum_by_model(self, values: np.ndarray) -> Dict[str, float]:
+        """Sum a column per model without materializing a DataFrame"""
+        totals = np.bincount(self.model_codes, weights=values, minlength=len(self.models))
+        return {model: float(totals[code]) for code, model in enumerate(self.models)}
+
+    def to_frame(self) -> pd.DataFrame:
+        """Flush the arrays into a DataFrame, reusing the cached one if nothing changed"""
+        if self._frame is None:
+            self._frame = pd.DataFrame({
+                'timestamp': self.timestamps,
+                'model': np.array(self.models, dtype=object)[self.model_codes],
+                'tokens_used': self.tokens_used,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'cached_tokens': self.cached_tokens,
+                'latency_ms': self.latency_ms,
+                'cost': self.cost,
+                'success': self.success
+            }, columns=self.COLUMNS)
+        return self._frame
+
+    @staticmethod
+    def _minutes(timestamps: np.ndarray) -> np.ndarray:
+        """Whole minutes since the epoch"""
+        return timestamps.astype('datetime64[m]').astype(np.int64)
+
+    def _grow(self, capacity: int):
+        """Reallocate every column with a larger capacity"""
+        for attr in ('_timestamps', '_model_codes', '_tokens', '_prompt_tokens', '_completion_tokens',
+                     '_cached_tokens', '_latency', '_cost', '_success'):
+            old = getattr(self, attr)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, attr, new)
+        self._capacity = capacity
@@ -18,9 +18,10 @@ performance_tracker = PerformanceTracker(config)
 # Run evaluations
 deepeval_results = deepeval_tester.run_full_evaluation()
 custom_metrics_results = {
-    model_name: custom_metrics_tester.evaluate_model(model_name, model_config)
-    for model_name, model_config in config['models'].items()
+    metrics.name: metrics
+    for metrics in custom_metrics_tester.evaluate_models(config['models'])
 }
+custom_metrics_tester.close()
 
 # Combine results
 combined_results = {**deepeval_results, **custom_metrics_results}
@@ -0,0 +1,49 @@
+import unittest
+import json
+import os
+import tempfile
+from src.frameworks.benchmark_datasets import BenchmarkDataset
+
+class TestBenchmarkDataset(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        for shard in range(2):
+            with open(os.path.join(self.directory.name, f'shard_{shard}.jsonl'), 'w') as file:
+                for i in range(5):
+                    file.write(json.dumps({'question': f'q{shard}-{i}', 'answer': 'a'}) + '\n')
+        self.pattern = os.path.join(self.directory.name, '*.jsonl')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_streams_shards_in_chunks(self):
+        dataset = BenchmarkDataset('mmlu', pattern=self.pattern, chunk_size=4)
+        chunks = list(dataset.iter_chunks())
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        self.assertEqual(chunks[0][0]['question'], 'q0-0')
+        self.assertEqual(chunks[-1][-1]['question'], 'q1-4')
+
+    def test_loader_runs_only_on_first_use(self):
+        calls = []
+        dataset = BenchmarkDataset('custom', loader=lambda: calls.append(1) or [{'question': 'q'}])
+        self.assertEqual(calls, [])
+        self.assertEqual(list(dataset.iter_examples()), [{'question': 'q'}])
+        list(dataset.iter_examples())
+        self.assertEqual(calls, [1])
+
+    def test_fingerprint_tracks_shard_changes(self):
+        dataset = BenchmarkDataset('mmlu', pattern=self.pattern)
+        before = dataset.fingerprint()
+        with open(os.path.join(self.directory.name, 'shard_0.jsonl'), 'a') as file:
+            file.write(json.dumps({'question': 'new', 'answer': 'b'}) + '\n')
+        self.assertNotEqual(dataset.fingerprint(), before)
+
+    def test_fingerprint_hashes_loaded_records(self):
+        records = [{'question': 'q1', 'answer': 'a'}, {'question': 'q2', 'answer': 'b'}]
+        fingerprint = BenchmarkDataset('custom', loader=lambda: records).fingerprint()
+        self.assertEqual(BenchmarkDataset('custom', loader=lambda: [dict(record) for record in records]).fingerprint(),
+                         fingerprint)
+        self.assertNotEqual(BenchmarkDataset('custom', loader=lambda: records[:1]).fingerprint(), fingerprint)
+
+if __name__ == '__main__':
+    unittest.main()
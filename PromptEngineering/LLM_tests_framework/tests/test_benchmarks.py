@@ -0,0 +1,34 @@
+import unittest
+import numpy as np
+from benchmarks.run_benchmarks import BenchmarkResult, compare, run_benchmarks
+from benchmarks.synthetic import generate_usage, iter_requests
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generate_usage(self):
+        """Test that synthetic usage is sorted in time and stays under alert thresholds"""
+        usage = generate_usage(1000, 10)
+        self.assertEqual(len(usage['models']), 1000)
+        self.assertTrue(np.all(np.diff(usage['timestamps']) >= np.timedelta64(0)))
+        self.assertLess(usage['cost'].mean(), 1.0)
+        request = next(iter_requests(usage))
+        self.assertEqual(set(request), {'model', 'tokens', 'latency', 'success', 'timestamp'})
+
+    def test_run_smallest_scale(self):
+        """Test that every hot path runs at the smallest scale"""
+        results = run_benchmarks(max_requests=1000, max_models=10, repeat=1)
+        names = {result.name.split('[')[0] for result in results}
+        self.assertEqual(names, {'track_request', 'analyze_costs', 'recompute_costs', 'check_thresholds',
+                                 'calculate_model_score', 'score_models', 'detect_significant_changes'})
+        self.assertTrue(all(result.seconds > 0 for result in results))
+
+    def test_compare_flags_regressions(self):
+        """Test that only results beyond the tolerances are flagged"""
+        baseline = {'fast': {'seconds': 1.0, 'peak_mb': 10.0}, 'slow': {'seconds': 1.0, 'peak_mb': 10.0}}
+        results = [BenchmarkResult('fast', 1.1, 10.5), BenchmarkResult('slow', 2.0, 20.0),
+                   BenchmarkResult('new', 5.0, 50.0)]
+        regressions = compare(results, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(regression.startswith('slow') for regression in regressions))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import asyncio
+import numpy as np
+from src.frameworks.combination_search import SearchBudget, SuccessiveHalving
+from src.frameworks.integration_tracker import IntegrationTracker, TestConfig as TrackerConfig
+from src.frameworks.mock_provider import MockProvider, MockProviderSettings
+
+class TestSuccessiveHalving(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.true_means = np.linspace(0.2, 0.9, 32)
+        # Fixed noise per (arm, sample) so repeated evaluations are reproducible
+        self.noise = rng.normal(0, 0.05, size=(32, 64))
+        self.samples = list(range(64))
+
+    def evaluate(self, arm, sample):
+        return self.true_means[arm] + self.noise[arm, sample], 100
+
+    def test_finds_best_arm_within_call_budget(self):
+        """Test that the best arm wins using far fewer calls than the full cross product"""
+        search = SuccessiveHalving(SearchBudget(max_calls=400))
+        result = search.search(list(range(32)), self.samples, self.evaluate)
+        self.assertEqual(result.best, 31)
+        self.assertLessEqual(result.calls, 400)
+        self.assertEqual(result.survivors_per_round, [32, 16, 8, 4, 2, 1])
+        # Weak arms are dropped after their first small sample
+        self.assertLess(result.samples_used[0], result.samples_used[31])
+
+    def test_token_budget(self):
+        """Test that the search stops once the token budget is spent"""
+        result = SuccessiveHalving(SearchBudget(max_tokens=1000)).search(
+            list(range(32)), self.samples, self.evaluate)
+        self.assertTrue(result.budget_exhausted)
+        self.assertEqual(result.tokens, 1000)
+        self.assertEqual(np.count_nonzero(result.samples_used), 10)
+        self.assertIn(result.best, range(10))
+
+    def test_no_samples(self):
+        """Test that arms are scored once each when there are no samples"""
+        calls = []
+
+        def evaluate(arm, sample):
+            calls.append((arm, sample))
+            return float(arm == 'b'), 0
+
+        result = SuccessiveHalving().search(['a', 'b', 'c'], [], evaluate)
+        self.assertEqual(result.best, 'b')
+        self.assertEqual(sorted(calls), [('a', None), ('b', None), ('c', None)])
+
+    def test_unscored_arms_are_dropped(self):
+        """Test that arms without a score are dropped instead of failing the search"""
+        def evaluate(arm, sample):
+            if arm == 'missing':
+                return None
+            return (None if arm == 'broken' else float(arm == 'b')), 10
+
+        result = SuccessiveHalving().search(['missing', 'a', 'broken', 'b'], [1, 2], evaluate)
+        self.assertEqual(result.best, 'b')
+        self.assertEqual(result.unscored, 2)
+        self.assertTrue(np.isnan(result.mean_scores[0]) and np.isnan(result.mean_scores[2]))
+
+        nothing = SuccessiveHalving().search(['missing'], [], evaluate)
+        self.assertIsNone(nothing.best)
+        self.assertEqual(nothing.unscored, 1)
+
+class TestTrackerCombinationSearch(unittest.TestCase):
+    def setUp(self):
+        # One provider replies with exactly the expected answer, the other adds a token
+        self.providers = [
+            MockProvider(MockProviderSettings(latency_ms=1, latency_sigma=0, tokens_per_response=tokens,
+                                              inter_token_ms=0)).start()
+            for tokens in (1, 2)
+        ]
+
+    def tearDown(self):
+        for provider in self.providers:
+            provider.stop()
+
+    def test_search_scores_combinations_against_scenarios(self):
+        """Test that the tracker's own scorer runs each combination on the scenarios through its model"""
+        exact, verbose = self.providers
+        config = TrackerConfig(
+            model_configs={'verbose': {'model': 'mock', 'connection_url': verbose.connection_url('mock')},
+                           'exact': {'model': 'mock', 'connection_url': exact.connection_url('mock')}},
+            rag_configs={},
+            prompt_templates={'plain': 'Answer in one word: {input}'},
+            test_scenarios=[{'name': f'scenario_{i}', 'input': f'question {i}', 'expected_output': 'token0'}
+                            for i in range(4)]
+        )
+        tracker = IntegrationTracker(config)
+        results = asyncio.run(tracker.run_comprehensive_tests())
+        self.assertEqual(results['summary']['best_performing_combination'],
+                         {'model': 'exact', 'rag': None, 'prompt_template': 'plain'})
+        self.assertEqual(tracker.last_search.mean_scores.tolist(), [0.0, 1.0])
+        self.assertGreater(tracker.last_search.tokens, 0)
+        self.assertEqual(exact.stats['requests'] + verbose.stats['requests'], tracker.last_search.calls)
+
+    def test_search_without_scores_recommends_nothing(self):
+        """Test that unscored components leave no best combination instead of raising"""
+        tracker = IntegrationTracker(TrackerConfig(model_configs={'offline': {}}, rag_configs={},
+                                                   prompt_templates={}, test_scenarios=[]))
+        results = asyncio.run(tracker.run_comprehensive_tests())
+        self.assertIsNone(results['summary']['best_performing_combination'])
+        self.assertEqual(tracker.last_search.unscored, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import asyncio
+import threading
+import time
+from collections import Counter
+from src.frameworks.concurrency import AsyncProviderLimiter, ProviderScheduler, provider_key
+
+class TestProviderScheduler(unittest.TestCase):
+    def test_provider_key(self):
+        self.assertEqual(provider_key('https://api.openai.com/v1/models/gpt-4'), 'api.openai.com')
+        self.assertEqual(provider_key(None), 'default')
+
+    def test_run_respects_provider_limits(self):
+        """Test that units run concurrently but never exceed their provider cap"""
+        lock = threading.Lock()
+        active = Counter()
+        peak = Counter()
+
+        def work(unit):
+            provider, value = unit
+            with lock:
+                active[provider] += 1
+                peak[provider] = max(peak[provider], active[provider])
+            time.sleep(0.01)
+            with lock:
+                active[provider] -= 1
+            return value * 2
+
+        units = [('a', i) for i in range(6)] + [('b', i) for i in range(6)]
+        with ProviderScheduler(max_workers=8, provider_limits={'a': 1}, default_limit=3) as scheduler:
+            results = {unit: future.result() for unit, future in scheduler.run(work, units, lambda unit: unit[0])}
+
+        self.assertEqual(len(results), 12)
+        self.assertEqual(results[('b', 5)], 10)
+        self.assertEqual(peak['a'], 1)
+        self.assertGreater(peak['b'], 1)
+        self.assertLessEqual(peak['b'], 3)
+
+    def test_submit_shares_one_pool(self):
+        """Test that work submitted separately shares the global worker limit"""
+        lock = threading.Lock()
+        active = Counter()
+        peak = Counter()
+
+        def work(value):
+            with lock:
+                active['total'] += 1
+                peak['total'] = max(peak['total'], active['total'])
+            time.sleep(0.01)
+            with lock:
+                active['total'] -= 1
+            if value < 0:
+                raise ValueError('negative')
+            return value
+
+        with ProviderScheduler(max_workers=2) as scheduler:
+            futures = [scheduler.submit(provider, work, value)
+                       for provider in ('a', 'b', 'c') for value in range(3)]
+            failing = scheduler.submit('a', work, -1)
+            self.assertEqual(sum(future.result() for future in futures), 9)
+            with self.assertRaises(ValueError):
+                failing.result()
+        self.assertEqual(peak['total'], 2)
+
+    def test_shutdown_runs_work_queued_behind_caps(self):
+        """Test that shutdown waits for work held back by a provider cap instead of stranding it"""
+        scheduler = ProviderScheduler(max_workers=4, default_limit=1)
+        futures = [scheduler.submit('a', lambda value: time.sleep(0.01) or value, i) for i in range(5)]
+        scheduler.shutdown()
+        self.assertEqual([future.result(timeout=1) for future in futures], list(range(5)))
+        with self.assertRaises(RuntimeError):
+            scheduler.submit('a', lambda: None)
+
+    def test_shutdown_without_wait_cancels_queued_work(self):
+        scheduler = ProviderScheduler(max_workers=4, default_limit=1)
+        started = threading.Event()
+        release = threading.Event()
+        running = scheduler.submit('a', lambda: started.set() or release.wait(1))
+        queued = [scheduler.submit('a', lambda: 'late') for _ in range(3)]
+        started.wait(1)
+        scheduler.shutdown(wait=False)
+        release.set()
+        self.assertTrue(running.result(timeout=1))
+        self.assertTrue(all(future.cancelled() for future in queued))
+
+    def test_error_in_context_cancels_queued_work(self):
+        """Test that leaving the context on an exception does not run the queued work first"""
+        release = threading.Event()
+        with self.assertRaises(ValueError):
+            with ProviderScheduler(max_workers=4, default_limit=1) as scheduler:
+                running = scheduler.submit('a', lambda: release.wait(1))
+                queued = [scheduler.submit('a', lambda: 'late') for _ in range(3)]
+                raise ValueError('unit failed')
+        self.assertTrue(all(future.cancelled() for future in queued))
+        release.set()
+        self.assertTrue(running.result(timeout=1))
+
+class TestAsyncProviderLimiter(unittest.TestCase):
+    def test_limits_global_and_provider_concurrency(self):
+        active = Counter()
+        peak = Counter()
+
+        async def work(limiter, provider):
+            async with limiter.limit(provider):
+                active[provider] += 1
+                active['total'] += 1
+                peak[provider] = max(peak[provider], active[provider])
+                peak['total'] = max(peak['total'], active['total'])
+                await asyncio.sleep(0.01)
+                active[provider] -= 1
+                active['total'] -= 1
+
+        async def run():
+            limiter = AsyncProviderLimiter(max_concurrency=3, provider_limits={'a': 1})
+            await asyncio.gather(*[work(limiter, provider) for provider in 'aaabbbbb'])
+
+        asyncio.run(run())
+        self.assertEqual(peak['a'], 1)
+        self.assertEqual(peak['total'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+from src.frameworks.cost_forecast import HORIZONS, design_matrix, forecast_costs, weekday
+
+FIRST_DAY = 19723  # 2024-01-01, a Monday
+
+def seasonal_costs(n_days, n_models=3, noise=0.0, seed=0):
+    """Linear trend per model plus a weekend dip, optionally with noise"""
+    rng = np.random.default_rng(seed)
+    days = FIRST_DAY + np.arange(n_days)
+    t = np.arange(n_days)[:, None]
+    weekend = (weekday(days) >= 5)[:, None]
+    costs = 10.0 + 0.5 * t * np.arange(1, n_models + 1) - 4.0 * weekend
+    return costs + noise * rng.standard_normal(costs.shape)
+
+class TestCostForecast(unittest.TestCase):
+    def test_exact_fit_projects_trend_and_season(self):
+        """Test that a noiseless trend with weekly seasonality is projected exactly"""
+        forecast = forecast_costs(seasonal_costs(28), FIRST_DAY)
+        expected = seasonal_costs(58)[28:]
+        self.assertEqual(forecast.method, 'trend+weekly')
+        for i, days in enumerate(HORIZONS.values()):
+            np.testing.assert_allclose(forecast.point[i], expected[:days].sum(axis=0), rtol=1e-9)
+        np.testing.assert_allclose(forecast.lower, forecast.point, atol=1e-6)
+        np.testing.assert_allclose(forecast.upper, forecast.point, atol=1e-6)
+
+    def test_batched_bootstrap_matches_loop(self):
+        """Test that the batched bootstrap equals refitting each resample in a loop"""
+        costs = seasonal_costs(21, noise=2.0)
+        n_days, n_bootstrap, seed = len(costs), 50, 3
+        forecast = forecast_costs(costs, FIRST_DAY, n_bootstrap=n_bootstrap, confidence=0.8, seed=seed)
+
+        days = FIRST_DAY + np.arange(n_days)
+        X = design_matrix(days, FIRST_DAY, True, True)
+        beta = np.linalg.lstsq(X, costs, rcond=None)[0]
+        residuals = (costs - X @ beta) * np.sqrt(n_days / (n_days - X.shape[1]))
+        future = design_matrix(days[-1] + 1 + np.arange(30), FIRST_DAY, True, True)
+        rng = np.random.default_rng(seed)
+        fitted_draws = rng.integers(0, n_days, size=(n_bootstrap, n_days))
+        future_draws = rng.integers(0, n_days, size=(n_bootstrap, 30))
+        samples = []
+        for b in range(n_bootstrap):
+            refit = np.linalg.lstsq(X, X @ beta + residuals[fitted_draws[b]], rcond=None)[0]
+            daily = future @ refit + residuals[future_draws[b]]
+            samples.append([np.maximum(daily[:days].sum(axis=0), 0.0) for days in HORIZONS.values()])
+        samples = np.array(samples)
+        np.testing.assert_allclose(forecast.lower, np.percentile(samples, 10, axis=0), rtol=1e-8)
+        np.testing.assert_allclose(forecast.upper, np.percentile(samples, 90, axis=0), rtol=1e-8)
+        np.testing.assert_allclose(forecast.total_upper, np.percentile(samples.sum(axis=2), 90, axis=0), rtol=1e-8)
+
+    def test_short_history(self):
+        """Test falling back to simpler models with little history"""
+        self.assertEqual(forecast_costs(np.ones((2, 4)), FIRST_DAY).method, 'mean')
+        self.assertEqual(forecast_costs(np.ones((5, 4)), FIRST_DAY).method, 'trend')
+        empty = forecast_costs(np.zeros((0, 4)), FIRST_DAY)
+        self.assertEqual(empty.method, 'none')
+        self.assertEqual(empty.point.shape, (3, 4))
+
+    def test_forecasts_are_not_negative(self):
+        """Test that a falling trend is not projected below zero"""
+        costs = np.maximum(30.0 - 2.0 * np.arange(15), 0.0)[:, None]
+        forecast = forecast_costs(costs, FIRST_DAY)
+        self.assertTrue(np.all(forecast.point >= 0))
+        self.assertTrue(np.all(forecast.lower >= 0))
+
+if __name__ == '__main__':
+    unittest.main()
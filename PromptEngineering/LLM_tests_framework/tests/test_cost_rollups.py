@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.frameworks.cost_rollups import CostRollups
+
+def generate_requests(n=2000, days=10, seed=0):
+    """Requests in roughly increasing time order, with some arriving up to a day late"""
+    rng = np.random.default_rng(seed)
+    minutes = np.sort(rng.integers(0, days * 1440, size=n)) + 28_000_000
+    late = rng.random(n) < 0.1
+    minutes[late] -= rng.integers(0, 1440, size=late.sum())
+    return rng.integers(0, 5, size=n), minutes, rng.uniform(0.0, 2.0, size=n)
+
+def expected(codes, minutes, cost, freq):
+    frame = pd.DataFrame({'timestamp': (minutes * 60 * 10**9).astype('datetime64[ns]'), 'cost': cost})
+    return frame.groupby(pd.Grouper(key='timestamp', freq=freq))['cost'].sum()
+
+class TestCostRollups(unittest.TestCase):
+    def setUp(self):
+        self.codes, self.minutes, self.cost = generate_requests()
+
+    def assert_matches(self, rollups, freq):
+        rollup = rollups.query(freq, 5)
+        want = expected(self.codes, self.minutes, self.cost, freq)
+        self.assertTrue(rollup.periods.index.equals(want.index))
+        np.testing.assert_allclose(rollup.periods['cost'].to_numpy(), want.to_numpy())
+        np.testing.assert_allclose(rollup.model_costs, np.bincount(self.codes, weights=self.cost, minlength=5))
+        self.assertEqual(rollup.periods['requests'].sum(), len(self.minutes))
+
+    def test_incremental_adds_match_raw_grouping(self):
+        """Test that rollups built one request at a time match grouping the raw requests"""
+        rollups = CostRollups(minute_retention=20 * 1440, hour_retention=20 * 24)
+        for code, minute, cost in zip(self.codes.tolist(), self.minutes.tolist(), self.cost.tolist()):
+            rollups.add(code, minute, cost)
+        for freq in ['min', '15min', 'h', '6h', 'D', 'W', 'MS']:
+            self.assert_matches(rollups, freq)
+
+    def test_bulk_and_incremental_agree(self):
+        """Test that bulk adds route requests like single adds"""
+        rollups = CostRollups(minute_retention=60, hour_retention=48)
+        half = len(self.minutes) // 2
+        rollups.add_many(self.codes[:half], self.minutes[:half], self.cost[:half])
+        for code, minute, cost in zip(self.codes[half:].tolist(), self.minutes[half:].tolist(),
+                                      self.cost[half:].tolist()):
+            rollups.add(code, minute, cost)
+        self.assert_matches(rollups, 'D')
+        self.assert_matches(rollups, 'W')
+
+    def test_retention_compacts_fine_buckets(self):
+        """Test that finer buckets are dropped after their retention while day totals stay complete"""
+        rollups = CostRollups(minute_retention=60, hour_retention=24)
+        rollups.add_many(self.codes, self.minutes, self.cost)
+        self.assertLessEqual(len(rollups.minutes), 120)
+        self.assertLessEqual(len(rollups.hours), 48)
+        self.assert_matches(rollups, 'D')
+        newest = self.minutes.max()
+        recent = self.minutes >= newest - newest % 60 - 60
+        minute_view = rollups.query('min', 5).periods
+        self.assertAlmostEqual(minute_view['cost'].sum(), self.cost[recent].sum())
+
+    def test_level_for(self):
+        """Test picking the coarsest level that can express a frequency"""
+        self.assertEqual(CostRollups.level_for('15min'), 'minute')
+        self.assertEqual(CostRollups.level_for('h'), 'hour')
+        self.assertEqual(CostRollups.level_for('D'), 'day')
+        self.assertEqual(CostRollups.level_for('MS'), 'day')
+        with self.assertRaises(ValueError):
+            CostRollups.level_for('30s')
+
+    def test_empty(self):
+        """Test querying before any request"""
+        rollup = CostRollups().query('D', 0)
+        self.assertTrue(rollup.periods.empty)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import json
+import os
+import tempfile
+import time
+from src.frameworks.custom_metrics import CustomMetrics, is_correct
+from src.frameworks.mock_provider import MockProvider, MockProviderSettings
+
+class TestDatasetScoring(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pattern = os.path.join(self.directory.name, 'mmlu_*.jsonl')
+        with open(os.path.join(self.directory.name, 'mmlu_0.jsonl'), 'w') as file:
+            for question, answer in [('q1', 'Token0 token1 TOKEN2.'), ('q2', 'token1'), ('q3', 'paris'), ('q4', None)]:
+                file.write(json.dumps({'question': question, 'answer': answer}) + '\n')
+        self.provider = MockProvider(MockProviderSettings(latency_ms=1, latency_sigma=0, tokens_per_response=3,
+                                                          inter_token_ms=0)).start()
+
+    def tearDown(self):
+        self.provider.stop()
+        self.directory.cleanup()
+
+    def _metrics(self, models, **settings):
+        config_path = os.path.join(self.directory.name, 'config.json')
+        with open(config_path, 'w') as file:
+            json.dump({'models': models, 'benchmarks': {'mmlu': {'path': self.pattern}}, **settings}, file)
+        return CustomMetrics(config_path)
+
+    def test_accuracy_over_streamed_chunks(self):
+        """Test that only replies equal to the answer count as correct and unanswered examples are skipped"""
+        metrics = self._metrics({'mock': {'model': 'mock', 'connection_url': self.provider.connection_url('mock')}})
+        dataset = metrics.benchmark_datasets['mmlu']
+        dataset.chunk_size = 2
+        self.assertAlmostEqual(metrics._score_examples('mock', list(dataset.iter_examples())), 1 / 3)
+        self.assertIsNotNone(metrics._evaluate_on_dataset('mock', dataset))
+        metrics.close()
+
+    def test_worker_processes_score_and_parent_caches(self):
+        """Test that scores computed on worker processes are cached by the parent and reused"""
+        models = {'mock': {'model': 'mock', 'connection_url': self.provider.connection_url('mock'),
+                           'max_context_length': 4096, 'features': [], 'license': 'mit', 'hosting': []}}
+        settings = {'processes': 1, 'result_cache': {'path': 'cache.sqlite'}}
+        for _ in range(2):
+            metrics = self._metrics(models, **settings)
+            try:
+                scores = metrics.evaluate_model('mock', models['mock']).performance_scores
+            finally:
+                metrics.close()
+            self.assertAlmostEqual(scores['mmlu'], 1 / 3)
+        self.assertEqual(self.provider.stats['requests'], 3)
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, 'cache.sqlite')))
+
+    def test_chunk_requests_run_concurrently(self):
+        """Test that a chunk's examples are sent at once rather than one after another"""
+        self.provider.settings.latency_ms = 200
+        metrics = self._metrics({'mock': {'model': 'mock', 'connection_url': self.provider.connection_url('mock')}})
+        examples = list(metrics.benchmark_datasets['mmlu'].iter_examples())
+        started = time.perf_counter()
+        metrics._score_examples('mock', examples)
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(self.provider.stats['requests'], 3)
+        metrics.close()
+
+    def test_multiple_choice_answers_match_the_chosen_option(self):
+        """Test that a single-letter answer must be the option the reply picks"""
+        self.assertTrue(is_correct('The answer is (B).', 'B'))
+        self.assertTrue(is_correct('b) Paris', 'B'))
+        self.assertFalse(is_correct('Berlin is not the capital; the answer is C.', 'B'))
+        self.assertFalse(is_correct('A reasonable guess', 'A'))
+        self.assertTrue(is_correct('  Paris. ', 'paris'))
+        self.assertFalse(is_correct('Paris, France', 'paris'))
+
+    def test_unreachable_models_are_unscored(self):
+        metrics = self._metrics({'offline': {'model': 'offline'}})
+        self.assertIsNone(metrics._evaluate_on_dataset('offline', metrics.benchmark_datasets['mmlu']))
+        self.assertIsNone(metrics._evaluate_on_dataset('offline', metrics.benchmark_datasets['hellaswag']))
+        metrics.close()
+
+if __name__ == '__main__':
+    unittest.main()
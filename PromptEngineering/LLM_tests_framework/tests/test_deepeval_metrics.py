@@ -14,6 +14,11 @@ class TestDeepEvalMetrics(unittest.TestCase):
         self.assertIn('hallucination', self.framework.metrics)
         self.assertIn('relevancy', self.framework.metrics)
 
+    def test_units_get_fresh_metric_instances(self):
+        metric = self.framework._create_metric('bias')
+        self.assertIs(type(metric), type(self.framework.metrics['bias']))
+        self.assertIsNot(metric, self.framework.metrics['bias'])
+
     def test_run_full_evaluation(self):
         results = self.framework.run_full_evaluation()
         self.assertIsInstance(results, dict)
@@ -0,0 +1,70 @@
+import unittest
+import os
+import tempfile
+from datetime import datetime, timedelta
+from src.frameworks.history_store import HistoryStore
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'history.sqlite')
+        self.start = datetime(2024, 1, 1)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _fill(self, store, runs):
+        for i in range(runs):
+            store.append({
+                'timestamp': self.start + timedelta(hours=i),
+                'results': {
+                    'gpt-4': {'hallucination': 0.1 * i, 'relevancy': 0.5},
+                    'claude': {'hallucination': 0.2, 'relevancy': 0.6}
+                }
+            })
+
+    def test_tail_is_bounded(self):
+        store = HistoryStore(self.path, tail_size=2)
+        self._fill(store, 5)
+        self.assertEqual(len(store), 5)
+        self.assertEqual(len(store._tail), 2)
+        self.assertEqual(store.latest(0), [])
+        latest = store.latest(3)
+        self.assertEqual([entry['timestamp'].hour for entry in latest], [2, 3, 4])
+        self.assertAlmostEqual(latest[-1]['results']['gpt-4']['hallucination'], 0.4)
+        store.close()
+
+    def test_query_by_time_model_and_metric(self):
+        store = HistoryStore(self.path)
+        self._fill(store, 5)
+        rows = list(store.query(start=self.start + timedelta(hours=3), models=['gpt-4'], metrics=['hallucination']))
+        self.assertEqual([round(score, 2) for _, _, _, score in rows], [0.3, 0.4])
+        rows = list(store.query(models=['claude'], metrics=['relevancy'], with_run_id=True))
+        self.assertEqual([run_id for run_id, _, _, _, _ in rows], [1, 2, 3, 4, 5])
+        store.close()
+
+    def test_history_survives_restart(self):
+        store = HistoryStore(self.path)
+        self._fill(store, 3)
+        store.close()
+        reopened = HistoryStore(self.path)
+        self.assertEqual(len(reopened), 3)
+        self.assertEqual(reopened.latest(1)[0]['results']['claude']['relevancy'], 0.6)
+        reopened.close()
+
+    def test_run_lookups_use_an_index(self):
+        store = HistoryStore(self.path)
+        plan = store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT run_id FROM scores WHERE run_id >= ?", (1,)
+        ).fetchall()
+        self.assertIn('scores_run', ' '.join(str(row) for row in plan))
+        store.close()
+
+    def test_from_config_resolves_against_base_dir(self):
+        store = HistoryStore.from_config({'history_store': {'path': 'history.sqlite'}}, self.directory.name)
+        self.assertEqual(store.path, self.path)
+        store.close()
+        self.assertEqual(HistoryStore.from_config({}, self.directory.name).path, ':memory:')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import asyncio
+import time
+from src.frameworks.integration_tracker import IntegrationTracker, TestConfig as TrackerConfig
+
+class SlowTracker(IntegrationTracker):
+    """Tracker whose evaluations sleep, so concurrency can be observed"""
+    def __init__(self, config: TrackerConfig):
+        super().__init__(config)
+        self.in_flight = {}
+        self.peak = {}
+
+    async def _evaluate_model(self, model_name, model_config):
+        host = model_config['connection_url']
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        self.peak[host] = max(self.peak.get(host, 0), self.in_flight[host])
+        try:
+            await asyncio.sleep(model_config.get('delay', 0.05))
+        finally:
+            self.in_flight[host] -= 1
+        return 1.0
+
+    async def _evaluate_scenario(self, scenario):
+        raise ValueError('scenario failed')
+
+    def _score_combination(self, combination):
+        return 0.0
+
+    def _score_combination_on_scenario(self, combination, scenario):
+        return 0.0, 0
+
+class TestIntegrationFanOut(unittest.TestCase):
+    def setUp(self):
+        model_configs = {
+            f'model_{i}': {'connection_url': f'https://provider{i % 2}.example/v1'} for i in range(8)
+        }
+        model_configs['slow_model'] = {'connection_url': 'https://slow.example/v1', 'delay': 10}
+        self.config = TrackerConfig(
+            model_configs=model_configs,
+            rag_configs={},
+            prompt_templates={},
+            test_scenarios=[{'name': 'broken'}],
+            max_concurrency=8,
+            provider_concurrency={'provider0.example': 2},
+            item_timeout_seconds=0.5
+        )
+
+    def test_items_run_concurrently_under_limits(self):
+        """Test that items fan out, respect provider caps, and that failures and timeouts stay isolated"""
+        tracker = SlowTracker(self.config)
+        streamed = []
+        started = time.perf_counter()
+        results = asyncio.run(tracker.run_comprehensive_tests(on_result=streamed.append))
+        self.assertLess(time.perf_counter() - started, 2)
+        self.assertEqual(tracker.peak['https://provider0.example/v1'], 2)
+        self.assertEqual(tracker.peak['https://provider1.example/v1'], 4)
+        self.assertEqual(list(results['base_models']), list(self.config.model_configs))
+        self.assertIsNone(results['base_models']['slow_model'])
+        self.assertIn('timed out', results['errors']['base_models']['slow_model'])
+        self.assertEqual(results['errors']['integration_scenarios'], {'broken': 'scenario failed'})
+        # Partial results arrive in completion order, the timed-out item last
+        self.assertEqual(len(streamed), 10)
+        self.assertEqual(streamed[-1].name, 'slow_model')
+
+    def test_stopping_early_waits_for_cancelled_items(self):
+        """Test that closing the result stream cancels the items still running and waits for them"""
+        tracker = SlowTracker(self.config)
+
+        async def first_result():
+            results = tracker.iter_test_results()
+            first = await results.__anext__()
+            await results.aclose()
+            return first, sum(tracker.in_flight.values())
+
+        first, still_running = asyncio.run(first_result())
+        self.assertIsNotNone(first)
+        self.assertEqual(still_running, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import threading
+import time
+import numpy as np
+from src.frameworks.concurrency import ProviderScheduler
+from src.frameworks.latency_profiler import LatencyHistogram, LatencyProfiler
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_relative_accuracy(self):
+        values = np.random.default_rng(0).lognormal(mean=5, sigma=1, size=20000)
+        histogram = LatencyHistogram(relative_accuracy=0.01)
+        histogram.record_many(values)
+        for percentile in (50, 90, 99, 99.9):
+            expected = np.percentile(values, percentile, method='inverted_cdf')
+            self.assertAlmostEqual(histogram.percentile(percentile) / expected, 1.0, delta=0.011)
+        self.assertAlmostEqual(histogram.mean, values.mean())
+
+    def test_merge(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record_many([10, 20])
+        second.record_many([30, 4000])
+        first.merge(second)
+        self.assertEqual(first.count, 4)
+        self.assertAlmostEqual(first.percentile(100), 4000)
+
+class TestLatencyProfiler(unittest.TestCase):
+    def test_profile_streaming_requests(self):
+        def request():
+            time.sleep(0.005)
+            for token in ['a', 'b', 'c']:
+                time.sleep(0.002)
+                yield token
+
+        profiler = LatencyProfiler(warmup_requests=1, requests_per_level=4, concurrency_levels=(2, 1))
+        profile = profiler.profile(request)
+        self.assertEqual(sorted(profile.by_concurrency), [1, 2])
+        self.assertGreaterEqual(profile.latency_ms['p50'], 10)
+        self.assertGreaterEqual(profile.time_to_first_token_ms['p50'], 6)
+        self.assertLess(profile.time_to_first_token_ms['p50'], profile.latency_ms['p50'])
+        self.assertGreaterEqual(profile.inter_token_ms['p50'], 1.5)
+        self.assertGreater(profile.tokens_per_second, 0)
+        self.assertEqual(profile.percentile('mean'), profile.mean_ms)
+        with self.assertRaises(ValueError):
+            profile.percentile('p42')
+
+    def test_probes_stay_within_provider_caps(self):
+        """Test that probe requests submitted to a scheduler never exceed the provider cap"""
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def request():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.005)
+            with lock:
+                active[0] -= 1
+            return ['token']
+
+        profiler = LatencyProfiler(warmup_requests=1, requests_per_level=8, concurrency_levels=(1, 4, 16))
+        with ProviderScheduler(max_workers=8, provider_limits={'api': 2}) as scheduler:
+            profile = profiler.profile(request, max_concurrency=scheduler.limit_for('api'),
+                                       submit=lambda fn: scheduler.submit('api', fn))
+        self.assertEqual(sorted(profile.by_concurrency), [1, 2])
+        self.assertEqual(peak[0], 2)
+
+    def test_needs_a_concurrency_level(self):
+        with self.assertRaises(ValueError):
+            LatencyProfiler(concurrency_levels=())
+
+if __name__ == '__main__':
+    unittest.main()
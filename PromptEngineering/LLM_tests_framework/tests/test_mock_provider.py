@@ -0,0 +1,51 @@
+import unittest
+import asyncio
+from src.frameworks.mock_provider import MockProvider, MockProviderSettings
+from src.frameworks.provider_client import ProviderError, RateLimitError, astream_completion, stream_completion
+from src.frameworks.load_driver import run_load_test
+
+class TestMockProvider(unittest.TestCase):
+    def test_sync_streaming_and_plain_responses(self):
+        settings = MockProviderSettings(latency_ms=1, latency_sigma=0, tokens_per_response=3, inter_token_ms=0)
+        with MockProvider(settings) as provider:
+            url = provider.connection_url('gpt-4')
+            self.assertEqual(list(stream_completion(url, 'gpt-4', 'hi')), ['token0 ', 'token1 ', 'token2 '])
+            self.assertEqual(list(stream_completion(url, 'gpt-4', 'hi', stream=False)), ['token0 token1 token2 '])
+
+    def test_errors_and_rate_limits(self):
+        with MockProvider(MockProviderSettings(latency_ms=1, error_rate=1.0)) as provider:
+            with self.assertRaises(ProviderError):
+                list(stream_completion(provider.connection_url('gpt-4'), 'gpt-4', 'hi'))
+        with MockProvider(MockProviderSettings(latency_ms=1, rate_limit_per_second=1)) as provider:
+            url = provider.connection_url('gpt-4')
+            list(stream_completion(url, 'gpt-4', 'hi'))
+            with self.assertRaises(RateLimitError):
+                list(stream_completion(url, 'gpt-4', 'hi'))
+
+    def test_async_client(self):
+        settings = MockProviderSettings(latency_ms=1, latency_sigma=0, tokens_per_response=2, inter_token_ms=0)
+
+        async def collect(url):
+            return [token async for token in astream_completion(url, 'gpt-4', 'hi')]
+
+        with MockProvider(settings) as provider:
+            self.assertEqual(asyncio.run(collect(provider.connection_url('gpt-4'))), ['token0 ', 'token1 '])
+
+    def test_patch_config(self):
+        with MockProvider() as provider:
+            config = provider.patch_config({'models': {'gpt-4': {'model': 'gpt-4', 'connection_url': 'https://x'}}})
+        self.assertTrue(config['models']['gpt-4']['connection_url'].startswith('http://127.0.0.1:'))
+
+class TestLoadTest(unittest.TestCase):
+    def test_run_load_test(self):
+        settings = MockProviderSettings(latency_ms=2, tokens_per_response=5, inter_token_ms=0, error_rate=0.1, seed=1)
+        with MockProvider(settings) as provider:
+            result = asyncio.run(run_load_test(provider.connection_url('mock'), total_requests=200, concurrency=50))
+        self.assertEqual(result.requests, 200)
+        self.assertEqual(result.succeeded + result.failed + result.rate_limited, 200)
+        self.assertGreater(result.failed, 0)
+        self.assertGreater(result.requests_per_second, 0)
+        self.assertIn('p99', result.tracking_overhead_ms)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import json
+import os
+import tempfile
+import numpy as np
+from src.frameworks.custom_metrics import CustomMetrics, ModelMetrics
+from src.frameworks.model_scoring import best_candidates, pack_candidates, pareto_front, score_candidates
+
+def make_metrics(name, accuracy, cost, latency, features=1):
+    return ModelMetrics(
+        name=name,
+        performance_scores={'mmlu': accuracy, 'hellaswag': accuracy},
+        cost_per_1k_tokens=cost,
+        avg_latency_ms=latency,
+        max_context_length=2048,
+        supported_features=['feature'] * features,
+        license_type='open',
+        hosting_options=['cloud']
+    )
+
+class TestModelScoring(unittest.TestCase):
+    def setUp(self):
+        self.metrics = [
+            make_metrics('cheap', 0.6, 0.5, 300),
+            make_metrics('fast', 0.7, 5.0, 50),
+            make_metrics('accurate', 0.9, 10.0, 400),
+            make_metrics('dominated', 0.6, 6.0, 500)
+        ]
+        self.candidates = pack_candidates(self.metrics)
+
+    def test_score_matches_weighted_sum(self):
+        """Test that each weighting's scores equal the per-model weighted sum"""
+        weightings = {
+            'default': {'performance': 0.6, 'cost': 0.2, 'latency': 0.1, 'features': 0.1},
+            'cost_only': {'cost': 1.0}
+        }
+        scores = score_candidates(self.candidates, weightings)
+        self.assertEqual(scores.shape, (2, 4))
+        for i, metrics in enumerate(self.metrics):
+            expected = (0.6 * np.mean(list(metrics.performance_scores.values()))
+                        + 0.2 / metrics.cost_per_1k_tokens + 0.1 / metrics.avg_latency_ms
+                        + 0.1 * len(metrics.supported_features))
+            self.assertAlmostEqual(scores[0, i], expected)
+        self.assertEqual(self.candidates.names[scores[1].argmax()], 'cheap')
+
+    def test_pareto_front(self):
+        """Test that only the dominated candidate is excluded"""
+        front = pareto_front(self.candidates)
+        self.assertEqual([name for name, keep in zip(self.candidates.names, front) if keep],
+                         ['cheap', 'fast', 'accurate'])
+
+    def test_pareto_front_duplicates_and_missing(self):
+        """Test that identical candidates both stay on the front and unscored ones never do"""
+        metrics = [make_metrics('a', 0.8, 1.0, 100), make_metrics('b', 0.8, 1.0, 100)]
+        metrics.append(ModelMetrics('unscored', {}, 0.1, 10, 2048, [], 'open', []))
+        self.assertEqual(pareto_front(pack_candidates(metrics)).tolist(), [True, True, False])
+
+    def test_unscored_candidates_are_never_best(self):
+        """Test that a candidate without benchmark accuracy cannot win over scored ones"""
+        unscored = ModelMetrics('unscored', {'mmlu': None}, 0.01, 1, 2048, ['feature'] * 10, 'open', [])
+        candidates = pack_candidates(self.metrics + [unscored])
+        scores = score_candidates(candidates, {'default': {'performance': 0.6, 'cost': 0.2, 'latency': 0.1,
+                                                           'features': 0.1}})
+        self.assertTrue(np.isnan(scores[0, -1]))
+        self.assertEqual(candidates.names[best_candidates(scores)[0]], 'cheap')
+        self.assertEqual(best_candidates(np.full((2, 3), np.nan)).tolist(), [-1, -1])
+
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = os.path.join(directory, 'config.json')
+            with open(config_path, 'w') as file:
+                json.dump({'models': {}}, file)
+            framework = CustomMetrics(config_path)
+            framework.models = {metrics.name: metrics for metrics in self.metrics + [unscored]}
+            recommendation = framework.generate_recommendation()
+            self.assertEqual(recommendation['recommended_model'], 'cheap')
+            framework.models = {'unscored': unscored}
+            with self.assertRaises(ValueError):
+                framework.generate_recommendation()
+            framework.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 from src.frameworks.performance_tracker import PerformanceTracker
-from datetime import datetime
+from src.frameworks.pricing import ModelPrice, PriceTable
+from datetime import datetime, timedelta
+import pandas as pd
 
 class TestPerformanceTracker(unittest.TestCase):
     def setUp(self):
@@ -18,6 +20,38 @@ class TestPerformanceTracker(unittest.TestCase):
         self.assertEqual(len(self.framework.usage_data), 1)
         self.assertEqual(self.framework.usage_data.iloc[0]['model'], 'test_model')
 
+    def test_track_request_prices_token_split(self):
+        """Test that prompt and completion tokens are priced with the model's prices"""
+        tracker = PerformanceTracker({'pricing': {'models': {
+            'test_model': {'prompt_per_1k': 1.0, 'completion_per_1k': 2.0}
+        }}})
+        tracker.track_request({'model': 'test_model', 'prompt_tokens': 1000, 'completion_tokens': 500,
+                               'latency': 200, 'success': True})
+        tracker.track_request({'model': 'test_model', 'prompt': 'Hello there', 'response': 'Hi',
+                               'latency': 200, 'success': True})
+        self.assertAlmostEqual(tracker.usage_store.cost[0], 2.0)
+        self.assertGreater(tracker.usage_store.tokens_used[1], 0)
+
+    def test_token_total_is_split_without_going_negative(self):
+        """Test that a 'tokens' total is kept when the response text counts as more tokens"""
+        tracker = PerformanceTracker()
+        tracker.track_request({'model': 'test_model', 'tokens': 10, 'response': 'word ' * 100,
+                               'latency': 200, 'success': True})
+        tracker.track_request({'model': 'test_model', 'tokens': 100, 'prompt_tokens': 80,
+                               'latency': 200, 'success': True})
+        self.assertEqual(tracker._token_counts({'tokens': 10, 'response': 'word ' * 100}), (0, 10, 0))
+        self.assertEqual(list(tracker.usage_store.prompt_tokens), [0, 80])
+        self.assertEqual(list(tracker.usage_store.completion_tokens), [10, 20])
+        self.assertEqual(list(tracker.usage_store.tokens_used), [10, 100])
+
+    def test_recompute_costs(self):
+        """Test repricing tracked requests after a price change"""
+        for _ in range(3):
+            self.framework.track_request({'model': 'test_model', 'tokens': 100, 'latency': 200, 'success': True})
+        self.assertAlmostEqual(self.framework.analyze_costs('day')['total_cost'].sum(), 3.0)
+        self.framework.recompute_costs(PriceTable({'test_model': ModelPrice(1.0, 1.0)}))
+        self.assertAlmostEqual(self.framework.analyze_costs('day')['total_cost'].sum(), 0.3)
+
     def test_analyze_costs(self):
         """Test analyzing costs over a given period"""
         # Add some dummy data
@@ -34,6 +68,44 @@ class TestPerformanceTracker(unittest.TestCase):
         self.assertIn('cost_trends', costs)
         self.assertIn('cost_projections', costs)
 
+    def test_analyze_costs_matches_raw_requests(self):
+        """Test that rollup-based cost analysis matches grouping the tracked requests"""
+        for i in range(50):
+            self.framework.track_request({
+                'model': f'model_{i % 3}',
+                'tokens': 10 + i,
+                'latency': 200,
+                'success': True,
+                'timestamp': datetime(2024, 1, 1) + timedelta(hours=7 * i)
+            })
+        costs = self.framework.analyze_costs('day')
+        grouped = self.framework.usage_data.groupby(pd.Grouper(key='timestamp', freq='D'))['cost']
+        pd.testing.assert_series_equal(costs['total_cost'], grouped.sum(), check_dtype=False)
+        self.assertEqual(costs['cost_trends'].keys(), grouped.mean().to_dict().keys())
+        by_model = self.framework.usage_data.groupby('model')['cost'].sum().to_dict()
+        self.assertEqual(costs['cost_by_model'].keys(), by_model.keys())
+        for model, cost in by_model.items():
+            self.assertAlmostEqual(costs['cost_by_model'][model], cost)
+
+    def test_cost_projections(self):
+        """Test that projections follow a steady daily cost, with intervals around them"""
+        for day in range(21):
+            for model in ['model_a', 'model_b']:
+                self.framework.track_request({
+                    'model': model,
+                    'tokens': 100 + day % 3,
+                    'latency': 200,
+                    'success': True,
+                    'timestamp': datetime(2024, 1, 1, 12) + timedelta(days=day)
+                })
+        projections = self.framework.analyze_costs('week')['cost_projections']
+        self.assertEqual(projections['method'], 'trend+weekly')
+        self.assertAlmostEqual(projections['next_week'], 7 * 2 * 1.01, delta=0.5)
+        interval = projections['confidence_intervals']['next_month']
+        self.assertLessEqual(interval['lower'], projections['next_month'])
+        self.assertGreaterEqual(interval['upper'], projections['next_month'])
+        self.assertEqual(set(projections['by_model']), {'model_a', 'model_b'})
+
     def test_optimize_resource_allocation(self):
         """Test optimizing resource allocation"""
         # Add some dummy data
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+import numpy as np
+from src.frameworks import pricing
+from src.frameworks.pricing import DEFAULT_PRICE, ModelPrice, PriceTable, PriceTier, TokenCounter
+
+class TestPriceTable(unittest.TestCase):
+    def setUp(self):
+        self.pricing = PriceTable.from_config({'pricing': {'models': {
+            'flat': {'prompt_per_1k': 1.0, 'completion_per_1k': 2.0, 'cached_discount': 0.5},
+            'tiered': {'prompt_per_1k': 1.0, 'completion_per_1k': 2.0,
+                       'tiers': [{'above_prompt_tokens': 1000, 'prompt_per_1k': 3.0, 'completion_per_1k': 4.0}]}
+        }}})
+
+    def test_cost(self):
+        """Test pricing prompt, completion and cached tokens separately"""
+        self.assertAlmostEqual(self.pricing.cost('flat', 1000, 500), 2.0)
+        self.assertAlmostEqual(self.pricing.cost('flat', 1000, 500, cached_tokens=1000), 1.5)
+
+    def test_tiers(self):
+        """Test that tier prices apply only above the prompt threshold"""
+        self.assertAlmostEqual(self.pricing.cost('tiered', 1000, 1000), 3.0)
+        self.assertAlmostEqual(self.pricing.cost('tiered', 2000, 1000), 10.0)
+
+    def test_unknown_model_uses_default(self):
+        """Test that models without a price fall back to the default"""
+        self.assertIs(self.pricing.price_for('unknown'), DEFAULT_PRICE)
+        self.assertAlmostEqual(self.pricing.cost('unknown', 75, 25), 1.0)
+
+    def test_cost_arrays_matches_single_requests(self):
+        """Test that vectorized costs match pricing each request on its own"""
+        models = ['flat', 'tiered', 'unknown']
+        rng = np.random.default_rng(0)
+        codes = rng.integers(0, 3, size=200)
+        prompt = rng.integers(0, 3000, size=200)
+        completion = rng.integers(0, 500, size=200)
+        cached = prompt // 3
+        costs = self.pricing.cost_arrays(codes, models, prompt, completion, cached)
+        for i in range(200):
+            self.assertAlmostEqual(costs[i], self.pricing.cost(models[codes[i]], prompt[i], completion[i], cached[i]))
+
+    def test_price_per_1k(self):
+        """Test the blended price of 1k tokens"""
+        self.assertAlmostEqual(self.pricing.price_per_1k('flat'), 1.25)
+        self.assertAlmostEqual(PriceTable({'m': ModelPrice(1.0, 3.0, tiers=[PriceTier(10, 5.0, 5.0)])})
+                               .price_per_1k('m', completion_share=0.5), 2.0)
+
+class TestTokenCounter(unittest.TestCase):
+    def test_count_memoized(self):
+        """Test that counts are positive and repeated texts hit the cache"""
+        counter = TokenCounter()
+        self.assertGreater(counter.count('What is the capital of France?', 'gpt-4'), 0)
+        counter.count('What is the capital of France?', 'gpt-4')
+        self.assertEqual(counter.count.cache_info().hits, 1)
+        self.assertEqual(counter.count(''), 0)
+
+    def test_unavailable_encoding_falls_back_to_approximation(self):
+        """Test that an encoding that cannot be loaded (e.g. offline) does not fail counting"""
+        class OfflineTiktoken:
+            def encoding_for_model(self, model):
+                raise KeyError(model)
+
+            def get_encoding(self, name):
+                raise OSError('could not download encoding')
+
+        with mock.patch.object(pricing, 'tiktoken', OfflineTiktoken()):
+            self.assertEqual(TokenCounter().count('What is the capital of France?', 'gpt-4'), 9)
+
+if __name__ == '__main__':
+    unittest.main()
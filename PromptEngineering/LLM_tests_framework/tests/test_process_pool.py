@@ -0,0 +1,143 @@
+import unittest
+import os
+import signal
+import tempfile
+import time
+from src.frameworks.process_pool import ShardedProcessPool, WorkerCrashedError
+
+class Evaluator:
+    """Worker-side state; module level so spawned processes can import it"""
+
+    def __init__(self, offset=0):
+        if offset == 'fail':
+            raise ValueError('cannot load config')
+        if offset == 'exit':
+            os._exit(3)
+        self.offset = offset
+
+    def square(self, value):
+        return value * value + self.offset
+
+    def slow_pid(self, value):
+        time.sleep(0.02)
+        return value, os.getpid()
+
+    def interval(self, value):
+        start = time.monotonic()
+        time.sleep(0.05)
+        return start, time.monotonic()
+
+    def fail(self, value):
+        raise ValueError(f"bad unit {value}")
+
+    def crash_once(self, marker):
+        if not os.path.exists(marker):
+            open(marker, 'w').close()
+            os._exit(1)
+        return 'recovered'
+
+    def crash(self, value):
+        os._exit(1)
+
+    def pid(self):
+        return os.getpid()
+
+def peak_overlap(intervals):
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    active = peak = 0
+    for _, change in events:
+        active += change
+        peak = max(peak, active)
+    return peak
+
+class TestShardedProcessPool(unittest.TestCase):
+    def test_run_returns_every_result(self):
+        with ShardedProcessPool(Evaluator, (1,), processes=2, threads_per_process=2) as pool:
+            results = {unit: future.result() for unit, future in pool.run(
+                'square', range(20), lambda unit: (unit,), shard_of=lambda unit: unit % 3
+            )}
+        self.assertEqual(results, {unit: unit * unit + 1 for unit in range(20)})
+
+    def test_exceptions_reach_the_future(self):
+        with ShardedProcessPool(Evaluator, processes=1) as pool:
+            with self.assertRaisesRegex(ValueError, 'bad unit 3'):
+                pool.submit('fail', 3).result()
+            self.assertEqual(pool.submit('square', 4).result(), 16)
+
+    def test_idle_workers_steal_from_busy_shards(self):
+        """Test that units of a single shard still spread over every worker"""
+        with ShardedProcessPool(Evaluator, processes=2) as pool:
+            results = [future.result() for _, future in pool.run(
+                'slow_pid', range(40), lambda unit: (unit,), shard_of=lambda unit: 'one-model'
+            )]
+            stolen = pool.stats['stolen']
+        self.assertEqual(sorted(value for value, _ in results), list(range(40)))
+        self.assertEqual(len({pid for _, pid in results}), 2)
+        self.assertGreater(stolen, 0)
+
+    def test_crashed_worker_units_are_retried(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with ShardedProcessPool(Evaluator, processes=2) as pool:
+                result = pool.submit('crash_once', os.path.join(directory, 'crashed')).result()
+                self.assertEqual(pool.submit('square', 3).result(), 9)
+                stats = dict(pool.stats)
+        self.assertEqual(result, 'recovered')
+        self.assertEqual(stats['crashes'], 1)
+        self.assertEqual(stats['retried'], 1)
+
+    def test_units_fail_after_max_retries(self):
+        with ShardedProcessPool(Evaluator, processes=1, max_retries=1) as pool:
+            with self.assertRaises(WorkerCrashedError):
+                pool.submit('crash', 0).result()
+            self.assertEqual(pool.stats['crashes'], 2)
+            self.assertEqual(pool.submit('square', 5).result(), 25)
+
+    def test_factory_failure_reaches_the_futures(self):
+        """Test that units fail with the factory's exception and no worker is respawned"""
+        with ShardedProcessPool(Evaluator, ('fail',), processes=2) as pool:
+            futures = [pool.submit('square', unit) for unit in range(4)]
+            for future in futures:
+                with self.assertRaisesRegex(ValueError, 'cannot load config'):
+                    future.result(timeout=30)
+            with self.assertRaisesRegex(ValueError, 'cannot load config'):
+                pool.submit('square', 5).result(timeout=1)
+            time.sleep(0.3)
+            stats = dict(pool.stats)
+        self.assertEqual(stats['startup_failures'], 2)
+        self.assertNotIn('crashes', stats)
+
+    def test_worker_dying_during_startup_breaks_the_pool(self):
+        with ShardedProcessPool(Evaluator, ('exit',), processes=1) as pool:
+            with self.assertRaisesRegex(WorkerCrashedError, 'before its evaluator was built'):
+                pool.submit('square', 1).result(timeout=30)
+
+    def test_idle_worker_death_is_replaced_after_a_delay(self):
+        with ShardedProcessPool(Evaluator, processes=1) as pool:
+            first = pool.submit('pid').result()
+            os.kill(first, signal.SIGKILL)
+            time.sleep(0.05)
+            second = pool.submit('pid').result(timeout=30)
+            stats = dict(pool.stats)
+        self.assertNotEqual(first, second)
+        self.assertEqual(stats['crashes'], 1)
+        self.assertNotIn('retried', stats)
+
+    def test_provider_limits_apply_across_processes(self):
+        units = [('a', i) for i in range(6)] + [('b', i) for i in range(6)]
+        with ShardedProcessPool(Evaluator, processes=3, threads_per_process=2,
+                                provider_limits={'a': 1}) as pool:
+            intervals = {unit: future.result() for unit, future in pool.run(
+                'interval', units, lambda unit: (unit[1],), provider_of=lambda unit: unit[0]
+            )}
+        self.assertEqual(peak_overlap([span for unit, span in intervals.items() if unit[0] == 'a']), 1)
+        self.assertGreater(peak_overlap([span for unit, span in intervals.items() if unit[0] == 'b']), 1)
+
+    def test_submit_after_shutdown_fails(self):
+        pool = ShardedProcessPool(Evaluator, processes=1)
+        self.assertEqual(pool.submit('square', 2).result(), 4)
+        pool.shutdown()
+        with self.assertRaises(RuntimeError):
+            pool.submit('square', 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import os
+import tempfile
+import time
+from src.frameworks.result_cache import ResultCache
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'results.sqlite')
+        self.test_case = {
+            'input': 'What is the capital of France?',
+            'expected_output': 'Paris is the capital of France.',
+            'context': 'Paris is the capital and largest city of France.'
+        }
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit_and_miss_counters(self):
+        cache = ResultCache(self.path)
+        key = ResultCache.make_key('gpt-4', self.test_case, 'hallucination', 'v1')
+        self.assertIsNone(cache.get(key))
+        cache.set(key, 0.75)
+        self.assertEqual(cache.get(key), 0.75)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        cache.close()
+
+    def test_key_changes_with_metric_version(self):
+        first = ResultCache.make_key('gpt-4', self.test_case, 'hallucination', 'v1')
+        second = ResultCache.make_key('gpt-4', self.test_case, 'hallucination', 'v2')
+        self.assertNotEqual(first, second)
+
+    def test_persists_across_instances(self):
+        cache = ResultCache(self.path)
+        cache.set('key', {'score': 1.0})
+        cache.close()
+        reopened = ResultCache(self.path)
+        self.assertEqual(reopened.get('key'), {'score': 1.0})
+        reopened.close()
+
+    def test_lru_eviction(self):
+        cache = ResultCache(self.path, max_bytes=6)
+        cache.set('old', 1.5)
+        time.sleep(0.01)
+        cache.set('new', 2.5)
+        time.sleep(0.01)
+        cache.set('newest', 3.5)
+        self.assertIsNone(cache.get('old'))
+        self.assertEqual(cache.get('newest'), 3.5)
+        self.assertLessEqual(cache.stats()['bytes'], 6)
+        cache.close()
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(self.path, ttl_seconds=0)
+        cache.set('key', 1.0)
+        time.sleep(0.01)
+        self.assertIsNone(cache.get('key'))
+        cache.close()
+
+    def test_from_config_resolves_against_base_dir(self):
+        cache = ResultCache.from_config({'result_cache': {'path': '.cache/results.sqlite'}}, self.directory.name)
+        self.assertEqual(cache.path, os.path.join(self.directory.name, '.cache', 'results.sqlite'))
+        self.assertTrue(os.path.exists(cache.path))
+        cache.close()
+        self.assertIsNone(ResultCache.from_config({'result_cache': {'enabled': False}}))
+
+if __name__ == '__main__':
+    unittest.main()
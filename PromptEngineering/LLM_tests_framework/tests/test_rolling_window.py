@@ -0,0 +1,32 @@
+import unittest
+from datetime import datetime, timedelta
+from src.frameworks.rolling_window import RollingWindow
+
+class TestRollingWindow(unittest.TestCase):
+    def test_count_window(self):
+        """Test that only the most recent requests are aggregated"""
+        window = RollingWindow(max_requests=3)
+        for latency in [100, 200, 300, 400, 500]:
+            window.add(1.0, latency, True)
+        self.assertEqual(len(window), 3)
+        self.assertAlmostEqual(window.avg_latency, 400.0)
+        self.assertAlmostEqual(window.cost_rate, 1.0)
+
+    def test_time_window(self):
+        """Test that requests older than the window age are evicted"""
+        window = RollingWindow(max_requests=None, max_age_seconds=60)
+        start = datetime(2024, 1, 1)
+        window.add(1.0, 100, False, start)
+        window.add(1.0, 100, True, start + timedelta(seconds=30))
+        self.assertAlmostEqual(window.success_rate, 0.5)
+        window.add(1.0, 100, True, start + timedelta(seconds=90))
+        self.assertEqual(len(window), 2)
+        self.assertAlmostEqual(window.success_rate, 1.0)
+
+    def test_requires_a_bound(self):
+        """Test that an unbounded window is rejected"""
+        with self.assertRaises(ValueError):
+            RollingWindow(max_requests=None, max_age_seconds=None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import asyncio
+from src.frameworks.shared_judge import SharedJudge, share_judges
+
+class FakeJudge:
+    def __init__(self):
+        self.prompts = []
+
+    def get_model_name(self):
+        return 'judge'
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        return prompt.upper()
+
+    async def a_generate(self, prompt):
+        self.prompts.append(prompt)
+        await asyncio.sleep(0.01)
+        return prompt.upper()
+
+class FakeMetric:
+    def __init__(self, judge):
+        self.model = judge
+
+class TestSharedJudge(unittest.TestCase):
+    def test_identical_prompts_share_one_call(self):
+        judge = FakeJudge()
+        shared = SharedJudge(judge)
+        self.assertEqual(shared.generate('extract claims'), 'EXTRACT CLAIMS')
+        self.assertEqual(shared.generate('extract claims'), 'EXTRACT CLAIMS')
+        self.assertEqual(judge.prompts, ['extract claims'])
+        self.assertEqual(shared.shared_calls, 1)
+        self.assertEqual(shared.get_model_name(), 'judge')
+
+    def test_concurrent_async_prompts_share_one_call(self):
+        """Test that identical prompts sent at once wait for the call already running"""
+        judge = FakeJudge()
+        shared = SharedJudge(judge)
+
+        async def run():
+            return await asyncio.gather(*(shared.a_generate(prompt) for prompt in ['claims', 'claims', 'truths']))
+
+        self.assertEqual(asyncio.run(run()), ['CLAIMS', 'CLAIMS', 'TRUTHS'])
+        self.assertEqual(sorted(judge.prompts), ['claims', 'truths'])
+        self.assertEqual((shared.calls, shared.shared_calls), (2, 1))
+
+    def test_share_judges_groups_by_model_name(self):
+        metrics = [FakeMetric(FakeJudge()), FakeMetric(FakeJudge()), FakeMetric(None)]
+        judges = share_judges(metrics)
+        self.assertEqual(list(judges), ['judge'])
+        self.assertIs(metrics[0].model, metrics[1].model)
+        self.assertIsNone(metrics[2].model)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from datetime import datetime
+import numpy as np
+from src.frameworks.trend_statistics import TrendStatistics
+
+class TestTrendStatistics(unittest.TestCase):
+    def setUp(self):
+        self.trends = TrendStatistics(window=4)
+        for i in range(6):
+            self.trends.update({
+                'gpt-4': {'relevancy': 0.5 + 0.1 * i, 'hallucination': 0.2},
+                'claude': {'relevancy': 0.7, 'hallucination': 0.3 if i % 2 else 0.1}
+            })
+
+    def test_running_mean_and_variance_match_numpy(self):
+        history = [0.5 + 0.1 * i for i in range(6)]
+        row, column = self.trends.models.index('gpt-4'), self.trends.metrics.index('relevancy')
+        self.assertAlmostEqual(self.trends.mean[row, column], np.mean(history))
+        self.assertAlmostEqual(self.trends.variance[row, column], np.var(history, ddof=1))
+
+    def test_improvement_and_stability(self):
+        improvement = self.trends.improvement()
+        self.assertAlmostEqual(improvement['gpt-4'], 0.05)
+        alternating_slope = np.polyfit(range(6), [0.1, 0.3] * 3, 1)[0]
+        self.assertAlmostEqual(improvement['claude'], alternating_slope / 2)
+        stability = self.trends.stability()
+        self.assertGreater(stability['claude'], 0.0)
+        self.assertLess(stability['claude'], 1.0)
+
+    def test_detect_changes(self):
+        changes = self.trends.detect_changes(threshold=0.15)
+        self.assertEqual(changes, ['claude hallucination: 0.10 -> 0.30'])
+
+    def test_changes_only_from_the_latest_run(self):
+        """Test that a model missing from the newest run does not re-report its old change"""
+        self.trends.update({'gpt-4': {'relevancy': 1.0}})
+        self.assertEqual(self.trends.detect_changes(threshold=0.15), [])
+
+    def test_replay_groups_rows_by_run(self):
+        """Test that two runs sharing a timestamp replay as two runs"""
+        timestamp = datetime(2024, 1, 1)
+        trends = TrendStatistics(window=4)
+        trends.replay([
+            (1, timestamp, 'gpt-4', 'relevancy', 0.5),
+            (2, timestamp, 'gpt-4', 'relevancy', 0.9),
+        ])
+        self.assertEqual(trends.runs, 2)
+        self.assertEqual(trends.detect_changes(threshold=0.1), ['gpt-4 relevancy: 0.50 -> 0.90'])
+
+    def test_window_and_new_models(self):
+        self.trends.update({'gemini': {'relevancy': 0.9}})
+        self.assertEqual(self.trends.window_values().shape, (3, 2, 4))
+        self.assertTrue(np.isnan(self.trends.last[2, 1]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+from src.frameworks.usage_store import UsageStore
+
+class TestUsageStore(unittest.TestCase):
+    def setUp(self):
+        self.store = UsageStore(initial_capacity=2)
+
+    def test_append_grows_capacity(self):
+        """Test that appends past the initial capacity keep every row"""
+        for i in range(10):
+            self.store.append('model_a' if i % 2 else 'model_b', 100, 200.0, 1.0, True)
+        self.assertEqual(len(self.store), 10)
+        self.assertEqual(self.store.tokens_used.sum(), 1000)
+
+    def test_to_frame(self):
+        """Test flushing the columns into a DataFrame"""
+        self.store.append('model_a', 100, 200.0, 1.0, True)
+        frame = self.store.to_frame()
+        self.assertEqual(list(frame.columns), UsageStore.COLUMNS)
+        self.assertEqual(frame.iloc[0]['model'], 'model_a')
+        self.assertIs(self.store.to_frame(), frame)
+        self.store.append('model_b', 50, 100.0, 0.5, False)
+        self.assertEqual(len(self.store.to_frame()), 2)
+
+    def test_sum_by_model(self):
+        """Test per-model sums computed from the arrays"""
+        self.store.append('model_a', 100, 200.0, 1.0, True)
+        self.store.append('model_b', 50, 100.0, 0.5, False)
+        self.store.append('model_a', 100, 200.0, 1.0, True)
+        self.assertEqual(self.store.sum_by_model(self.store.cost), {'model_a': 2.0, 'model_b': 0.5})
+
+    def test_extend(self):
+        """Test bulk-appending columns"""
+        self.store.append('model_a', 100, 200.0, 1.0, True)
+        self.store.extend(
+            models=['model_b', 'model_a', 'model_b'],
+            tokens_used=np.array([10, 20, 30]),
+            latency_ms=np.array([1.0, 2.0, 3.0]),
+            cost=np.array([0.1, 0.2, 0.3]),
+            success=np.array([True, False, True]),
+            timestamps=np.array(['2024-01-01', '2024-01-02', '2024-01-03'], dtype='datetime64[ns]')
+        )
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(list(self.store.to_frame()['model']), ['model_a', 'model_b', 'model_a', 'model_b'])
+        self.assertAlmostEqual(self.store.sum_by_model(self.store.cost)['model_b'], 0.4)
+
+    def test_token_split_and_set_cost(self):
+        """Test the prompt/completion split and replacing costs"""
+        self.store.append('model_a', 100, 200.0, 1.0, True, completion_tokens=30, cached_tokens=20)
+        self.store.append('model_b', 50, 100.0, 0.5, False)
+        self.assertEqual(self.store.prompt_tokens.tolist(), [70, 50])
+        self.assertEqual(self.store.completion_tokens.tolist(), [30, 0])
+        self.assertEqual(self.store.cached_tokens.tolist(), [20, 0])
+        self.store.to_frame()
+        self.store.set_cost(np.array([2.0, 3.0]))
+        self.assertEqual(self.store.to_frame()['cost'].tolist(), [2.0, 3.0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import re
+import zlib
+import numpy as np
+
+HASH_DIMENSIONS = 2 ** 14
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def _features(answer):
+    """Hashed unigram and bigram ids of a normalized answer"""
+    tokens = TOKEN_PATTERN.findall(answer.lower())
+    grams = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    return np.array([zlib.crc32(gram.encode('utf-8')) % HASH_DIMENSIONS for gram in grams], dtype=np.int64)
+
+def similarity_matrix(answers):
+    """Pairwise TF-IDF cosine similarity of answers, as one matrix product over hashed term counts"""
+    counts = np.zeros((len(answers), HASH_DIMENSIONS))
+    for row, answer in enumerate(answers):
+        np.add.at(counts[row], _features(answer), 1.0)
+    document_frequency = (counts > 0).sum(axis=0)
+    idf = np.log((1 + len(answers)) / (1 + document_frequency)) + 1
+    weighted = counts * idf
+    norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+    weighted = np.divide(weighted, norms, out=np.zeros_like(weighted), where=norms > 0)
+    return weighted @ weighted.T
+
+def cluster_answers(answers, threshold=0.5):
+    """
+    Label each answer with a cluster id. Each unlabeled answer, in order, starts a cluster and pulls in
+    every unlabeled answer at least `threshold` similar to it, so paraphrases of one answer vote together.
+    """
+    similarity = similarity_matrix(answers)
+    labels = np.full(len(answers), -1)
+    cluster = 0
+    for i in range(len(answers)):
+        if labels[i] < 0:
+            labels[(labels < 0) & (similarity[i] >= threshold)] = cluster
+            labels[i] = cluster
+            cluster += 1
+    return labels, similarity
+
+class AnswerClusters:
+    """
+    Votes over clusters of similar answers instead of exact strings.
+    A vote is decided once the leading cluster is `margin` votes ahead of the runner-up, or when
+    the samples still pending could not change the winner. With the default margin of 2, two
+    agreeing samples settle a prompt, and disagreement calls for more samples.
+    """
+
+    def __init__(self, threshold=0.5, margin=2):
+        self.threshold = threshold
+        self.margin = margin
+        self.answers = []
+        self.labels = np.zeros(0, dtype=np.int64)
+        self.similarity = np.zeros((0, 0))
+
+    def add(self, answer):
+        self.answers.append(answer)
+        self.labels, self.similarity = cluster_answers(self.answers, self.threshold)
+
+    def counts(self):
+        return np.bincount(self.labels) if len(self.answers) else np.zeros(0, dtype=np.int64)
+
+    def lead(self):
+        """(votes for the leading cluster, votes for the runner-up)"""
+        ranked = np.sort(self.counts())[::-1].tolist() + [0, 0]
+        return ranked[0], ranked[1]
+
+    def decided(self, pending):
+        leader, runner_up = self.lead()
+        return leader - runner_up >= self.margin or leader > runner_up + pending
+
+    def samples_needed(self):
+        """Fewest further samples that could decide the vote"""
+        leader, runner_up = self.lead()
+        return max(1, self.margin - (leader - runner_up))
+
+    def representative(self):
+        """The medoid of the largest cluster (earliest cluster on ties), or None with no answers"""
+        if not self.answers:
+            return None
+        members = np.flatnonzero(self.labels == np.argmax(self.counts()))
+        within = self.similarity[np.ix_(members, members)].sum(axis=1)
+        return self.answers[members[np.argmax(within)]]
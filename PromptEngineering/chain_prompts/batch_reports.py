@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import chain_prompts
+from prompt_requests import PromptClient
+
+DOCUMENT_EXTENSIONS = ('.txt', '.md', '.html')
+
+def iter_documents(source):
+    """
+    Stream (document id, text) pairs from a directory of text files or from a JSONL file
+    whose records have an "id" and a "text" field. Nothing is read ahead of the consumer.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(DOCUMENT_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    with open(path, 'r', encoding='utf-8') as file:
+                        yield os.path.relpath(path, source), file.read()
+        return
+
+    with open(source, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            if line.strip():
+                record = json.loads(line)
+                yield str(record.get('id', line_number)), record['text']
+
+def _read_checkpoint(output_path):
+    """Yield (line, record or None) for each line; torn or unparseable lines have no record"""
+    with open(output_path, 'rb') as file:
+        for line in file:
+            try:
+                yield line, json.loads(line) if line.endswith(b'\n') else None
+            except ValueError:
+                yield line, None
+
+def load_checkpoint(output_path):
+    """
+    Ids already reported successfully. The output file is the checkpoint: every newline-terminated line is
+    one finished document. Error records, duplicates and a line torn by an interruption are dropped from the
+    file, so a rerun writes each retried document once and never appends onto a torn line.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    clean = True
+    for line, record in _read_checkpoint(output_path):
+        if record is not None and 'report' in record and record['id'] not in done:
+            done.add(record['id'])
+        else:
+            clean = False
+    if clean:
+        return done
+
+    kept = set()
+    with open(output_path + '.tmp', 'wb') as file:
+        for line, record in _read_checkpoint(output_path):
+            if record is not None and 'report' in record and record['id'] not in kept:
+                kept.add(record['id'])
+                file.write(line)
+    os.replace(output_path + '.tmp', output_path)
+    return done
+
+# Call counter of the document a worker is processing; sample tasks started for it inherit the context
+document_calls = contextvars.ContextVar('document_calls')
+
+async def _counting_send(request):
+    document_calls.get()['calls'] += 1
+    return await chain_prompts.run_prompt_async(request)
+
+def _append(output, line):
+    output.write(line)
+    output.flush()
+
+class BatchStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.calls = 0
+
+    def summary(self):
+        minutes = (time.perf_counter() - self.started) / 60
+        processed = self.completed + self.failed
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'docs_per_minute': self.completed / minutes if minutes else 0.0,
+            'calls_per_doc': self.calls / processed if processed else 0.0
+        }
+
+async def run_batch(source, output_path, concurrency=8, progress_every=100):
+    """
+    Write one compliance report per document to `output_path` (JSONL), with at most `concurrency`
+    documents in flight. Documents already in the output are skipped, so rerunning resumes the batch.
+    """
+    loop = asyncio.get_running_loop()
+    # Reading documents and writing reports happen on one thread, in order and off the event loop
+    io = ThreadPoolExecutor(max_workers=1)
+    stats = BatchStats()
+    # One client for the batch, so identical requests across documents are still shared; it counts the
+    # provider calls of the document being processed (memo hits and merged requests cost nothing)
+    client = PromptClient(_counting_send)
+
+    async def worker(documents, output):
+        while True:
+            item = await loop.run_in_executor(io, next, documents, None)
+            if item is None:
+                return
+            doc_id, text = item
+            if doc_id in done:
+                stats.skipped += 1
+                continue
+            started = time.perf_counter()
+            calls = {'calls': 0}
+            document_calls.set(calls)
+            try:
+                record = {'id': doc_id, 'report': await chain_prompts.generate_compliance_report_async(text, client)}
+                stats.completed += 1
+            except Exception as e:
+                record = {'id': doc_id, 'error': str(e) or type(e).__name__}
+                stats.failed += 1
+            record['calls'] = calls['calls']
+            record['seconds'] = time.perf_counter() - started
+            stats.calls += record['calls']
+            await loop.run_in_executor(io, _append, output, json.dumps(record) + '\n')
+            if progress_every and (stats.completed + stats.failed) % progress_every == 0:
+                print(json.dumps(stats.summary()), file=sys.stderr)
+
+    try:
+        done = await loop.run_in_executor(io, load_checkpoint, output_path)
+        documents = iter_documents(source)
+        output = await loop.run_in_executor(io, partial(open, output_path, 'a', encoding='utf-8'))
+        try:
+            await asyncio.gather(*(worker(documents, output) for _ in range(concurrency)))
+        finally:
+            await loop.run_in_executor(io, output.close)
+    finally:
+        io.shutdown()
+    return stats.summary()
+
+def main():
+    parser = argparse.ArgumentParser(description='Write compliance reports for a corpus of promotional materials')
+    parser.add_argument('source', help='directory of text files, or a JSONL file with "id" and "text" fields')
+    parser.add_argument('--output', default='compliance_reports.jsonl', help='JSONL output, also used to resume')
+    parser.add_argument('--concurrency', type=int, default=8, help='documents processed at once')
+    parser.add_argument('--progress-every', type=int, default=100)
+    args = parser.parse_args()
+
+    chain_prompts.configure_from_env()
+    summary = asyncio.run(run_batch(args.source, args.output, args.concurrency, args.progress_every))
+    print(json.dumps(summary, indent=2))
+
+if __name__ == '__main__':
+    main()
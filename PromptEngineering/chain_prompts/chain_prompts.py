@@ -1,3 +1,12 @@
+import asyncio
+import json
+import os
+import sys
+import urllib.request
+from answer_clustering import AnswerClusters
+from guardrails import GuardrailPipeline
+from prompt_requests import PromptClient, PromptRequest, SamplingParams
+
 # Step 1: Meta Prompting - Setting the context for the task
 PROMPT_META = """
 You are a marketing compliance specialist at [Company] Fintech Ltd. Your task is to evaluate the compliance of promotional materials with FCA regulations and company standards while balancing creativity and effectiveness. Note that you are only responsible for compliance evaluation, not financial advice.
@@ -54,40 +63,167 @@ def aggregate_suggestions(category_results, specific_guidelines_results):
     return combined_report
 
 # Step 5: Implementing Self-Consistency on each section's results
-# Assume we have a `guardrails_check` function that validates the output for contextual compliance
-def guardrails_check(output):
+def build_request(document, prompt, sample=0):
+    """Every prompt runs under the same PROMPT_META context and promotional material, sent as a shared prefix."""
+    return PromptRequest(PROMPT_META, document, prompt, SamplingParams(sample=sample))
+
+# LLM client: complete(messages, params) -> answer text, plus an optional native async variant (see set_llm_client)
+llm_client = None
+async_llm_client = None
+
+def set_llm_client(complete, complete_async=None):
+    """
+    Route every prompt through `complete(messages, params)`, which returns the answer text.
+    `complete_async` is an optional coroutine function with the same signature for async mode; without it
+    the sync client runs in worker threads. Clears answers memoized from the previous client.
+    """
+    global llm_client, async_llm_client, prompt_client
+    llm_client, async_llm_client = complete, complete_async
+    prompt_client = PromptClient(run_prompt_async, send_sync=run_prompt)
+
+def run_prompt(request):
+    """
+    Send `request.messages` to the LLM with `request.params` and return its answer.
+    The message order is kept so the provider can cache the shared prefix.
+    """
+    if llm_client is None:
+        raise RuntimeError("No LLM client configured; call chain_prompts.set_llm_client first")
+    return llm_client(request.messages, request.params)
+
+async def run_prompt_async(request):
+    """
+    Async variant of run_prompt. A native async client stops a cancelled sample mid-request; the sync
+    client runs in a worker thread, where a sample that has already started finishes before it is dropped.
+    """
+    if async_llm_client is not None:
+        return await async_llm_client(request.messages, request.params)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, run_prompt, request)
+
+def http_chat_client(url, model, api_key=None, timeout=60):
+    """A sync client for an OpenAI-compatible chat completions endpoint, e.g. https://api.openai.com/v1/chat/completions"""
+    headers = {'Content-Type': 'application/json'}
+    if api_key:
+        headers['Authorization'] = f"Bearer {api_key}"
+
+    def complete(messages, params):
+        body = json.dumps({'model': model, 'messages': messages, 'temperature': params.temperature,
+                           'top_p': params.top_p, 'max_tokens': params.max_tokens}).encode('utf-8')
+        request = urllib.request.Request(url, data=body, headers=headers)
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.load(response)['choices'][0]['message']['content']
+    return complete
+
+def configure_from_env():
+    """Use http_chat_client when LLM_API_URL and LLM_MODEL are set (LLM_API_KEY is optional)"""
+    if os.environ.get('LLM_API_URL') and os.environ.get('LLM_MODEL'):
+        set_llm_client(http_chat_client(os.environ['LLM_API_URL'], os.environ['LLM_MODEL'],
+                                        os.environ.get('LLM_API_KEY')))
+
+# Every request goes through one client, which memoizes responses and merges identical in-flight requests
+prompt_client = PromptClient(run_prompt_async, send_sync=run_prompt)
+
+def guardrails_ai_check(output):
     """
-    Function that applies Guardrails AI to validate the output for compliance with context requirements.
-    Returns True if output is compliant, otherwise False.
+    Model-backed validation that applies Guardrails AI to check the output for compliance with context requirements.
+    Returns (passed, reason).
     """
     # Placeholder for Guardrails AI API validation
-    return True  # Assuming the output is compliant for illustration
+    return True, ""  # Assuming the output is compliant for illustration
 
-def apply_self_consistency_with_guardrails(prompt, retries=3):
-    """Run the prompt multiple times, apply Guardrails AI validation, and select the most frequent compliant answer."""
-    results = []
-    for _ in range(retries):
-        result = run_prompt(prompt)
+# Cheap local checks (banned terms, length, format) run first and short-circuit before Guardrails AI is called
+guardrails = GuardrailPipeline(model_validators=[guardrails_ai_check])
+
+def guardrails_check(output):
+    """Returns True if output is compliant, otherwise False. Verdicts are memoized by answer hash."""
+    return guardrails.validate(output).passed
+
+def apply_self_consistency_with_guardrails(prompt, retries=5, document=""):
+    """
+    Sample the prompt adaptively, apply Guardrails AI validation, and vote over clusters of similar compliant
+    answers. Two agreeing samples settle the vote; more are drawn only on disagreement, up to `retries`.
+    """
+    clusters = AnswerClusters()
+    for sample in range(retries):
+        if clusters.decided(retries - sample):
+            break
+        result = prompt_client.complete_sync(build_request(document, prompt, sample))
         if guardrails_check(result):  # Validate result with Guardrails AI
-            results.append(result)
-    
-    if results:  # Select the most common result among compliant ones
-        most_common_result = Counter(results).most_common(1)[0][0]
-        return most_common_result
-    else:
-        return "No compliant answer found."
+            clusters.add(result)
+
+    # Representative answer of the largest cluster of compliant answers
+    return clusters.representative() or "No compliant answer found."
+
+async def apply_self_consistency_with_guardrails_async(prompt, retries=5, document="", client=None):
+    """
+    Same vote as apply_self_consistency_with_guardrails, sampled concurrently: two samples first, then
+    as many more as could decide the vote. Sampling stops as soon as the vote is decided, and any
+    samples still running are cancelled. Requests go through `client` (default: prompt_client).
+    """
+    client = client or prompt_client
+    clusters = AnswerClusters()
+    running = set()
+    launched = 0
+
+    def launch(count):
+        nonlocal launched
+        for _ in range(min(count, retries - launched)):
+            request = build_request(document, prompt, launched)
+            running.add(asyncio.ensure_future(client.complete(request)))
+            launched += 1
+
+    launch(2)
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            results = [task.result() for task in done]
+            running -= done
+            verdicts = await asyncio.gather(*(guardrails.validate_async(result) for result in results))
+            for result, verdict in zip(results, verdicts):
+                if verdict.passed:  # Validated with the guardrail pipeline
+                    clusters.add(result)
+            pending = len(running) + retries - launched
+            if clusters.decided(pending):
+                break
+            launch(clusters.samples_needed() - len(running))
+    finally:
+        for task in running:
+            task.cancel()
+
+    return clusters.representative() or "No compliant answer found."
 
 # Step 6: Generating the Final Report with specified outputs
-def generate_compliance_report():
+def generate_compliance_report(document=""):
     # Processing main categories (ToT)
-    category_results = [apply_self_consistency_with_guardrails(prompt) for prompt in PROMPT_CATEGORIES]
+    category_results = [apply_self_consistency_with_guardrails(prompt, document=document) for prompt in PROMPT_CATEGORIES]
 
     # Processing specific guidelines (Prompt Chaining + CoT)
-    specific_guidelines_results = [apply_self_consistency_with_guardrails(prompt) for prompt in SPECIFIC_GUIDELINES_PROMPTS]
+    specific_guidelines_results = [apply_self_consistency_with_guardrails(prompt, document=document) for prompt in SPECIFIC_GUIDELINES_PROMPTS]
 
     # Aggregating results into the structured report with specified conditions
     return aggregate_suggestions(category_results, specific_guidelines_results)
 
-# Run the full analysis
-compliance_report = generate_compliance_report()
-print(compliance_report)
+async def generate_compliance_report_async(document="", client=None):
+    """Fan out every category and guideline prompt, and all their samples, at once: about one round-trip per report."""
+    prompts = PROMPT_CATEGORIES + SPECIFIC_GUIDELINES_PROMPTS
+    results = await asyncio.gather(*(apply_self_consistency_with_guardrails_async(prompt, document=document, client=client)
+                                     for prompt in prompts))
+    return aggregate_suggestions(results[:len(PROMPT_CATEGORIES)], results[len(PROMPT_CATEGORIES):])
+
+# Run the full analysis: python chain_prompts.py [--async] [material.txt]
+# (--async fans out all prompts concurrently; without a file the material is read from stdin;
+# the LLM endpoint comes from LLM_API_URL, LLM_MODEL and LLM_API_KEY)
+if __name__ == '__main__':
+    configure_from_env()
+    args = sys.argv[1:]
+    paths = [arg for arg in args if arg != '--async']
+    if paths:
+        with open(paths[0], 'r', encoding='utf-8') as file:
+            document = file.read()
+    else:
+        document = sys.stdin.read()
+    if '--async' in args:
+        compliance_report = asyncio.run(generate_compliance_report_async(document))
+    else:
+        compliance_report = generate_compliance_report(document)
+    print(compliance_report)
@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import re
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+# Superlatives that must not be claimed in a compliance answer; discussing them is fine
+BANNED_TERMS = ['best', 'safest']
+QUOTED_SPAN = re.compile(r"\"[^\"]*\"|“[^”]*”|(?<!\w)'[^'\n]*'(?!\w)|‘[^’]*’")
+CLAUSE_BREAK = re.compile(r"[.;:!?,]|\bbut\b", re.IGNORECASE)
+NEGATION = re.compile(r"\b(?:not|never|no|avoid)\b|n['’]t\b", re.IGNORECASE)
+ADVISORY = re.compile(r"\b(?:is|it's|be)\s+$", re.IGNORECASE)  # "it is best to ..."
+REFUSAL = re.compile(r"\bas an ai\b|\bi (?:cannot|can't|am unable to) (?:help|assist|comply)\b", re.IGNORECASE)
+
+@dataclass(frozen=True)
+class Verdict:
+    passed: bool
+    validator: str = ''  # the validator that failed
+    reason: str = ''
+    tier: str = ''
+
+PASSED = Verdict(True)
+
+def _is_claim(text, match):
+    """A matched term is a claim unless its clause negates it or it advises ("it is best to ...")"""
+    clause = CLAUSE_BREAK.split(text[:match.start()])[-1]
+    if NEGATION.search(clause):
+        return False
+    return not (ADVISORY.search(clause) and re.match(r"\s+to\b", text[match.end():], re.IGNORECASE))
+
+def banned_terms_check(answer, terms=BANNED_TERMS):
+    """
+    Reject banned terms used as claims. Quoting a term from the material (e.g. replace "best"), negating it
+    ("not the safest") and advisory wording ("it is best to") are allowed.
+    """
+    unquoted = QUOTED_SPAN.sub(' ', answer)
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\b", re.IGNORECASE)
+    for match in pattern.finditer(unquoted):
+        if _is_claim(unquoted, match):
+            return False, f'claims "{match.group(0)}"'
+    return True, ''
+
+def length_check(answer, min_chars=20, max_words=400):
+    words = len(answer.split())
+    if len(answer.strip()) < min_chars:
+        return False, 'too short'
+    if words > max_words:
+        return False, f'{words} words, limit is {max_words}'
+    return True, ''
+
+def format_check(answer):
+    """Reject refusals and boilerplate instead of an evaluation"""
+    return (False, 'refusal or boilerplate') if REFUSAL.search(answer) else (True, '')
+
+LOCAL_CHECKS = [format_check, length_check, banned_terms_check]
+
+class GuardrailPipeline:
+    """
+    Validates answers in tiers. Cheap local checks run first, in order, and the first failure
+    short-circuits before any model-backed validator runs. Model-backed validators are independent,
+    so they run concurrently, and the first failure cancels the rest. Verdicts are memoized by answer
+    hash (LRU, up to max_entries), and identical answers validated at the same time share one run.
+
+    Validators return (passed, reason). Model-backed validators may be sync or async functions.
+    """
+
+    def __init__(self, local_checks=None, model_validators=None, max_entries=10000):
+        self.local_checks = LOCAL_CHECKS if local_checks is None else local_checks
+        self.model_validators = model_validators or []
+        self.max_entries = max_entries
+        self.stats = {'validated': 0, 'memo_hits': 0, 'merged': 0, 'local_rejections': 0, 'model_runs': 0}
+        self._memo = OrderedDict()
+        self._in_flight = {}
+        self._executor = None
+
+    def validate(self, answer):
+        """Validate from sync code; model-backed validators run concurrently on worker threads"""
+        key = self._key(answer)
+        verdict = self._cached(key)
+        if verdict is None:
+            verdict = self._check_local(answer) or self._run_models_sync(answer)
+            self._store(key, verdict)
+        return verdict
+
+    async def validate_async(self, answer):
+        key = self._key(answer)
+        verdict = self._cached(key)
+        if verdict is not None:
+            return verdict
+        if key in self._in_flight:
+            self.stats['merged'] += 1
+        else:
+            self._in_flight[key] = asyncio.ensure_future(self._validate_uncached(key, answer))
+        return await asyncio.shield(self._in_flight[key])
+
+    async def _validate_uncached(self, key, answer):
+        try:
+            verdict = self._check_local(answer) or await self._run_models_async(answer)
+            self._store(key, verdict)
+            return verdict
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _check_local(self, answer):
+        """The first failing local check's verdict, or None when all pass"""
+        for check in self.local_checks:
+            passed, reason = check(answer)
+            if not passed:
+                self.stats['local_rejections'] += 1
+                return Verdict(False, check.__name__, reason, 'local')
+        return None
+
+    def _run_models_sync(self, answer):
+        if not self.model_validators:
+            return PASSED
+        self.stats['model_runs'] += 1
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.model_validators))
+        futures = {self._executor.submit(self._call_sync, validator, answer): validator
+                   for validator in self.model_validators}
+        try:
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    validator = futures.pop(future)
+                    passed, reason = future.result()
+                    if not passed:
+                        return Verdict(False, validator.__name__, reason, 'model')
+        finally:
+            for future in futures:
+                future.cancel()
+        return PASSED
+
+    async def _run_models_async(self, answer):
+        if not self.model_validators:
+            return PASSED
+        self.stats['model_runs'] += 1
+        tasks = {asyncio.ensure_future(self._call_async(validator, answer)): validator
+                 for validator in self.model_validators}
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    validator = tasks.pop(task)
+                    passed, reason = task.result()
+                    if not passed:
+                        return Verdict(False, validator.__name__, reason, 'model')
+        finally:
+            for task in tasks:
+                task.cancel()
+        return PASSED
+
+    @staticmethod
+    def _call_sync(validator, answer):
+        if asyncio.iscoroutinefunction(validator):
+            return asyncio.run(validator(answer))
+        return validator(answer)
+
+    @staticmethod
+    async def _call_async(validator, answer):
+        if asyncio.iscoroutinefunction(validator):
+            return await validator(answer)
+        return await asyncio.get_running_loop().run_in_executor(None, validator, answer)
+
+    @staticmethod
+    def _key(answer):
+        return hashlib.sha256(answer.encode('utf-8')).hexdigest()
+
+    def _cached(self, key):
+        self.stats['validated'] += 1
+        verdict = self._memo.get(key)
+        if verdict is not None:
+            self._memo.move_to_end(key)
+            self.stats['memo_hits'] += 1
+        return verdict
+
+    def _store(self, key, verdict):
+        self._memo[key] = verdict
+        if len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+@dataclass(frozen=True)
+class SamplingParams:
+    """Sampling settings for one request. `sample` numbers self-consistency samples so each stays a distinct request."""
+    temperature: float = 0.7
+    top_p: float = 1.0
+    max_tokens: int = 512
+    sample: int = 0
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+@dataclass(frozen=True)
+class PromptRequest:
+    """
+    One chat request, laid out as a stable shared prefix followed by a per-prompt suffix.
+    The prefix (system context, then the promotional material) is byte-identical for every prompt
+    on the same document, so providers with prefix caching only process it once.
+    """
+    system: str
+    document: str
+    prompt: str
+    params: SamplingParams = field(default_factory=SamplingParams)
+
+    @property
+    def prefix_messages(self):
+        return [
+            {'role': 'system', 'content': self.system},
+            {'role': 'user', 'content': f"Promotional material to evaluate:\n\n{self.document}"}
+        ]
+
+    @property
+    def messages(self):
+        return self.prefix_messages + [{'role': 'user', 'content': self.prompt.strip()}]
+
+    @property
+    def prefix_key(self):
+        """Identifies the shared prefix, e.g. for providers that take an explicit cache key"""
+        return content_hash(self.system + '\0' + self.document)
+
+    @property
+    def key(self):
+        """Memoization key: (document hash, prompt, sampling params), plus the system context"""
+        return content_hash('\0'.join([self.prefix_key, self.prompt, repr(self.params)]))
+
+class PromptClient:
+    """
+    Sends PromptRequests through an async `send(request) -> str` callable, or through the blocking
+    `send_sync(request) -> str` with complete_sync. Responses are memoized per request key (LRU, up to
+    max_entries), and both paths share the memo. Identical requests that are in flight at the same time
+    share one call; an async call is only cancelled once every caller waiting on it has been cancelled.
+    """
+
+    def __init__(self, send, max_entries=10000, send_sync=None):
+        self.send = send
+        self.send_sync = send_sync
+        self.max_entries = max_entries
+        self.stats = {'calls': 0, 'memo_hits': 0, 'merged': 0}
+        self._memo = OrderedDict()
+        self._in_flight = {}
+        self._in_flight_sync = {}
+        self._lock = threading.Lock()  # sync callers may run on several threads
+
+    async def complete(self, request):
+        key = request.key
+        with self._lock:
+            response = self._recall(key)
+        if response is not None:
+            return response
+
+        entry = self._in_flight.get(key)
+        if entry is None:
+            entry = self._in_flight[key] = {'task': asyncio.ensure_future(self._call(request)), 'waiters': 0}
+            self.stats['calls'] += 1
+        else:
+            self.stats['merged'] += 1
+
+        entry['waiters'] += 1
+        try:
+            return await asyncio.shield(entry['task'])
+        finally:
+            entry['waiters'] -= 1
+            if not entry['waiters'] and not entry['task'].done():
+                entry['task'].cancel()
+
+    def complete_sync(self, request):
+        """Blocking variant of complete; identical requests from concurrent threads share one call"""
+        key = request.key
+        with self._lock:
+            response = self._recall(key)
+            if response is not None:
+                return response
+            future = self._in_flight_sync.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight_sync[key] = Future()
+                self.stats['calls'] += 1
+            else:
+                self.stats['merged'] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            response = self.send_sync(request)
+        except BaseException as error:
+            with self._lock:
+                self._in_flight_sync.pop(key, None)
+            future.set_exception(error)
+            raise
+        with self._lock:
+            self._in_flight_sync.pop(key, None)
+            self._remember(key, response)
+        future.set_result(response)
+        return response
+
+    async def _call(self, request):
+        try:
+            response = await self.send(request)
+        finally:
+            self._in_flight.pop(request.key, None)
+        with self._lock:
+            self._remember(request.key, response)
+        return response
+
+    def _recall(self, key):
+        """Memoized response for key, or None; the caller must hold the lock"""
+        if key not in self._memo:
+            return None
+        self._memo.move_to_end(key)
+        self.stats['memo_hits'] += 1
+        return self._memo[key]
+
+    def _remember(self, key, response):
+        """The caller must hold the lock"""
+        self._memo[key] = response
+        if len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
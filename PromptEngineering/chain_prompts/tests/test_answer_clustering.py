@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from answer_clustering import AnswerClusters, cluster_answers, similarity_matrix
+
+RISK_WARNING = 'Add a prominent capital at risk warning next to the projected returns table.'
+RISK_PARAPHRASE = 'Add a prominent capital at risk warning beside the projected returns table.'
+SOURCES = 'Date the performance chart and cite the source of the quoted market statistics.'
+TRADEMARK = 'Replace the trademark logo until written permission from the owner is confirmed.'
+
+class TestClusterAnswers(unittest.TestCase):
+    def test_similarity_is_symmetric_with_unit_diagonal(self):
+        similarity = similarity_matrix([RISK_WARNING, SOURCES, ''])
+        np.testing.assert_allclose(similarity, similarity.T)
+        np.testing.assert_allclose(np.diag(similarity)[:2], 1.0)
+        self.assertEqual(similarity[2, 2], 0.0)
+
+    def test_paraphrases_share_a_cluster(self):
+        labels, _ = cluster_answers([RISK_WARNING, SOURCES, RISK_PARAPHRASE, TRADEMARK])
+        self.assertEqual(labels.tolist(), [0, 1, 0, 2])
+
+    def test_case_and_punctuation_do_not_matter(self):
+        labels, _ = cluster_answers([RISK_WARNING, RISK_WARNING.upper().rstrip('.') + '!'])
+        self.assertEqual(labels.tolist(), [0, 0])
+
+class TestAnswerClusters(unittest.TestCase):
+    def clusters(self, *answers, **kwargs):
+        clusters = AnswerClusters(**kwargs)
+        for answer in answers:
+            clusters.add(answer)
+        return clusters
+
+    def test_no_answers(self):
+        clusters = AnswerClusters()
+        self.assertIsNone(clusters.representative())
+        self.assertFalse(clusters.decided(pending=3))
+        self.assertEqual(clusters.samples_needed(), 2)
+
+    def test_two_agreeing_answers_decide(self):
+        clusters = self.clusters(RISK_WARNING, RISK_PARAPHRASE)
+        self.assertEqual(clusters.lead(), (2, 0))
+        self.assertTrue(clusters.decided(pending=3))
+
+    def test_disagreement_needs_more_samples(self):
+        clusters = self.clusters(RISK_WARNING, SOURCES)
+        self.assertFalse(clusters.decided(pending=3))
+        self.assertEqual(clusters.samples_needed(), 2)
+        clusters.add(RISK_PARAPHRASE)
+        self.assertFalse(clusters.decided(pending=2))
+        self.assertEqual(clusters.samples_needed(), 1)
+
+    def test_decided_when_pending_samples_cannot_change_the_winner(self):
+        clusters = self.clusters(RISK_WARNING, SOURCES, RISK_PARAPHRASE)
+        self.assertFalse(clusters.decided(pending=1))
+        self.assertTrue(clusters.decided(pending=0))
+
+    def test_representative_is_from_the_largest_cluster(self):
+        clusters = self.clusters(SOURCES, RISK_WARNING, TRADEMARK, RISK_PARAPHRASE)
+        self.assertIn(clusters.representative(), [RISK_WARNING, RISK_PARAPHRASE])
+
+    def test_ties_go_to_the_earliest_cluster(self):
+        self.assertEqual(self.clusters(SOURCES, TRADEMARK).representative(), SOURCES)
+
+    def test_margin_sets_samples_needed(self):
+        clusters = self.clusters(RISK_WARNING, margin=3)
+        self.assertEqual(clusters.samples_needed(), 2)
+        self.assertFalse(clusters.decided(pending=2))
+
+if __name__ == '__main__':
+    unittest.main()
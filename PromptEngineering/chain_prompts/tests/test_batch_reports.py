@@ -0,0 +1,117 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+import chain_prompts
+from batch_reports import load_checkpoint, run_batch
+
+PROMPTS = len(chain_prompts.PROMPT_CATEGORIES) + len(chain_prompts.SPECIFIC_GUIDELINES_PROMPTS)
+ANSWER = 'Clarify the savings rate wording and explain the variable interest terms plainly.'
+
+class FakeLLM:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.requests = []
+
+    def complete(self, messages, params):
+        return ANSWER
+
+    async def complete_async(self, messages, params):
+        self.requests.append(messages[1]['content'])
+        await asyncio.sleep(0.01)
+        if any(document in messages[1]['content'] for document in self.failing):
+            raise ConnectionError('provider unavailable')
+        return ANSWER
+
+class TestBatchReports(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(chain_prompts.set_llm_client, None)
+        self.source = os.path.join(directory.name, 'materials.jsonl')
+        self.output = os.path.join(directory.name, 'reports.jsonl')
+
+    def write_source(self, documents):
+        with open(self.source, 'w', encoding='utf-8') as file:
+            for doc_id, text in documents:
+                file.write(json.dumps({'id': doc_id, 'text': text}) + '\n')
+
+    def run_with(self, llm, concurrency=2):
+        chain_prompts.set_llm_client(llm.complete, llm.complete_async)
+        return asyncio.run(run_batch(self.source, self.output, concurrency=concurrency, progress_every=0))
+
+    def records(self):
+        with open(self.output, 'r', encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_rerun_skips_finished_documents(self):
+        self.write_source([('a', 'Save with us at 5%.'), ('b', 'The safest ISA in town.')])
+        first = self.run_with(FakeLLM())
+        llm = FakeLLM()
+        second = self.run_with(llm)
+        self.assertEqual(first['completed'], 2)
+        self.assertEqual((second['completed'], second['skipped']), (0, 2))
+        self.assertEqual(llm.requests, [])
+        self.assertEqual([record['id'] for record in self.records()], ['a', 'b'])
+
+    def test_rerun_replaces_error_records(self):
+        self.write_source([('a', 'Save with us at 5%.'), ('b', 'The safest ISA in town.')])
+        first = self.run_with(FakeLLM(failing=['safest ISA']))
+        second = self.run_with(FakeLLM())
+        records = self.records()
+        self.assertEqual((first['completed'], first['failed']), (1, 1))
+        self.assertEqual((second['completed'], second['skipped']), (1, 1))
+        self.assertEqual(sorted(record['id'] for record in records), ['a', 'b'])
+        self.assertTrue(all('report' in record for record in records))
+
+    def test_calls_are_counted_per_document(self):
+        # Two identical documents in flight together share their requests, which count once
+        self.write_source([('a', 'Save with us at 5%.'), ('b', 'Save with us at 5%.'), ('c', 'Other material.')])
+        llm = FakeLLM()
+        self.run_with(llm, concurrency=3)
+        calls = {record['id']: record['calls'] for record in self.records()}
+        self.assertEqual(sum(calls.values()), len(llm.requests))
+        self.assertEqual(sorted([calls['a'], calls['b']]), [0, 2 * PROMPTS])
+        self.assertEqual(calls['c'], 2 * PROMPTS)
+
+class TestLoadCheckpoint(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'reports.jsonl')
+
+    def write(self, text):
+        with open(self.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+
+    def read(self):
+        with open(self.output, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def test_missing_output_means_nothing_done(self):
+        self.assertEqual(load_checkpoint(self.output), set())
+
+    def test_torn_last_line_is_dropped(self):
+        self.write('{"id": "a", "report": "ok"}\n{"id": "b", "rep')
+        self.assertEqual(load_checkpoint(self.output), {'a'})
+        self.assertEqual(self.read(), '{"id": "a", "report": "ok"}\n')
+
+    def test_last_line_without_newline_is_not_accepted(self):
+        self.write('{"id": "a", "report": "ok"}\n{"id": "b", "report": "ok"}')
+        self.assertEqual(load_checkpoint(self.output), {'a'})
+        self.assertTrue(self.read().endswith('\n'))
+
+    def test_error_records_and_duplicates_are_dropped(self):
+        self.write('{"id": "a", "error": "timeout"}\n{"id": "b", "report": "ok"}\n{"id": "b", "report": "again"}\n')
+        self.assertEqual(load_checkpoint(self.output), {'b'})
+        self.assertEqual(self.read(), '{"id": "b", "report": "ok"}\n')
+
+    def test_clean_checkpoint_is_left_alone(self):
+        self.write('{"id": "a", "report": "ok"}\n')
+        modified = os.stat(self.output).st_mtime_ns
+        self.assertEqual(load_checkpoint(self.output), {'a'})
+        self.assertEqual(os.stat(self.output).st_mtime_ns, modified)
+
+if __name__ == '__main__':
+    unittest.main()
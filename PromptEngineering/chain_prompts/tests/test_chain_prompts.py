@@ -0,0 +1,122 @@
+import unittest
+import asyncio
+import chain_prompts
+
+ANSWERS = [
+    'Clarify the savings rate wording and explain the variable interest terms plainly.',
+    'Add a prominent capital at risk warning next to the projected returns table.',
+    'Date the performance chart and cite the source of the quoted market statistics.',
+    'Remove the competitor comparison or support it with an independent survey reference.',
+    'Replace the trademark logo until written permission from the owner is confirmed.',
+]
+
+class FakeLLM:
+    """Answers by sample number through answer_of(prompt, sample) and records every request"""
+
+    def __init__(self, answer_of=lambda prompt, sample: ANSWERS[0], delay=0.01):
+        self.answer_of = answer_of
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    def complete(self, messages, params):
+        self.requests.append((messages[-1]['content'], params.sample))
+        return self.answer_of(messages[-1]['content'], params.sample)
+
+    async def complete_async(self, messages, params):
+        self.requests.append((messages[-1]['content'], params.sample))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay(params.sample) if callable(self.delay) else self.delay)
+            return self.answer_of(messages[-1]['content'], params.sample)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+
+class TestAsyncSelfConsistency(unittest.TestCase):
+    def use(self, llm):
+        chain_prompts.set_llm_client(llm.complete, llm.complete_async)
+        self.addCleanup(chain_prompts.set_llm_client, None)
+        return llm
+
+    def test_report_fans_out_every_prompt_at_once(self):
+        llm = self.use(FakeLLM())
+        report = asyncio.run(chain_prompts.generate_compliance_report_async('Save with us at 5%.'))
+        prompts = len(chain_prompts.PROMPT_CATEGORIES) + len(chain_prompts.SPECIFIC_GUIDELINES_PROMPTS)
+        self.assertIn('Final Compliance Report', report)
+        # Two agreeing samples settle each prompt, and all of them are in flight together
+        self.assertEqual(len(llm.requests), 2 * prompts)
+        self.assertEqual(llm.peak, 2 * prompts)
+
+    def test_agreement_never_sends_remaining_samples(self):
+        llm = self.use(FakeLLM())
+        result = asyncio.run(chain_prompts.apply_self_consistency_with_guardrails_async('Check tone.', retries=5))
+        self.assertEqual(result, ANSWERS[0])
+        self.assertEqual(sorted(sample for _, sample in llm.requests), [0, 1])
+
+    def test_disagreement_draws_only_samples_that_could_decide(self):
+        # Samples 0 and 1 disagree; 2 and 3 both side with sample 0, which settles the vote
+        llm = self.use(FakeLLM(lambda prompt, sample: ANSWERS[1] if sample == 1 else ANSWERS[0]))
+        result = asyncio.run(chain_prompts.apply_self_consistency_with_guardrails_async('Check tone.', retries=5))
+        self.assertEqual(result, ANSWERS[0])
+        self.assertEqual(sorted(sample for _, sample in llm.requests), [0, 1, 2, 3])
+
+    def test_samples_stop_at_retries(self):
+        llm = self.use(FakeLLM(lambda prompt, sample: ANSWERS[sample]))
+        asyncio.run(chain_prompts.apply_self_consistency_with_guardrails_async('Check tone.', retries=5))
+        self.assertEqual(sorted(sample for _, sample in llm.requests), [0, 1, 2, 3, 4])
+
+    def test_failed_sample_cancels_running_samples(self):
+        def answer_of(prompt, sample):
+            if sample == 0:
+                raise ConnectionError('provider unavailable')
+            return ANSWERS[0]
+
+        llm = self.use(FakeLLM(answer_of, delay=lambda sample: 0.01 if sample == 0 else 5))
+        with self.assertRaises(ConnectionError):
+            asyncio.run(chain_prompts.apply_self_consistency_with_guardrails_async('Check tone.', retries=5))
+        self.assertEqual(llm.cancelled, 1)
+        self.assertEqual(len(llm.requests), 2)
+
+    def test_cancelling_a_report_cancels_its_samples(self):
+        llm = self.use(FakeLLM(delay=5))
+
+        async def cancel_report():
+            task = asyncio.ensure_future(chain_prompts.generate_compliance_report_async('Save with us at 5%.'))
+            while llm.active < 2:
+                await asyncio.sleep(0.001)
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_report())
+        self.assertEqual(llm.active, 0)
+        self.assertEqual(llm.cancelled, len(llm.requests))
+
+    def test_sync_report_uses_the_same_client(self):
+        llm = self.use(FakeLLM())
+        chain_prompts.generate_compliance_report('Save with us at 5%.')
+        prompts = len(chain_prompts.PROMPT_CATEGORIES) + len(chain_prompts.SPECIFIC_GUIDELINES_PROMPTS)
+        self.assertEqual(len(llm.requests), 2 * prompts)
+
+    def test_repeated_sync_report_is_memoized(self):
+        llm = self.use(FakeLLM())
+        first = chain_prompts.generate_compliance_report('Save with us at 5%.')
+        sent = len(llm.requests)
+        self.assertEqual(chain_prompts.generate_compliance_report('Save with us at 5%.'), first)
+        asyncio.run(chain_prompts.generate_compliance_report_async('Save with us at 5%.'))
+        self.assertEqual(len(llm.requests), sent)
+
+    def test_run_prompt_needs_a_client(self):
+        chain_prompts.set_llm_client(None)
+        with self.assertRaises(RuntimeError):
+            chain_prompts.run_prompt(chain_prompts.build_request('material', 'Check tone.'))
+
+if __name__ == '__main__':
+    unittest.main()
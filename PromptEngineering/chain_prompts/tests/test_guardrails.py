@@ -0,0 +1,139 @@
+import unittest
+import asyncio
+import threading
+import time
+from guardrails import GuardrailPipeline, banned_terms_check, format_check, length_check
+
+ANSWER = 'Add a prominent capital at risk warning next to the projected returns table.'
+
+def async_validator(passed=True, delay=0.01, name='model_check'):
+    """Model-backed validator stand-in that records its calls and cancellations"""
+    async def validator(answer):
+        validator.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            validator.cancelled += 1
+            raise
+        return passed, '' if passed else 'not compliant'
+    validator.__name__ = name
+    validator.calls = validator.cancelled = 0
+    return validator
+
+def counting_validator(passed=True):
+    def model_check(answer):
+        model_check.calls += 1
+        return passed, '' if passed else 'not compliant'
+    model_check.calls = 0
+    return model_check
+
+class TestLocalChecks(unittest.TestCase):
+    def test_banned_terms_only_count_unquoted(self):
+        self.assertFalse(banned_terms_check('This is the best savings account on the market.')[0])
+        self.assertTrue(banned_terms_check('Replace "best" with a supported claim about the rate.')[0])
+
+    def test_negated_terms_are_allowed(self):
+        self.assertTrue(banned_terms_check('Do not call the account the safest place for savings.')[0])
+        self.assertTrue(banned_terms_check("The fund isn't the best performer, so drop the comparison.")[0])
+        self.assertEqual(banned_terms_check('Rates vary, but this is the best account.'), (False, 'claims "best"'))
+
+    def test_advisory_wording_is_allowed(self):
+        self.assertTrue(banned_terms_check('It is best to include a risk warning.')[0])
+        self.assertTrue(banned_terms_check("It's best to date the performance chart.")[0])
+        self.assertFalse(banned_terms_check('This account is best for first-time savers.')[0])
+
+    def test_risk_warnings_are_allowed(self):
+        self.assertTrue(banned_terms_check('Add a warning that returns are not guaranteed and capital is at risk.')[0])
+        self.assertTrue(banned_terms_check('State that no investment is risk-free.')[0])
+
+    def test_length_limits(self):
+        self.assertEqual(length_check('Too short.'), (False, 'too short'))
+        self.assertFalse(length_check('word ' * 401)[0])
+        self.assertTrue(length_check(ANSWER)[0])
+
+    def test_refusals_are_rejected(self):
+        self.assertFalse(format_check('As an AI, I cannot provide compliance advice here.')[0])
+        self.assertTrue(format_check(ANSWER)[0])
+
+class TestGuardrailPipeline(unittest.TestCase):
+    def test_local_failure_short_circuits_model_validators(self):
+        validator = counting_validator()
+        pipeline = GuardrailPipeline(model_validators=[validator])
+        verdict = pipeline.validate('This is the safest way to grow your savings every year.')
+        self.assertFalse(verdict.passed)
+        self.assertEqual((verdict.tier, verdict.validator), ('local', 'banned_terms_check'))
+        self.assertEqual(validator.calls, 0)
+        self.assertEqual(pipeline.stats['local_rejections'], 1)
+
+    def test_first_failing_local_check_decides(self):
+        # Short and uses a banned term; the length check runs first
+        self.assertEqual(GuardrailPipeline().validate('The best.').validator, 'length_check')
+
+    def test_model_validators_run_after_local_checks_pass(self):
+        validator = counting_validator(passed=False)
+        verdict = GuardrailPipeline(model_validators=[validator]).validate(ANSWER)
+        self.assertEqual((verdict.passed, verdict.tier, verdict.reason), (False, 'model', 'not compliant'))
+        self.assertEqual(validator.calls, 1)
+
+    def test_first_async_model_failure_cancels_the_rest(self):
+        slow, failing = async_validator(delay=5, name='slow_check'), async_validator(passed=False, name='fast_check')
+        pipeline = GuardrailPipeline(model_validators=[slow, failing])
+        verdict = asyncio.run(pipeline.validate_async(ANSWER))
+        self.assertEqual((verdict.passed, verdict.validator), (False, 'fast_check'))
+        self.assertEqual(slow.cancelled, 1)
+
+    def test_model_validators_run_concurrently(self):
+        both_running = threading.Barrier(2, timeout=1)
+
+        def first_check(answer):
+            both_running.wait()
+            return True, ''
+
+        def second_check(answer):
+            both_running.wait()
+            return True, ''
+
+        self.assertTrue(GuardrailPipeline(model_validators=[first_check, second_check]).validate(ANSWER).passed)
+        self.assertTrue(asyncio.run(
+            GuardrailPipeline(model_validators=[first_check, second_check]).validate_async(ANSWER)
+        ).passed)
+
+    def test_sync_failure_does_not_wait_for_slow_validators(self):
+        def slow_check(answer):
+            time.sleep(0.5)
+            return True, ''
+
+        pipeline = GuardrailPipeline(model_validators=[slow_check, counting_validator(passed=False)])
+        started = time.perf_counter()
+        self.assertFalse(pipeline.validate(ANSWER).passed)
+        self.assertLess(time.perf_counter() - started, 0.4)
+
+    def test_verdicts_are_memoized(self):
+        validator = counting_validator()
+        pipeline = GuardrailPipeline(model_validators=[validator])
+        self.assertTrue(pipeline.validate(ANSWER).passed)
+        self.assertTrue(asyncio.run(pipeline.validate_async(ANSWER)).passed)
+        self.assertEqual(validator.calls, 1)
+        self.assertEqual(pipeline.stats['memo_hits'], 1)
+
+    def test_identical_answers_in_flight_share_one_run(self):
+        validator = async_validator()
+        pipeline = GuardrailPipeline(model_validators=[validator])
+
+        async def together():
+            return await asyncio.gather(*(pipeline.validate_async(ANSWER) for _ in range(3)))
+
+        self.assertTrue(all(verdict.passed for verdict in asyncio.run(together())))
+        self.assertEqual(validator.calls, 1)
+        self.assertEqual(pipeline.stats['merged'], 2)
+        self.assertEqual(pipeline.stats['model_runs'], 1)
+
+    def test_memo_evicts_least_recently_used(self):
+        validator = counting_validator()
+        pipeline = GuardrailPipeline(model_validators=[validator], max_entries=1)
+        for answer in [ANSWER, ANSWER + ' Also date the chart.', ANSWER]:
+            pipeline.validate(answer)
+        self.assertEqual(validator.calls, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import asyncio
+import threading
+import time
+from prompt_requests import PromptClient, PromptRequest, SamplingParams
+
+def request(prompt='Check tone.', document='Save with us at 5%.', sample=0):
+    return PromptRequest('You are a compliance specialist.', document, prompt, SamplingParams(sample=sample))
+
+class FakeSend:
+    def __init__(self, delay=0.01, error=None):
+        self.delay = delay
+        self.error = error
+        self.sent = []
+        self.cancelled = 0
+
+    async def __call__(self, request):
+        self.sent.append(request)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return f"answer to {request.prompt} #{request.params.sample}"
+
+class TestPromptRequest(unittest.TestCase):
+    def test_prompts_on_one_document_share_a_prefix(self):
+        first, second = request('Check tone.'), request('Check sources.')
+        self.assertEqual(first.prefix_key, second.prefix_key)
+        self.assertEqual(first.messages[:2], second.messages[:2])
+        self.assertNotEqual(first.key, second.key)
+        self.assertNotEqual(first.prefix_key, request(document='Other material.').prefix_key)
+
+    def test_samples_are_distinct_requests(self):
+        self.assertNotEqual(request(sample=0).key, request(sample=1).key)
+        self.assertEqual(request(sample=1).key, request(sample=1).key)
+
+class TestPromptClient(unittest.TestCase):
+    def test_repeated_request_is_memoized(self):
+        send = FakeSend()
+        client = PromptClient(send)
+
+        async def twice():
+            return await client.complete(request()), await client.complete(request())
+
+        first, second = asyncio.run(twice())
+        self.assertEqual(first, second)
+        self.assertEqual(len(send.sent), 1)
+        self.assertEqual(client.stats, {'calls': 1, 'memo_hits': 1, 'merged': 0})
+
+    def test_identical_requests_in_flight_share_one_call(self):
+        send = FakeSend()
+        client = PromptClient(send)
+
+        async def together():
+            return await asyncio.gather(*(client.complete(request()) for _ in range(3)),
+                                        client.complete(request(sample=1)))
+
+        results = asyncio.run(together())
+        self.assertEqual(len(set(results[:3])), 1)
+        self.assertEqual(len(send.sent), 2)
+        self.assertEqual(client.stats, {'calls': 2, 'memo_hits': 0, 'merged': 2})
+
+    def test_shared_call_survives_until_every_waiter_is_cancelled(self):
+        send = FakeSend(delay=0.05)
+        client = PromptClient(send)
+
+        async def cancel_waiters():
+            first = asyncio.ensure_future(client.complete(request()))
+            second = asyncio.ensure_future(client.complete(request()))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            self.assertEqual(await second, 'answer to Check tone. #0')
+            self.assertEqual(send.cancelled, 0)
+
+            third = asyncio.ensure_future(client.complete(request(sample=1)))
+            await asyncio.sleep(0.01)
+            third.cancel()
+            await asyncio.sleep(0.01)
+
+        asyncio.run(cancel_waiters())
+        self.assertEqual(send.cancelled, 1)
+        self.assertEqual(len(send.sent), 2)
+
+    def test_failed_calls_are_not_memoized(self):
+        send = FakeSend(error=ConnectionError('provider unavailable'))
+        client = PromptClient(send)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                asyncio.run(client.complete(request()))
+        self.assertEqual(len(send.sent), 2)
+
+    def test_memo_evicts_least_recently_used(self):
+        send = FakeSend(delay=0)
+        client = PromptClient(send, max_entries=2)
+
+        async def complete_all(samples):
+            for sample in samples:
+                await client.complete(request(sample=sample))
+
+        asyncio.run(complete_all([0, 1, 0, 2, 0, 1]))
+        self.assertEqual([sent.params.sample for sent in send.sent], [0, 1, 2, 1])
+
+class TestSyncPromptClient(unittest.TestCase):
+    def test_sync_and_async_share_the_memo(self):
+        sent = []
+        client = PromptClient(FakeSend(), send_sync=lambda request: sent.append(request) or 'sync answer')
+        self.assertEqual(client.complete_sync(request()), 'sync answer')
+        self.assertEqual(client.complete_sync(request()), 'sync answer')
+        self.assertEqual(asyncio.run(client.complete(request())), 'sync answer')
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(client.stats, {'calls': 1, 'memo_hits': 2, 'merged': 0})
+
+    def test_identical_requests_from_threads_share_one_call(self):
+        sent = []
+
+        def send_sync(request):
+            sent.append(request)
+            deadline = time.monotonic() + 5
+            while client.stats['merged'] < 2 and time.monotonic() < deadline:  # wait for the other threads
+                time.sleep(0.001)
+            return 'answer'
+
+        client = PromptClient(FakeSend(), send_sync=send_sync)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.complete_sync(request())))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['answer'] * 3)
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(client.stats['merged'], 2)
+
+    def test_failed_sync_calls_are_not_memoized(self):
+        def send_sync(request):
+            raise ConnectionError('provider unavailable')
+
+        client = PromptClient(FakeSend(), send_sync=send_sync)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                client.complete_sync(request())
+        self.assertEqual(client.stats['calls'], 2)
+
+if __name__ == '__main__':
+    unittest.main()